@@ -0,0 +1,201 @@
+"""
+Cross-run defect analytics backed by pre-aggregated rollups.
+
+When a job completes its defects are folded into ``defect_rollups``: one
+counter per (day, domain, url, feature, dimension, value), where dimension is
+``severity``, ``category``, ``browser``, ``platform`` or ``total``. Dashboard
+queries only sum these counters, so their cost depends on the number of
+distinct days/values in range rather than on how many reports were stored.
+"""
+import os
+import re
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+
+from job_store import BACKEND_DIR, connect_sqlite
+
+
+DEFAULT_DB_PATH = os.path.join(BACKEND_DIR, 'data', 'analytics.db')
+
+DIMENSIONS = ('severity', 'category', 'browser', 'platform', 'total')
+
+
+def split_values(value):
+    """Affected browsers/platforms arrive either as lists or as comma separated strings"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = re.split(r'[,/;]|\band\b', value)
+    return sorted({str(item).strip().lower() for item in value if str(item).strip()})
+
+
+def iso_week(day):
+    """ISO 8601 week key of a ``YYYY-MM-DD`` day (``2026-W01`` for 2025-12-29 to 2026-01-04)"""
+    year, week, _ = datetime.strptime(day, '%Y-%m-%d').date().isocalendar()
+    return f'{year}-W{week:02d}'
+
+
+def url_domain(url):
+    host = urlparse(url if '://' in url else f'http://{url}').hostname or ''
+    return host.lower()
+
+
+class DefectAnalytics:
+    """Incrementally maintained defect rollups stored in SQLite"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('ANALYTICS_DB_PATH', DEFAULT_DB_PATH)
+        self._local = threading.local()
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS defect_rollups (
+                day TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                url TEXT NOT NULL,
+                feature TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                value TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, domain, url, feature, dimension, value)
+            );
+            CREATE INDEX IF NOT EXISTS defect_rollups_domain_day ON defect_rollups (domain, dimension, day);
+            CREATE INDEX IF NOT EXISTS defect_rollups_feature_day ON defect_rollups (feature, dimension, day);
+            CREATE TABLE IF NOT EXISTS run_rollups (
+                day TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                url TEXT NOT NULL,
+                runs INTEGER NOT NULL,
+                scenarios INTEGER NOT NULL,
+                defects INTEGER NOT NULL,
+                PRIMARY KEY (day, domain, url)
+            );
+            CREATE TABLE IF NOT EXISTS recorded_jobs (
+                test_id TEXT PRIMARY KEY
+            );
+        ''')
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect_sqlite(self.path)
+            conn.create_function('iso_week', 1, iso_week, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    def record_job(self, record):
+        """Fold a completed job's defects into the rollups (idempotent per job ID)"""
+        report = record.get('report') or {}
+        url = record['url']
+        domain = url_domain(url)
+        day = (record.get('completed_at') or datetime.now().isoformat())[:10]
+        defects = report.get('defects_and_gaps', []) or []
+
+        counters = {}
+        for defect in defects:
+            feature = str(defect.get('feature') or 'Unspecified').strip()
+            values = [
+                ('total', 'all'),
+                ('severity', str(defect.get('severity') or 'Medium').strip().lower()),
+                ('category', str(defect.get('category') or 'uncategorized').strip().lower())
+            ]
+            values += [('browser', browser) for browser in split_values(defect.get('affected_browsers'))]
+            values += [('platform', platform) for platform in split_values(defect.get('affected_platforms'))]
+            for dimension, value in values:
+                key = (feature, dimension, value)
+                counters[key] = counters.get(key, 0) + 1
+
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            inserted = conn.execute(
+                'INSERT OR IGNORE INTO recorded_jobs (test_id) VALUES (?)', (record['id'],)
+            ).rowcount
+            if not inserted:
+                conn.execute('COMMIT')
+                return False
+            conn.executemany(
+                '''INSERT INTO defect_rollups (day, domain, url, feature, dimension, value, count)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (day, domain, url, feature, dimension, value)
+                   DO UPDATE SET count = count + excluded.count''',
+                [(day, domain, url, feature, dimension, value, count)
+                 for (feature, dimension, value), count in counters.items()]
+            )
+            conn.execute(
+                '''INSERT INTO run_rollups (day, domain, url, runs, scenarios, defects)
+                   VALUES (?, ?, ?, 1, ?, ?)
+                   ON CONFLICT (day, domain, url) DO UPDATE SET
+                       runs = runs + 1,
+                       scenarios = scenarios + excluded.scenarios,
+                       defects = defects + excluded.defects''',
+                (day, domain, url,
+                 len(report.get('scenarios', []) or []) + len(report.get('browser_compatibility_scenarios', []) or []),
+                 len(defects))
+            )
+            conn.execute('COMMIT')
+            return True
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def query_defects(self, dimension='severity', domain=None, url=None, feature=None,
+                      since=None, until=None, interval='day'):
+        """Defect counts per period and dimension value, plus run counts for context"""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        if interval not in ('day', 'week'):
+            raise ValueError(f"Unknown interval: {interval}")
+
+        # ISO week keys (YYYY-Www, Monday to Sunday) sort and group correctly; a week across New Year
+        # belongs to the ISO year of its Thursday instead of being split in two
+        period = "day" if interval == 'day' else "iso_week(day)"
+        filters, params = ['dimension = ?'], [dimension]
+        for column, value in (('domain', domain), ('url', url), ('feature', feature)):
+            if value:
+                filters.append(f'{column} = ?')
+                params.append(value.lower() if column == 'domain' else value)
+        if since:
+            filters.append('day >= ?')
+            params.append(since)
+        if until:
+            filters.append('day <= ?')
+            params.append(until)
+
+        rows = self.conn.execute(
+            f'''SELECT {period} AS period, value, SUM(count) FROM defect_rollups
+                WHERE {' AND '.join(filters)}
+                GROUP BY period, value ORDER BY period, value''',
+            params
+        ).fetchall()
+
+        run_filters = [f for f in filters[1:] if not f.startswith('feature')]
+        run_params = [p for f, p in zip(filters[1:], params[1:]) if not f.startswith('feature')]
+        run_rows = self.conn.execute(
+            f'''SELECT {period} AS period, SUM(runs), SUM(scenarios), SUM(defects) FROM run_rollups
+                {('WHERE ' + ' AND '.join(run_filters)) if run_filters else ''}
+                GROUP BY period ORDER BY period''',
+            run_params
+        ).fetchall()
+
+        totals = {}
+        for _, value, count in rows:
+            totals[value] = totals.get(value, 0) + count
+
+        return {
+            'dimension': dimension,
+            'interval': interval,
+            'series': [{'period': p, 'value': v, 'count': c} for p, v, c in rows],
+            'totals': totals,
+            'runs': [{'period': p, 'runs': r, 'scenarios': s, 'defects': d} for p, r, s, d in run_rows]
+        }
+
+    def list_features(self, domain=None):
+        """Features seen so far (optionally for one domain), most defects first"""
+        query = "SELECT feature, SUM(count) FROM defect_rollups WHERE dimension = 'total'"
+        params = []
+        if domain:
+            query += ' AND domain = ?'
+            params.append(domain.lower())
+        query += ' GROUP BY feature ORDER BY SUM(count) DESC'
+        return [{'feature': feature, 'defects': count} for feature, count in self.conn.execute(query, params)]
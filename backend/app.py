@@ -1,32 +1,328 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, send_file, stream_with_context
 from flask_cors import CORS
-from openai import OpenAI
+from flask.json.provider import DefaultJSONProvider
+import asyncio
+import copy
 import os
 import sys
 import uuid
 import time
 import threading
 import json
+import csv
+import io
+from contextlib import contextmanager
 from datetime import datetime
-import requests
 from urllib.parse import urlparse, urljoin
 import re
-from dotenv import load_dotenv
+from compact_reports import CompactMapping
+from compression import cache_job_result, compress_response, static_file
+from job_store import BACKEND_DIR, TERMINAL_STATUSES, create_job_store
+from analytics import DefectAnalytics
+from exporters import export_records, parse_sections
+from report_renderer import ReportCache, RENDER_FORMATS
+from llm_transport import LLMTransport
+from model_routing import ModelRouter
+from url_canonical import canonicalize_url
+from template_baselines import TemplateBaselineCache, TemplateMatcher, baseline_key
+from cancellation import CancelToken, JobCancelled
+from deadlines import Deadline, PARSE_RESERVE_SECONDS, deadline_seconds
+from scheduler import DEFAULT_OWNER, JobDispatcher, normalize_priority
+from scenario_dedup import dedup_threshold, dedupe_scenarios
+from schedules import ScheduleRunner, ScheduleStore, schedule_summary
+from webhooks import EVENTS, WebhookDispatcher, WebhookOutbox, job_summary, validate_callback_url
+from page_packing import (PackResults, browser_scenarios_per_page, is_thin_page, pack_budget, pack_output_tokens, page_key,
+                          page_output_tokens, plan_packs, scenarios_per_page, split_pack_response, thin_page_names)
+from scoring import normalize_scenarios, derive_status, compute_category_scores, compute_confidence_score
 
+# Only pay for python-dotenv when there is a .env file to read
+ENV_FILE = os.path.join(BACKEND_DIR, '.env')
+if os.path.exists(ENV_FILE):
+    from dotenv import load_dotenv
+    load_dotenv(ENV_FILE)
 
-load_dotenv()
+class ReportJSONProvider(DefaultJSONProvider):
+    """Reports in the memory store stay compact records (see compact_reports.py) until a response is serialized"""
 
-app = Flask(__name__)
+    @staticmethod
+    def default(o):
+        if isinstance(o, CompactMapping):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+
+# No Flask static folder: /static/ belongs to the frontend build (see serve_frontend)
+app = Flask(__name__, static_folder=None)
+app.json = ReportJSONProvider(app)
 CORS(app)
 
-# Initialize Perplexity client
-client = OpenAI(
-    api_key="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",
-    base_url="https://api.perplexity.ai"
-)
+# Production frontend build, served with its precompressed assets when present (see compression.py)
+FRONTEND_BUILD_DIR = os.getenv('FRONTEND_BUILD_DIR', os.path.join(BACKEND_DIR, '..', 'frontend', 'build'))
+
+
+@app.after_request
+def compress_api_response(response):
+    """gzip/brotli for JSON and other text responses above COMPRESS_MIN_BYTES"""
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
+# Perplexity clients are built on first use: importing openai (httpx, pydantic) is the
+# bulk of the import time, and API workers, the CLI and replay runs may never need them
+client = None
+async_client = None
+_client_lock = threading.Lock()
+
+# Connection pools of the clients (see llm_pool.py), sized for this many job slots;
+# worker.py sets its own slot count before the first client is built
+llm_pool_concurrency = int(os.getenv('JOB_CONCURRENCY', '32'))
+llm_http_client = llm_pool_transport = None
+llm_async_http_client = llm_async_pool_transport = None
+
+
+def client_options():
+    """Perplexity connection settings from the environment"""
+    api_key = os.getenv('PERPLEXITY_API_KEY')
+    if not api_key:
+        raise RuntimeError("PERPLEXITY_API_KEY is not set (add it to the environment or backend/.env)")
+    return {'api_key': api_key, 'base_url': os.getenv('PERPLEXITY_BASE_URL', "https://api.perplexity.ai")}
+
+
+def get_client():
+    """Lazily build the Perplexity (OpenAI-compatible) client on the shared connection pool"""
+    global client, llm_http_client, llm_pool_transport
+    if client is None:
+        with _client_lock:
+            if client is None:
+                from openai import OpenAI
+                options = client_options()
+                try:
+                    from llm_pool import build_http_client
+                    llm_http_client, llm_pool_transport = build_http_client(llm_pool_concurrency)
+                except Exception as e:
+                    # Without the tuned pool jobs still run, on the client's default one
+                    print(f"LLM connection pool unavailable, using the default client: {str(e)}")
+                    client = OpenAI(**options)
+                else:
+                    client = OpenAI(**options, http_client=llm_http_client)
+    return client
+
+
+def get_async_client():
+    """Lazily build the AsyncOpenAI client (only the async serving mode needs it)"""
+    global async_client, llm_async_http_client, llm_async_pool_transport
+    if async_client is None:
+        with _client_lock:
+            if async_client is None:
+                from openai import AsyncOpenAI
+                options = client_options()
+                try:
+                    from llm_pool import build_async_http_client
+                    llm_async_http_client, llm_async_pool_transport = build_async_http_client(
+                        int(os.getenv('ASYNC_JOB_CONCURRENCY', '1000'))
+                    )
+                except Exception as e:
+                    print(f"LLM connection pool unavailable, using the default async client: {str(e)}")
+                    async_client = AsyncOpenAI(**options)
+                else:
+                    async_client = AsyncOpenAI(**options, http_client=llm_async_http_client)
+    return async_client
+
+
+def llm_pool_enabled():
+    """Whether LLM connections are worth prewarming (not in replay mode, credentials present)"""
+    return (llm_transport.mode != 'replay' and bool(os.getenv('PERPLEXITY_API_KEY'))
+            and int(os.getenv('LLM_POOL_PREWARM', '4')) > 0)
+
+
+def prewarm_llm_pool():
+    """Build the client and open its keep-alive connections on a background thread (server and worker startup)"""
+    if not llm_pool_enabled():
+        return
+
+    def run():
+        started = time.perf_counter()
+        try:
+            get_client()
+            if llm_http_client is None:
+                return
+            from llm_pool import prewarm, prewarm_count
+            prewarm(llm_http_client, client_options()['base_url'], prewarm_count())
+        except Exception as e:
+            print(f"LLM connection prewarm failed: {str(e)}")
+            return
+        print(f"Prewarmed LLM connection pool in {time.perf_counter() - started:.2f}s: {llm_pool_transport.snapshot()}")
+
+    threading.Thread(target=run, name='llm-prewarm', daemon=True).start()
+
+
+async def prewarm_llm_pool_async():
+    """Open the async client's keep-alive connections (ASGI server startup)"""
+    if not llm_pool_enabled():
+        return
+    try:
+        get_async_client()
+        if llm_async_http_client is None:
+            return
+        from llm_pool import prewarm_async, prewarm_count
+        await prewarm_async(llm_async_http_client, client_options()['base_url'], prewarm_count())
+    except Exception as e:
+        print(f"LLM connection prewarm failed: {str(e)}")
+
+
+def llm_pool_metrics():
+    pools = {}
+    if llm_pool_transport is not None:
+        pools['sync'] = llm_pool_transport.snapshot()
+    if llm_async_pool_transport is not None:
+        pools['async'] = llm_async_pool_transport.snapshot()
+    return pools
 
 
+# live / record / replay (LLM_MODE), see llm_transport.py
+llm_transport = LLMTransport(get_client, get_async_client)
+
+# Model tier of each LLM call, escalated on unusable output (see model_routing.py)
+model_router = ModelRouter()
+
+# Pages of a URL template share a baseline report (see template_baselines.py)
+template_matcher = TemplateMatcher()
+template_baselines = TemplateBaselineCache()
+# How long a job waits for another job to build its template's baseline
+TEMPLATE_BASELINE_WAIT_SECONDS = float(os.getenv('TEMPLATE_BASELINE_WAIT_SECONDS', '300'))
+
+# Near-duplicate scenarios are merged before scoring (see scenario_dedup.py)
+SCENARIO_DEDUP_THRESHOLD = dedup_threshold()
+
+# Thin pages of a batch can share one LLM call (see page_packing.py)
+pack_results = PackResults()
+THIN_PAGE_NAMES = thin_page_names()
+# How long a job waits for another job of its pack to make the packed call
+PACK_WAIT_SECONDS = float(os.getenv('PACK_WAIT_SECONDS', '300'))
+
 test_results = {}
+job_store = create_job_store(test_results)
+
+defect_analytics = None
+_defect_analytics_lock = threading.Lock()
+
+
+def get_defect_analytics():
+    """Lazily open the defect rollup store shared by every process"""
+    global defect_analytics
+    if defect_analytics is None:
+        with _defect_analytics_lock:
+            if defect_analytics is None:
+                defect_analytics = DefectAnalytics()
+    return defect_analytics
+
+
+class TimelineSpan:
+    """A single timed stage of a job (offsets are relative to job creation)"""
+
+    def __init__(self, name, start_offset, attributes=None):
+        self.name = name
+        self.start_offset = start_offset
+        self.duration = None
+        self.attributes = dict(attributes or {})
+
+    def set(self, **attributes):
+        """Attach extra attributes (tokens, strategy, retries...) to the span"""
+        self.attributes.update(attributes)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "start_offset": round(self.start_offset, 3),
+            "duration": round(self.duration or 0.0, 3),
+            "attributes": self.attributes
+        }
+
+
+class JobTimeline:
+    """Collects the timing spans of one job so the report shows where the time went"""
+
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def offset(self, moment=None):
+        return (moment if moment is not None else time.perf_counter()) - self.origin
+
+    @contextmanager
+    def span(self, name, **attributes):
+        started = time.perf_counter()
+        current = TimelineSpan(name, self.offset(started), attributes)
+        try:
+            yield current
+        except Exception as e:
+            current.set(error=str(e))
+            raise
+        except (JobCancelled, asyncio.CancelledError):
+            current.set(cancelled=True)
+            raise
+        finally:
+            current.duration = time.perf_counter() - started
+            with self._lock:
+                self.spans.append(current)
+
+    def add_span(self, name, start, end, **attributes):
+        """Record a span whose boundaries were measured elsewhere (e.g. queue wait)"""
+        current = TimelineSpan(name, self.offset(start), attributes)
+        current.duration = max(0.0, end - start)
+        with self._lock:
+            self.spans.append(current)
+        return current
+
+    def to_list(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_offset)
+            return [s.to_dict() for s in spans]
+
+
+class JobContext:
+    """Per-job state threaded through the testing engine"""
+
+    def __init__(self, test_id=None, timeline=None, cancel=None, deadline_seconds=None, url_template=None, pack=None):
+        self.test_id = test_id
+        self.timeline = timeline or JobTimeline()
+        self.cancel = cancel or CancelToken()
+        self.deadline_seconds = deadline_seconds
+        self.url_template = url_template
+        self.pack = pack
+        self.deadline = None
+        self.timed_out_stages = []
+
+    @classmethod
+    def for_record(cls, record):
+        """Rebuild a context for a job created in another process (offsets stay relative to creation)"""
+        try:
+            age = time.time() - datetime.fromisoformat(record['created_at']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            age = 0.0
+        return cls(record.get('id'), JobTimeline(time.perf_counter() - max(age, 0.0)),
+                   deadline_seconds=record.get('deadline_seconds'), url_template=record.get('url_template'),
+                   pack=record.get('pack'))
+
+    def span(self, name, **attributes):
+        return self.timeline.span(name, **attributes)
+
+    def start_deadline(self):
+        """Start the deadline clock (when the job leaves the queue); no-op without a deadline"""
+        if self.deadline_seconds:
+            self.deadline = Deadline(self.deadline_seconds)
+
+    def budget(self, cap):
+        """``cap`` seconds, cut short by the deadline"""
+        return self.deadline.budget(cap) if self.deadline is not None else cap
+
+    def llm_deadline(self):
+        """Deadline for LLM calls: the job's, minus the time kept for parsing and scoring"""
+        return self.deadline.minus(PARSE_RESERVE_SECONDS) if self.deadline is not None else None
+
+    def mark_timed_out(self, stage):
+        if stage not in self.timed_out_stages:
+            self.timed_out_stages.append(stage)
+
 
 # ... (keep all your imports and Flask app setup)
 
@@ -267,7 +563,7 @@ class TestingEngine:
         """Generate prompt specifically for browser compatibility testing"""
         
          # Normalize inputs for consistency
-        normalized_url = url.lower().rstrip('/')
+        normalized_url = canonicalize_url(url)
         normalized_browsers = sorted([b.lower().strip() for b in browsers])
         normalized_platforms = sorted([p.lower().strip() for p in platforms])
         
@@ -366,17 +662,16 @@ Generate browser compatibility test scenarios focusing on:
 }}"""
         return prompt
 
-    def test_browser_compatibility(self, url, browsers, platforms):
-        """Test browser compatibility using separate LLM call"""
-        try:
-            prompt = self.generate_browser_compatibility_prompt(url, browsers, platforms)
-            
-            response = client.chat.completions.create(
-                model="sonar-pro",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert browser compatibility testing engineer. 
+    def build_browser_compatibility_request(self, url, browsers, platforms, model="sonar-pro"):
+        """Build the chat completion arguments for the browser compatibility call"""
+        prompt = self.generate_browser_compatibility_prompt(url, browsers, platforms)
+        
+        return {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": """You are an expert browser compatibility testing engineer. 
 
 CRITICAL REQUIREMENTS:
 - Generate ONLY valid JSON - no markdown formatting, no code blocks, no explanations
@@ -385,45 +680,152 @@ CRITICAL REQUIREMENTS:
 - Keep all field values concise and under 100 characters
 - Ensure all required fields are present
 - Generate realistic but consistent test scenarios"""
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,  # Reduced for more consistent output
-                max_tokens=2048,  # Reduced to prevent truncation
-                frequency_penalty=0.0,
-                presence_penalty=0.0
+                },
+                {
+                    "role": "user", 
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.1,  # Reduced for more consistent output
+            "max_tokens": 2048,  # Reduced to prevent truncation
+            "frequency_penalty": 0.0,
+            "presence_penalty": 0.0
+        }
+
+    def create_completion(self, request_kwargs, span, job=None):
+        """Run a chat completion through the LLM transport, record usage and retries on the span and return the text.
+
+        With a job the call is cancellable and bounded by the job's deadline; a
+        call cut off by the deadline returns the text received so far.
+        """
+        if job is None:
+            result = llm_transport.complete(request_kwargs, call=span.name)
+        else:
+            result = llm_transport.complete(request_kwargs, job.cancel, job.llm_deadline(), span.name)
+            if result.timed_out:
+                job.mark_timed_out(span.name)
+        span.set(**result.span_attributes())
+        return result.text
+
+    async def create_completion_async(self, request_kwargs, span, job=None):
+        """Async variant of create_completion using the shared AsyncOpenAI client"""
+        result = await llm_transport.complete_async(request_kwargs, job.llm_deadline() if job is not None else None, span.name)
+        if result.timed_out:
+            job.mark_timed_out(span.name)
+        span.set(**result.span_attributes())
+        return result.text
+
+    def escalate(self, call, ladder, index, usable, job):
+        """Whether to rerun a call on the next model tier: its output was unusable and there is time left"""
+        if usable or index + 1 >= len(ladder) or call in job.timed_out_stages or job.cancel.cancelled:
+            return False
+        if job.deadline is not None and job.llm_deadline().expired:
+            return False
+        print(f"Escalating {call} from {ladder[index]} to {ladder[index + 1]} after unusable output")
+        model_router.record_escalation(call, ladder[index], ladder[index + 1])
+        return True
+
+    def complete_routed(self, call, build_request, parse, job, usable=None):
+        """Run an LLM call on its routed model tier, escalating while the parsed output is unusable.
+
+        ``build_request(model)`` returns the request arguments and ``parse(text)``
+        the parsed output; ``usable(parsed)`` defaults to "not None". Returns the
+        response text and parsed output of the last attempt.
+        """
+        usable = usable or (lambda parsed: parsed is not None)
+        ladder = model_router.ladder(call)
+        for index, tier in enumerate(ladder):
+            request_kwargs = build_request(model_router.model(tier))
+            
+            with job.span(call, model=request_kwargs['model'], tier=tier) as span:
+                response_text = self.create_completion(request_kwargs, span, job)
+            model_router.observe(call, tier, span.duration, first=not index)
+            
+            parsed = parse(response_text)
+            if not self.escalate(call, ladder, index, usable(parsed), job):
+                return response_text, parsed
+
+    async def complete_routed_async(self, call, build_request, parse, job, usable=None):
+        """Async variant of complete_routed"""
+        usable = usable or (lambda parsed: parsed is not None)
+        ladder = model_router.ladder(call)
+        for index, tier in enumerate(ladder):
+            request_kwargs = build_request(model_router.model(tier))
+            
+            with job.span(call, model=request_kwargs['model'], tier=tier) as span:
+                response_text = await self.create_completion_async(request_kwargs, span, job)
+            model_router.observe(call, tier, span.duration, first=not index)
+            
+            parsed = parse(response_text)
+            if not self.escalate(call, ladder, index, usable(parsed), job):
+                return response_text, parsed
+
+    def test_browser_compatibility(self, url, browsers, platforms, job=None):
+        """Test browser compatibility using separate LLM call (escalated to a larger model on unusable output)"""
+        job = job or JobContext()
+        try:
+            _, scenarios = self.complete_routed(
+                'llm.browser',
+                lambda model: self.build_browser_compatibility_request(url, browsers, platforms, model),
+                lambda text: self.process_browser_compatibility_response(text, job),
+                job
             )
-            
-            response_text = response.choices[0].message.content
-            print(f"Browser compatibility response length: {len(response_text) if response_text else 0}")
-            print(f"Browser compatibility response: {response_text if response_text else 'No content'}")
-            
-            if not response_text:
-                print("Empty response from browser compatibility API")
-                return self.create_default_browser_scenarios(browsers, platforms)
-            
-            # Check if response looks like it was truncated
-            if not response_text.strip().endswith('}'):
-                print("WARNING: Response appears to be truncated")
-            
-            json_data = self.extract_browser_compatibility_json(response_text)
-            
-            if json_data and 'browser_compatibility_scenarios' in json_data:
-                scenarios = json_data['browser_compatibility_scenarios']
-                print(f"Successfully extracted {len(scenarios)} browser compatibility scenarios")
-                return scenarios
-            else:
-                print("Failed to parse browser compatibility JSON, using default scenarios")
-                print(f"Raw response was: {response_text[:1000] if response_text else 'Empty'}")
-                return self.create_default_browser_scenarios(browsers, platforms)
+            return scenarios or self.create_default_browser_scenarios(browsers, platforms)
                 
         except Exception as e:
             print(f"Error testing browser compatibility: {str(e)}")
             return self.create_default_browser_scenarios(browsers, platforms)
 
+    async def test_browser_compatibility_async(self, url, browsers, platforms, job=None):
+        """Async variant of test_browser_compatibility"""
+        job = job or JobContext()
+        try:
+            _, scenarios = await self.complete_routed_async(
+                'llm.browser',
+                lambda model: self.build_browser_compatibility_request(url, browsers, platforms, model),
+                lambda text: self.process_browser_compatibility_response(text, job),
+                job
+            )
+            return scenarios or self.create_default_browser_scenarios(browsers, platforms)
+                
+        except Exception as e:
+            print(f"Error testing browser compatibility: {str(e)}")
+            return self.create_default_browser_scenarios(browsers, platforms)
+
+    def valid_browser_scenarios(self, scenarios):
+        """Browser scenarios are usable when there is at least one and each has an ID or title and a status"""
+        return isinstance(scenarios, list) and bool(scenarios) and all(
+            isinstance(scenario, dict) and (scenario.get('id') or scenario.get('title')) and scenario.get('status')
+            for scenario in scenarios
+        )
+
+    def process_browser_compatibility_response(self, response_text, job):
+        """Turn the browser compatibility LLM response into scenarios (None when unusable)"""
+        print(f"Browser compatibility response length: {len(response_text) if response_text else 0}")
+        print(f"Browser compatibility response: {response_text if response_text else 'No content'}")
+        
+        if not response_text:
+            print("Empty response from browser compatibility API")
+            return None
+        
+        # Check if response looks like it was truncated
+        if not response_text.strip().endswith('}'):
+            print("WARNING: Response appears to be truncated")
+        
+        with job.span('parse.browser') as span:
+            json_data = self.extract_browser_compatibility_json(response_text, span, job.deadline)
+        if span.attributes.get('timed_out'):
+            job.mark_timed_out(span.name)
+        
+        if json_data and self.valid_browser_scenarios(json_data.get('browser_compatibility_scenarios')):
+            scenarios = json_data['browser_compatibility_scenarios']
+            print(f"Successfully extracted {len(scenarios)} browser compatibility scenarios")
+            return scenarios
+        else:
+            print("Failed to parse or validate browser compatibility JSON")
+            print(f"Raw response was: {response_text[:1000] if response_text else 'Empty'}")
+            return None
+
     def create_default_browser_scenarios(self, browsers, platforms):
         """Create default browser compatibility scenarios when API fails"""
         default_scenarios = []
@@ -502,17 +904,16 @@ CRITICAL REQUIREMENTS:
             "description": f"Based on {total_count} browser compatibility tests with {pass_rate:.0f}% pass rate"
         }
 
-    def analyze_website(self, url, test_type, browsers, platforms, test_categories):
-        """Analyze website using Perplexity API"""
-        try:
-            prompt = self.generate_test_prompt(url, test_type, browsers, platforms, test_categories)
-            
-            response = client.chat.completions.create(
-                model="sonar-pro",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert browser compatibility testing engineer. Generate realistic browser compatibility test scenarios in valid JSON format.
+    def build_analysis_request(self, url, test_type, browsers, platforms, test_categories, model="sonar-pro"):
+        """Build the chat completion arguments for the main analysis call"""
+        prompt = self.generate_test_prompt(url, test_type, browsers, platforms, test_categories)
+        
+        return {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": """You are an expert browser compatibility testing engineer. Generate realistic browser compatibility test scenarios in valid JSON format.
                         
                         CRITICAL CONSISTENCY REQUIREMENTS:
                         - Always generate the same scenarios for identical browser/platform combinations
@@ -520,87 +921,522 @@ CRITICAL REQUIREMENTS:
                         - Process browsers in alphabetical order
                         - Maintain consistent scenario numbering (BC-001, BC-002, etc.)
                         - Use standardized status determination logic"""
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                temperature=0.0,
-                max_tokens=10000, # Increased to handle large responses and also limit max tokens remember if max tokens is 8k or less then the output result from the llm may be truncated before reaching the end of the json
-                top_p=0.0,
-                frequency_penalty=0.0, #top_p=0.0 → safest for consistency. top_p=0.1 → almost consistent, but you’ll still see 5–20% variance in outputs. top_p = nucleus sampling parameter.It tells the model:“Only consider the smallest set of tokens whose cumulative probability mass is ≤ top_p.”
-                presence_penalty=0.0
+                },
+                {
+                    "role": "user", 
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.0,
+            "max_tokens": 10000, # Increased to handle large responses and also limit max tokens remember if max tokens is 8k or less then the output result from the llm may be truncated before reaching the end of the json
+            "top_p": 0.0,
+            "frequency_penalty": 0.0, #top_p=0.0 → safest for consistency. top_p=0.1 → almost consistent, but you’ll still see 5–20% variance in outputs. top_p = nucleus sampling parameter.It tells the model:“Only consider the smallest set of tokens whose cumulative probability mass is ≤ top_p.”
+            "presence_penalty": 0.0
+        }
+
+    def analyze_website(self, url, test_type, browsers, platforms, test_categories, job=None):
+        """Analyze website using Perplexity API (pages of a template with a cached baseline only get a delta call)"""
+        job = job or JobContext()
+        template = key = None
+        building = False
+        try:
+            url = canonicalize_url(url)
+            if job.pack is not None:
+                report = self.analyze_packed_page(url, test_type, browsers, platforms, test_categories, job)
+                if report is not None:
+                    return report
+            template, key = self.template_baseline_key(url, test_type, browsers, platforms, test_categories, job)
+            if key is not None:
+                baseline, building = self.find_baseline(key, job)
+                if baseline is not None:
+                    return self.analyze_page_delta(url, template, baseline, test_categories, job)
+            
+            response_text, json_data = self.complete_routed(
+                'llm.main',
+                lambda model: self.build_analysis_request(url, test_type, browsers, platforms, test_categories, model),
+                lambda text: self.parse_main_output(text, job),
+                job,
+                usable=lambda parsed: bool(parsed and parsed.get('scenarios'))
             )
             
-            response_text = response.choices[0].message.content
-            print(f"Raw response from Perplexity: {response_text if response_text else 'No content'}...")
-            
-            if not response_text:
+            # A call cut off by the deadline still gets a (partial or fallback) report
+            if not response_text and 'llm.main' not in job.timed_out_stages:
                 print("Empty response from Perplexity API")
                 return self.create_error_report(url, "Empty response from Perplexity API", test_categories)
             
-            json_data = self.extract_json_from_response(response_text)
+            report = self.parse_analysis_response(url, response_text, json_data, test_categories, job)
             
-            if json_data:
-                # Test browser compatibility separately
-                browser_scenarios = self.test_browser_compatibility(url, browsers, platforms)
-                json_data['browser_compatibility_scenarios'] = browser_scenarios
-                
-                # Add default performance data if not provided by LLM
-                if 'performance' not in json_data:
-                    json_data['performance'] = {
-                        "page_load_time": "2.3s",
-                        "core_web_vitals": {
-                            "fcp_desktop": "0.9s",
-                            "fcp_mobile": "1.3s",
-                            "lcp_desktop": "1.5s",
-                            "lcp_mobile": "2.1s"
-                        }
-                    }
-                
-                # Calculate browser compatibility score
-                browser_score = self.calculate_browser_compatibility_score(browser_scenarios)
+            # Test browser compatibility separately (fallback reports included)
+            browser_scenarios = self.test_browser_compatibility(url, browsers, platforms, job)
+            report = self.score_report(report, browser_scenarios, test_categories, job)
+            if building and json_data and not job.timed_out_stages:
+                self.store_baseline(key, url, report, job)
+            return report
                 
-                # Calculate category scores based on actual test results
-                category_scores = self.calculate_category_scores(json_data, test_categories)
-                
-                # Add browser compatibility score to category scores
-                category_scores['browser_compatibility'] = browser_score
-                json_data['category_scores'] = category_scores
-                
-                # Calculate dynamic confidence score based on actual results
-                confidence_score = self.calculate_dynamic_confidence_score(json_data)
-                json_data['confidence_score'] = confidence_score
-                return json_data
-            else:
-                print("Failed to parse JSON, returning fallback report.")
-                fallback_report = self.create_fallback_report(url, response_text, test_categories)
-                
-                # Even fallback reports should include browser compatibility testing
-                print("Running browser compatibility tests for fallback report...")
-                browser_scenarios = self.test_browser_compatibility(url, browsers, platforms)
-                fallback_report['browser_compatibility_scenarios'] = browser_scenarios
-                
-                # Calculate browser compatibility score
-                browser_score = self.calculate_browser_compatibility_score(browser_scenarios)
-                
-                # Calculate category scores for fallback report
-                fallback_report['category_scores'] = self.calculate_category_scores(fallback_report, test_categories)
-                
-                # Add browser compatibility score to category scores
-                fallback_report['category_scores']['browser_compatibility'] = browser_score
-                
-                # Even fallback reports should have calculated confidence
-                fallback_report['confidence_score'] = self.calculate_dynamic_confidence_score(fallback_report)
-                return fallback_report
+        except Exception as e:
+            print(f"Error analyzing website: {str(e)}")
+            return self.create_error_report(url, str(e), test_categories)
+        finally:
+            if building:
+                template_baselines.release(key)
+
+    async def analyze_website_async(self, url, test_type, browsers, platforms, test_categories, job=None):
+        """Async variant of analyze_website; the main and browser calls run concurrently"""
+        job = job or JobContext()
+        template = key = None
+        building = False
+        browser_task = None
+        try:
+            url = canonicalize_url(url)
+            if job.pack is not None:
+                report = await self.analyze_packed_page_async(url, test_type, browsers, platforms, test_categories, job)
+                if report is not None:
+                    return report
+            template, key = self.template_baseline_key(url, test_type, browsers, platforms, test_categories, job)
+            if key is not None:
+                baseline, building = await self.find_baseline_async(key, job)
+                if baseline is not None:
+                    return await self.analyze_page_delta_async(url, template, baseline, test_categories, job)
+            
+            # The browser call does not depend on the main response, so start it right away
+            browser_task = asyncio.ensure_future(self.test_browser_compatibility_async(url, browsers, platforms, job))
+            
+            response_text, json_data = await self.complete_routed_async(
+                'llm.main',
+                lambda model: self.build_analysis_request(url, test_type, browsers, platforms, test_categories, model),
+                lambda text: self.parse_main_output(text, job),
+                job,
+                usable=lambda parsed: bool(parsed and parsed.get('scenarios'))
+            )
+            
+            if not response_text and 'llm.main' not in job.timed_out_stages:
+                print("Empty response from Perplexity API")
+                return self.create_error_report(url, "Empty response from Perplexity API", test_categories)
+            
+            report = self.parse_analysis_response(url, response_text, json_data, test_categories, job)
+            browser_scenarios = await browser_task
+            report = self.score_report(report, browser_scenarios, test_categories, job)
+            if building and json_data and not job.timed_out_stages:
+                self.store_baseline(key, url, report, job)
+            return report
                 
         except Exception as e:
             print(f"Error analyzing website: {str(e)}")
             return self.create_error_report(url, str(e), test_categories)
+        finally:
+            # Also covers cancellation of the job's task while the main call is in flight
+            if browser_task is not None and not browser_task.done():
+                browser_task.cancel()
+            if building:
+                template_baselines.release(key)
+
+    def parse_main_output(self, response_text, job):
+        print(f"Raw response from Perplexity: {response_text if response_text else 'No content'}...")
+        return self.parse_analysis_json(response_text, job) if response_text else None
+
+    def template_baseline_key(self, url, test_type, browsers, platforms, test_categories, job):
+        """``(template, baseline key)`` of a canonical URL, or ``(None, None)`` when it matches no template"""
+        template = template_matcher.match(url, job.url_template)
+        if template is None:
+            return None, None
+        return template, baseline_key(template, test_type, browsers, platforms, test_categories)
+
+    def find_baseline(self, key, job):
+        """Cached baseline for the key, waiting while another job builds it.
+
+        Returns ``(baseline, building)``; ``building`` means there is no baseline
+        yet and this job's full analysis is expected to provide it.
+        """
+        limit = time.monotonic() + job.budget(TEMPLATE_BASELINE_WAIT_SECONDS)
+        while True:
+            baseline, pending = template_baselines.claim(key)
+            if pending is None:
+                return baseline, baseline is None
+            with job.span('template.wait'):
+                while not pending.wait(0.25):
+                    job.cancel.raise_if_cancelled()
+                    if time.monotonic() >= limit:
+                        return None, False
+
+    async def find_baseline_async(self, key, job):
+        """Async variant of find_baseline"""
+        limit = time.monotonic() + job.budget(TEMPLATE_BASELINE_WAIT_SECONDS)
+        while True:
+            baseline, pending = template_baselines.claim(key)
+            if pending is None:
+                return baseline, baseline is None
+            with job.span('template.wait'):
+                while not pending.is_set():
+                    if time.monotonic() >= limit:
+                        return None, False
+                    await asyncio.sleep(0.1)
 
-    def extract_json_from_response(self, response_text):
-        """Extract and parse JSON from Gemini response with multiple strategies"""
+    def store_baseline(self, key, url, report, job):
+        """Keep a full report as its template's baseline (scores are recomputed for every page)"""
+        shared = {field: value for field, value in report.items()
+                  if field not in ('category_scores', 'confidence_score', 'browser_compatibility_scenarios')}
+        template_baselines.put(key, {
+            'url': url,
+            'test_id': job.test_id,
+            'created_at': datetime.now().isoformat(),
+            'report': shared,
+            'browser_compatibility_scenarios': report.get('browser_compatibility_scenarios', [])
+        })
+
+    def build_delta_request(self, url, template, baseline, test_categories, model="sonar-pro"):
+        """Build the chat completion arguments asking only for what differs from the template's baseline"""
+        baseline_scenarios = [
+            {field: scenario.get(field) for field in ('id', 'title', 'feature', 'category', 'status')}
+            for scenario in baseline['report'].get('scenarios', [])
+        ]
+        categories_text = ", ".join(sorted(cat for cat, enabled in test_categories.items() if enabled))
+        prompt = f"""
+    The page `{url}` is built from the same template ({template}) as `{baseline['url']}`, which has already been tested.
+    Its scenarios, shared by every page of the template, are:
+    {json.dumps(baseline_scenarios, ensure_ascii=False)}
+    
+    Test ONLY what is specific to `{url}` for the categories {categories_text}: its own content, data, media,
+    links and states. Do not repeat the shared scenarios. If a shared scenario has a different outcome on this
+    page, include it with its original `id` and this page's `observed_result` and `status`.
+    
+    For every new scenario use ids PAGE-001, PAGE-002, ... and the same fields as the shared ones (`id`, `title`,
+    `feature`, `category`, `browser`, `platform`, `priority`, `steps`, `expected_result`, `observed_result`, `status`),
+    and add a `defects_and_gaps` entry (`id` PAGE-BUG-001, ..., `title`, `description`, `severity`, `feature`) for every failure.
+    
+    Respond with a single JSON object: {{"scenarios": [...], "defects_and_gaps": [...]}}
+    """
+        
+        return {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": """You are a meticulous QA engineer. Generate ONLY valid JSON - no markdown formatting, no explanations."""
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.0,
+            "max_tokens": 4000,
+            "top_p": 0.0,
+            "frequency_penalty": 0.0,
+            "presence_penalty": 0.0
+        }
+
+    def parse_delta_response(self, response_text, job):
+        """Page-specific scenarios and defects from the delta call (None when unusable)"""
+        if not response_text:
+            return None
+        with job.span('parse.delta') as span:
+            json_data = self.extract_json_from_response(response_text, span, job.deadline)
+        if span.attributes.get('timed_out'):
+            job.mark_timed_out(span.name)
+        return json_data
+
+    def merge_baseline_report(self, url, template, baseline, delta):
+        """The template's shared scenarios and defects with the page's own (and changed) ones applied"""
+        report = copy.deepcopy(baseline['report'])
+        page_scenarios = [scenario for scenario in (delta or {}).get('scenarios') or [] if isinstance(scenario, dict)]
+        page_defects = [defect for defect in (delta or {}).get('defects_and_gaps') or [] if isinstance(defect, dict)]
+        
+        changed = {scenario['id']: scenario for scenario in page_scenarios if scenario.get('id')}
+        shared_ids = set()
+        scenarios = []
+        for scenario in report.get('scenarios', []):
+            shared_ids.add(scenario.get('id'))
+            if scenario.get('id') in changed:
+                scenarios.append({**scenario, **changed[scenario['id']], 'source': 'page'})
+            else:
+                scenarios.append({**scenario, 'source': 'template'})
+        added = [{**scenario, 'source': 'page'} for scenario in page_scenarios if scenario.get('id') not in shared_ids]
+        report['scenarios'] = scenarios + added
+        
+        page_defect_ids = {defect.get('id') for defect in page_defects if defect.get('id')}
+        report['defects_and_gaps'] = [
+            defect for defect in report.get('defects_and_gaps', []) if defect.get('id') not in page_defect_ids
+        ] + page_defects
+        
+        report['template_baseline'] = {
+            'template': template,
+            'baseline_url': baseline['url'],
+            'baseline_test_id': baseline.get('test_id'),
+            'baseline_created_at': baseline.get('created_at'),
+            'page_scenarios': len(added),
+            'changed_scenarios': len(scenarios) - sum(1 for scenario in scenarios if scenario['source'] == 'template'),
+            'delta': 'applied' if delta is not None else 'unavailable'
+        }
+        return report
+
+    def analyze_page_delta(self, url, template, baseline, test_categories, job):
+        """Report for a page whose template has a baseline: only the page-specific part comes from the LLM"""
+        _, delta = self.complete_routed(
+            'llm.delta',
+            lambda model: self.build_delta_request(url, template, baseline, test_categories, model),
+            lambda text: self.parse_delta_response(text, job),
+            job
+        )
+        report = self.merge_baseline_report(url, template, baseline, delta)
+        return self.score_report(report, copy.deepcopy(baseline['browser_compatibility_scenarios']), test_categories, job)
+
+    async def analyze_page_delta_async(self, url, template, baseline, test_categories, job):
+        """Async variant of analyze_page_delta"""
+        _, delta = await self.complete_routed_async(
+            'llm.delta',
+            lambda model: self.build_delta_request(url, template, baseline, test_categories, model),
+            lambda text: self.parse_delta_response(text, job),
+            job
+        )
+        report = self.merge_baseline_report(url, template, baseline, delta)
+        return self.score_report(report, copy.deepcopy(baseline['browser_compatibility_scenarios']), test_categories, job)
+
+    def build_pack_request(self, urls, test_type, browsers, platforms, test_categories, model="sonar-pro"):
+        """Build the chat completion arguments testing several thin pages in one call"""
+        selected_categories = sorted(cat for cat, enabled in test_categories.items() if enabled)
+        categories_text = ", ".join(selected_categories)
+        browsers_text = ", ".join(browsers)
+        platforms_text = ", ".join(platforms)
+        min_scenarios = scenarios_per_page(test_categories)
+        browser_scenarios = browser_scenarios_per_page(browsers)
+        pages_text = "\n".join(f"    - {page_key(index)}: {url}" for index, url in enumerate(urls))
+        prompt = f"""
+    You are a Principal QA Architect. Test each of the following {len(urls)} pages SEPARATELY. They are small,
+    mostly static pages (legal, contact, about and similar), so a focused set of scenarios per page is enough.
+    {pages_text.strip()}
+    
+    **Test Type:** {test_type}
+    **Target Browsers:** {browsers_text}
+    **Target Platforms:** {platforms_text}
+    **Test Categories:** {categories_text}
+    
+    For EACH page:
+    1. Generate at least {min_scenarios} scenarios per page covering the categories {categories_text}, and simulate
+       every one immediately: `id` (SCENARIO-001, SCENARIO-002, ... restarting for every page), `title`, `feature`,
+       `category`, `browser`, `platform`, `priority`, `steps`, `expected_result`, `observed_result` and `status`
+       ("pass", "fail" or "warning").
+    2. Add a `defects_and_gaps` entry for every failure: `id` (BUG-001, ...), `title`, `description`, `severity`
+       (Critical, High, Medium, Low), `feature`, `affected_browsers`, `affected_platforms`.
+    3. Add {browser_scenarios} `browser_compatibility_scenarios` for {browsers_text} on {platforms_text}: `id` (BC-001, ...),
+       `title`, `test_case`, `steps`, `expected_result`, `observed_result`, `status`, `affected_browsers`,
+       `affected_platforms`, `severity`.
+    4. Add `non_functional_observations` (performance, security, accessibility, usability: 1-2 each),
+       2-3 `recommendations` and `performance` (`page_load_time` and `core_web_vitals` with `fcp_desktop`,
+       `fcp_mobile`, `lcp_desktop`, `lcp_mobile`).
+    
+    Keep every page's results about that page only and keep field values concise. Do not include a "confidence_score".
+    
+    Respond with a single JSON object with one entry per page key:
+    {{"pages": {{"P1": {{"scenarios": [...], "defects_and_gaps": [...], "browser_compatibility_scenarios": [...], "non_functional_observations": {{...}}, "recommendations": [...], "performance": {{...}}}}, "P2": {{...}}}}}}
+    """
+        
+        return {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": """You are a meticulous QA engineer. Generate ONLY valid JSON - no markdown formatting, no explanations."""
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.0,
+            "max_tokens": pack_output_tokens(),
+            "top_p": 0.0,
+            "frequency_penalty": 0.0,
+            "presence_penalty": 0.0
+        }
+
+    def parse_pack_response(self, response_text, urls, job):
+        """``{url: page result}`` of the packed call (pages without a usable result are left out)"""
+        if not response_text:
+            return {}
+        with job.span('parse.pack') as span:
+            json_data = self.extract_json_from_response(response_text, span, job.deadline, required='pages')
+            pages = split_pack_response(json_data, urls)
+            span.set(pages=len(pages))
+        if span.attributes.get('timed_out'):
+            job.mark_timed_out(span.name)
+        return pages
+
+    def take_packed_page(self, url, pages, job):
+        """Claim-or-wait for the pack's result and return this page's part (None when the pack has none for it).
+
+        ``pages()`` makes the packed call; it runs in the first job of the pack.
+        """
+        pack = job.pack
+        limit = time.monotonic() + job.budget(PACK_WAIT_SECONDS)
+        while True:
+            ready, pending = pack_results.claim(pack['id'])
+            if ready:
+                return pack_results.take(pack['id'], url)
+            if pending is None:
+                try:
+                    results = pages()
+                except Exception as e:
+                    # Every page of the pack falls back to its own analysis
+                    print(f"Packed call failed: {str(e)}")
+                    results = {}
+                except BaseException:
+                    # Cancelled: another job of the pack makes the call
+                    pack_results.release(pack['id'])
+                    raise
+                pack_results.put(pack['id'], pack['urls'], results)
+                continue
+            with job.span('pack.wait'):
+                while not pending.wait(0.25):
+                    job.cancel.raise_if_cancelled()
+                    if time.monotonic() >= limit:
+                        return None
+
+    async def take_packed_page_async(self, url, pages, job):
+        """Async variant of take_packed_page (``pages()`` is a coroutine function)"""
+        pack = job.pack
+        limit = time.monotonic() + job.budget(PACK_WAIT_SECONDS)
+        while True:
+            ready, pending = pack_results.claim(pack['id'])
+            if ready:
+                return pack_results.take(pack['id'], url)
+            if pending is None:
+                try:
+                    results = await pages()
+                except Exception as e:
+                    print(f"Packed call failed: {str(e)}")
+                    results = {}
+                except BaseException:
+                    pack_results.release(pack['id'])
+                    raise
+                pack_results.put(pack['id'], pack['urls'], results)
+                continue
+            with job.span('pack.wait'):
+                while not pending.is_set():
+                    if time.monotonic() >= limit:
+                        return None
+                    await asyncio.sleep(0.1)
+
+    def packed_page_report(self, url, page, browsers, platforms, test_categories, job):
+        """A page's report from its part of the packed response (None sends the page down the regular path)"""
+        if page is None:
+            pack_results.record_fallback()
+            print(f"No packed result for {url}, testing the page on its own")
+            return None
+        browser_scenarios = page.pop('browser_compatibility_scenarios', None)
+        if not self.valid_browser_scenarios(browser_scenarios):
+            browser_scenarios = self.create_default_browser_scenarios(browsers, platforms)
+        report = self.parse_analysis_response(url, None, page, test_categories, job)
+        report['packing'] = {
+            'pack_id': job.pack['id'],
+            'pages': len(job.pack['urls']),
+            'position': job.pack['urls'].index(url) + 1
+        }
+        return self.score_report(report, browser_scenarios, test_categories, job)
+
+    def analyze_packed_page(self, url, test_type, browsers, platforms, test_categories, job):
+        """Report of a page packed with other thin pages of its batch, from one shared LLM call"""
+        urls = job.pack['urls']
+
+        def pages():
+            _, results = self.complete_routed(
+                'llm.pack',
+                lambda model: self.build_pack_request(urls, test_type, browsers, platforms, test_categories, model),
+                lambda text: self.parse_pack_response(text, urls, job),
+                job,
+                usable=bool
+            )
+            return results
+
+        page = self.take_packed_page(url, pages, job)
+        return self.packed_page_report(url, page, browsers, platforms, test_categories, job)
+
+    async def analyze_packed_page_async(self, url, test_type, browsers, platforms, test_categories, job):
+        """Async variant of analyze_packed_page"""
+        urls = job.pack['urls']
+
+        async def pages():
+            _, results = await self.complete_routed_async(
+                'llm.pack',
+                lambda model: self.build_pack_request(urls, test_type, browsers, platforms, test_categories, model),
+                lambda text: self.parse_pack_response(text, urls, job),
+                job,
+                usable=bool
+            )
+            return results
+
+        page = await self.take_packed_page_async(url, pages, job)
+        return self.packed_page_report(url, page, browsers, platforms, test_categories, job)
+
+    def parse_analysis_json(self, response_text, job):
+        """Run the parse cascade on the main LLM response (None when no strategy succeeds)"""
+        with job.span('parse.main') as span:
+            json_data = self.extract_json_from_response(response_text, span, job.deadline)
+        if span.attributes.get('timed_out'):
+            job.mark_timed_out(span.name)
+        return json_data
+
+    def parse_analysis_response(self, url, response_text, json_data, test_categories, job):
+        """Turn the parsed main LLM response into a report, falling back to partial extraction"""
+        if json_data:
+            # Add default performance data if not provided by LLM
+            if 'performance' not in json_data:
+                json_data['performance'] = {
+                    "page_load_time": "2.3s",
+                    "core_web_vitals": {
+                        "fcp_desktop": "0.9s",
+                        "fcp_mobile": "1.3s",
+                        "lcp_desktop": "1.5s",
+                        "lcp_mobile": "2.1s"
+                    }
+                }
+            return json_data
+        
+        print("Failed to parse JSON, returning fallback report.")
+        with job.span('parse.fallback'):
+            return self.create_fallback_report(url, response_text, test_categories)
+
+    def score_report(self, report, browser_scenarios, test_categories, job):
+        """Attach browser scenarios, merge near-duplicate scenarios, calculate category and confidence scores
+        and mark reports cut short by the deadline"""
+        report['browser_compatibility_scenarios'] = browser_scenarios
+        if job.timed_out_stages:
+            report['timed_out'] = True
+            report['timed_out_stages'] = list(job.timed_out_stages)
+        
+        if SCENARIO_DEDUP_THRESHOLD and isinstance(report.get('scenarios'), list):
+            with job.span('dedup') as span:
+                before = len(report['scenarios'])
+                report['scenarios'], merged = dedupe_scenarios(report['scenarios'], SCENARIO_DEDUP_THRESHOLD)
+                report['deduplication'] = {'scenarios_before': before, 'scenarios_after': before - merged, 'merged': merged}
+                span.set(merged=merged)
+        
+        with job.span('scoring') as span:
+            # Normalize scenarios once; every score below reuses the same records
+            try:
+                records = normalize_scenarios(report.get('scenarios', []))
+                span.set(scenarios=len(records))
+            except Exception:
+                records = None
+            
+            # Calculate browser compatibility score
+            browser_score = self.calculate_browser_compatibility_score(browser_scenarios)
+            
+            # Calculate category scores based on actual test results
+            category_scores = self.calculate_category_scores(report, test_categories, records)
+            
+            # Add browser compatibility score to category scores
+            category_scores['browser_compatibility'] = browser_score
+            report['category_scores'] = category_scores
+            
+            # Calculate dynamic confidence score based on actual results
+            report['confidence_score'] = self.calculate_dynamic_confidence_score(report, records)
+        return report
+
+    def extract_json_from_response(self, response_text, span=None, deadline=None, required='scenarios'):
+        """Extract and parse JSON from Gemini response with multiple strategies (no new strategy starts after the deadline).
+
+        A strategy's result counts when it has the ``required`` key.
+        """
         strategies = [
             lambda text: self.parse_json_from_code_blocks(text),
             lambda text: self.parse_first_json_object(text),
@@ -609,10 +1445,17 @@ CRITICAL REQUIREMENTS:
         ]
         
         for strategy_index, strategy in enumerate(strategies):
+            if strategy_index and deadline is not None and deadline.expired:
+                print(f"Deadline reached, skipping JSON parsing strategies {strategy_index + 1}-{len(strategies)}")
+                if span is not None:
+                    span.set(timed_out=True, strategies_skipped=len(strategies) - strategy_index)
+                break
             try:
                 result = strategy(response_text)
-                if result and 'scenarios' in result: # Basic validation
+                if result and required in result: # Basic validation
                     print(f"Successfully parsed JSON using strategy {strategy_index + 1}")
+                    if span is not None:
+                        span.set(strategy=strategy_index + 1)
                     return result
             except json.JSONDecodeError as e:
                 print(f"JSON parsing strategy {strategy_index + 1} failed: {str(e)}")
@@ -623,6 +1466,8 @@ CRITICAL REQUIREMENTS:
                 print(f"JSON parsing strategy {strategy_index + 1} failed with error: {str(e)}")
                 continue
         
+        if span is not None:
+            span.set(strategy=None)
         return None
 
     def parse_json_from_code_blocks(self, text):
@@ -682,7 +1527,7 @@ CRITICAL REQUIREMENTS:
         
         return None
 
-    def extract_browser_compatibility_json(self, response_text):
+    def extract_browser_compatibility_json(self, response_text, span=None, deadline=None):
         """Extract and parse JSON specifically for browser compatibility responses with truncation handling"""
         if not response_text:
             return None
@@ -700,11 +1545,18 @@ CRITICAL REQUIREMENTS:
         ]
         
         for strategy_index, strategy in enumerate(strategies):
+            if strategy_index and deadline is not None and deadline.expired:
+                print(f" Deadline reached, skipping browser JSON parsing strategies {strategy_index + 1}-{len(strategies)}")
+                if span is not None:
+                    span.set(timed_out=True, strategies_skipped=len(strategies) - strategy_index)
+                break
             try:
                 print(f" Browser compatibility JSON parsing strategy {strategy_index + 1}")
                 result = strategy(response_text)
                 if result and 'browser_compatibility_scenarios' in result:
                     print(f" Successfully parsed browser compatibility JSON using strategy {strategy_index + 1}")
+                    if span is not None:
+                        span.set(strategy=strategy_index + 1)
                     return result
             except json.JSONDecodeError as e:
                 print(f" Browser JSON parsing strategy {strategy_index + 1} failed: {str(e)}")
@@ -715,6 +1567,8 @@ CRITICAL REQUIREMENTS:
                 continue
         
         print(" All browser compatibility JSON parsing strategies failed, creating fallback scenarios")
+        if span is not None:
+            span.set(strategy=None)
         return None
 
     def parse_browser_json_from_code_blocks(self, text):
@@ -979,82 +1833,12 @@ CRITICAL REQUIREMENTS:
         
         return None
 
-    def calculate_category_scores(self, report_data, selected_categories):
+    def calculate_category_scores(self, report_data, selected_categories, records=None):
         """Calculate category scores based on actual test results"""
         try:
-            scenarios = report_data.get('scenarios', [])
-            category_scores = {}
-            
-            # Map frontend category names to backend category names
-            category_mapping = {
-                'functional': 'functionality',
-                'security': 'security', 
-                'accessibility': 'accessibility',
-                'performance': 'performance',
-                'usability': 'usability'
-            }
-            
-            # Only calculate scores for selected categories
-            for category_key, is_enabled in selected_categories.items():
-                if not is_enabled:
-                    continue
-                    
-                # Map to our standard category names
-                mapped_category = category_mapping.get(category_key.lower(), category_key.lower())
-                
-                # Filter scenarios by category
-                category_scenarios = []
-                for scenario in scenarios:
-                    scenario_category = str(scenario.get('category', '') or '').lower()
-                    scenario_type = str(scenario.get('type', '') or '').lower()
-                    
-                    # Match scenarios to categories
-                    if (scenario_category and category_key.lower() in scenario_category) or \
-                       (scenario_type and category_key.lower() in scenario_type) or \
-                       (scenario_category and mapped_category and mapped_category in scenario_category) or \
-                       (category_key.lower() == 'functional' and scenario_category and ('functional' in scenario_category or 'function' in scenario_category)) or \
-                       (category_key.lower() == 'ui' and scenario_category and ('ui' in scenario_category or 'interface' in scenario_category)) or \
-                       (category_key.lower() == 'security' and scenario_category and 'security' in scenario_category) or \
-                       (category_key.lower() == 'accessibility' and scenario_category and ('accessibility' in scenario_category or 'a11y' in scenario_category)) or \
-                       (category_key.lower() == 'performance' and scenario_category and ('performance' in scenario_category or 'speed' in scenario_category)) or \
-                       (category_key.lower() == 'usability' and scenario_category and ('usability' in scenario_category or 'ux' in scenario_category)):
-                        category_scenarios.append(scenario)
-                
-                # If no specific scenarios found, distribute scenarios evenly
-                if not category_scenarios and scenarios:
-                    # Distribute scenarios across selected categories
-                    total_selected = sum(1 for enabled in selected_categories.values() if enabled)
-                    scenarios_per_category = len(scenarios) // total_selected if total_selected > 0 else 0
-                    start_idx = list(selected_categories.keys()).index(category_key) * scenarios_per_category
-                    end_idx = start_idx + scenarios_per_category
-                    category_scenarios = scenarios[start_idx:end_idx]
-                
-                # Calculate pass rate for this category
-                if category_scenarios:
-                    # Count both 'pass' and 'warning' as successful
-                    passed_count = sum(1 for s in category_scenarios if self.get_scenario_status(s) in ['pass', 'warning'])
-                    total_count = len(category_scenarios)
-                    pass_rate = (passed_count / total_count) * 100
-                else:
-                    pass_rate = 0
-                
-                # Determine status based on pass rate
-                if pass_rate >= 90:
-                    status = "Excellent"
-                elif pass_rate >= 75:
-                    status = "Good"
-                elif pass_rate >= 50:
-                    status = "Needs Work"
-                else:
-                    status = "Critical Issues"
-                
-                category_scores[mapped_category] = {
-                    "score": int(pass_rate),
-                    "status": status,
-                    "description": f"Based on {len(category_scenarios)} test scenarios with {pass_rate:.0f}% pass rate"
-                }
-            
-            return category_scores
+            if records is None:
+                records = normalize_scenarios(report_data.get('scenarios', []))
+            return compute_category_scores(records, selected_categories)
             
         except Exception as e:
             print(f"Error calculating category scores: {str(e)}")
@@ -1062,83 +1846,18 @@ CRITICAL REQUIREMENTS:
 
     def get_scenario_status(self, scenario):
         """Get the status of a scenario"""
-        if scenario.get('status'):
-            return scenario['status'].lower()
-        
-        # Derive status from comparing expected vs observed results
-        expected = (scenario.get('expected_result') or scenario.get('expected') or '').lower().strip()
-        observed = (scenario.get('observed_result') or scenario.get('observed') or '').lower().strip()
-        
-        if not expected or not observed:
-            return 'unknown'
-        
-        # Simple comparison
-        if expected == observed:
-            return 'pass'
-        
-        # Check if observed contains indicators of failure
-        if any(indicator in observed for indicator in ['error', 'fail', 'not working', 'broken', 'doesn\'t', 'unable', 'overlaps', 'misaligned', 'incorrect']):
-            return 'fail'
-        
-        # Check if observed contains indicators of partial success
-        if any(indicator in observed for indicator in ['partially', 'some issues', 'minor']):
-            return 'warning'
-        
-        # If expected and observed are different but no clear failure indicators
-        return 'fail'
+        return derive_status(scenario)
 
-    def calculate_dynamic_confidence_score(self, report_data):
+    def calculate_dynamic_confidence_score(self, report_data, records=None):
         """Calculate confidence score based on defects, scenarios, and severity"""
         try:
-            # Get basic metrics including browser compatibility scenarios
-            regular_scenarios = report_data.get('scenarios', [])
-            browser_scenarios = report_data.get('browser_compatibility_scenarios', [])
-            total_scenarios = len(regular_scenarios) + len(browser_scenarios)
-            total_defects = len(report_data.get('defects_and_gaps', []))
-            
-            # If no scenarios were tested, very low confidence
-            if total_scenarios == 0:
-                return 15
-            
-            # Calculate pass rate for both regular and browser scenarios
-            passed_regular = sum(1 for s in regular_scenarios if self.get_scenario_status(s) in ['pass', 'warning'])
-            passed_browser = sum(1 for s in browser_scenarios if s.get('status', '').lower() in ['pass', 'warning'])
-            total_passed = passed_regular + passed_browser
-            
-            # Base confidence on pass rate
-            pass_rate = (total_passed / total_scenarios) * 100
-            confidence = pass_rate
-            
-            # Deduct points based on defect severity
-            defects = report_data.get('defects_and_gaps', [])
-            for defect in defects:
-                severity = defect.get('severity', 'Medium').lower()
-                
-                if severity in ['critical', 'high']:
-                    confidence -= 15  # Heavy penalty for critical/high severity
-                elif severity in ['medium', 'moderate']:
-                    confidence -= 8   # Medium penalty
-                elif severity in ['low', 'minor']:
-                    confidence -= 3   # Light penalty
-            
-            # Additional penalty for high defect ratio
-            if total_scenarios > 0:
-                defect_ratio = total_defects / total_scenarios
-                if defect_ratio > 0.5:  # More than 50% of tests failed
-                    confidence -= 20
-                elif defect_ratio > 0.3:  # More than 30% of tests failed
-                    confidence -= 10
-            
-            # Bonus points for comprehensive testing
-            if total_scenarios >= 15:
-                confidence += 5
-            elif total_scenarios >= 10:
-                confidence += 3
-            
-            # Ensure confidence is within bounds
-            confidence = max(5, min(100, confidence))
-            
-            return int(confidence)
+            if records is None:
+                records = normalize_scenarios(report_data.get('scenarios', []))
+            return compute_confidence_score(
+                records,
+                report_data.get('browser_compatibility_scenarios', []),
+                report_data.get('defects_and_gaps', [])
+            )
             
         except Exception as e:
             print(f"Error calculating confidence score: {str(e)}")
@@ -1658,98 +2377,693 @@ CRITICAL REQUIREMENTS:
 # No changes are needed for the routes like /api/start-testing, run_testing_process, etc.
 
 testing_engine = TestingEngine()
+report_cache = ReportCache()
+
+def create_job(data, pack=None):
+    """Validate a start-testing payload and register the job (shared by the WSGI and ASGI servers)"""
+    if not data:
+        raise ValueError('No JSON data provided')
+
+    url = data.get('url')
+    if not url:
+        raise ValueError('URL is required')
+    canonical_url = canonicalize_url(url)
+    url_template = data.get('urlTemplate') or None
+    template_matcher.match(canonical_url, url_template)
+    callback_url = validate_callback_url(data.get('callbackUrl'))
+
+    test_id = str(uuid.uuid4())
+    record = {
+        'id': test_id,
+        'url': url,
+        'canonical_url': canonical_url,
+        'url_template': url_template,
+        'status': 'queued',
+        'progress': 0,
+        'created_at': datetime.now().isoformat(),
+        'test_type': data.get('testType', 'comprehensive'),
+        'browsers': data.get('browsers', ['chrome']),
+        'platforms': data.get('platforms', ['windows']),
+        'test_categories': data.get('testCategories', {}),
+        'priority': normalize_priority(data.get('priority')),
+        'owner': str(data.get('owner') or DEFAULT_OWNER),
+        'deadline_seconds': deadline_seconds(data.get('deadlineSeconds')),
+        'report': {},
+        'timeline': []
+    }
+    if data.get('batch_id'):
+        record['batch_id'] = data['batch_id']
+    if data.get('schedule_id'):
+        record['schedule_id'] = data['schedule_id']
+    if callback_url:
+        record['callback_url'] = callback_url
+    if pack is not None:
+        record['pack'] = pack
+    job = JobContext(test_id, deadline_seconds=record['deadline_seconds'], url_template=url_template, pack=pack)
+    job_store.create(record)
+    return record, job
+
+def plan_batch_packs(urls, shared):
+    """Pack of each URL of a batch (None for pages tested on their own), see page_packing.py.
+
+    Only thin pages are packed, and not pages of a URL template (they already
+    get the cheaper delta call) or repeated URLs.
+    """
+    canonical_urls = [canonicalize_url(url) for url in urls]
+    seen = set()
+    candidates = []
+    for index, canonical_url in enumerate(canonical_urls):
+        if (canonical_url not in seen and is_thin_page(canonical_url, THIN_PAGE_NAMES)
+                and template_matcher.match(canonical_url, shared.get('urlTemplate') or None) is None):
+            candidates.append(index)
+        seen.add(canonical_url)
+
+    tokens = page_output_tokens(shared.get('testCategories', {}), shared.get('browsers', ['chrome']))
+    budget, max_pages = pack_budget()
+    packs = [None] * len(urls)
+    for indexes in plan_packs([(index, tokens) for index in candidates], budget, max_pages):
+        if len(indexes) < 2:
+            continue
+        pack = {'id': str(uuid.uuid4()), 'urls': [canonical_urls[index] for index in indexes]}
+        for index in indexes:
+            packs[index] = pack
+    return packs
+
+def create_batch(data):
+    """Validate a start-batch payload and register one job per URL (batch priority unless overridden).
+
+    With ``pack`` set, thin pages of the batch are packed into shared LLM calls
+    (in-process stores only, as the jobs of a pack share its result in memory).
+    """
+    if not data:
+        raise ValueError('No JSON data provided')
+
+    urls = data.get('urls')
+    if not isinstance(urls, list) or not urls:
+        raise ValueError('urls must be a non-empty list')
+    if not all(isinstance(url, str) and url.strip() for url in urls):
+        raise ValueError('Every URL must be a non-empty string')
+    urls = [url.strip() for url in urls]
+
+    batch_id = str(uuid.uuid4())
+    shared = {key: value for key, value in data.items() if key not in ('urls', 'pack')}
+    shared['priority'] = normalize_priority(shared.get('priority') or 'batch')
+    if data.get('pack') and job_store.dispatches_in_process:
+        packs = plan_batch_packs(urls, shared)
+    else:
+        packs = [None] * len(urls)
+    return batch_id, [create_job({**shared, 'url': url, 'batch_id': batch_id}, pack) for url, pack in zip(urls, packs)]
+
+def launch_job_thread(item, queue_wait, done):
+    """JobDispatcher launcher for the threaded (WSGI) server"""
+    record, job = item
+
+    def run():
+        try:
+            job_store.update(record['id'], queue_wait_seconds=round(queue_wait, 3))
+            run_job_record(record, job)
+        finally:
+            cancel_tokens.pop(record['id'], None)
+            done()
+
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+
+# In-process stores run at most JOB_CONCURRENCY jobs at once, picked by priority
+# and per-owner fairness (see scheduler.py); asgi.py swaps in an asyncio launcher
+job_dispatcher = JobDispatcher(launch_job_thread, int(os.getenv('JOB_CONCURRENCY', '32')))
+
+# Cancel tokens of in-process jobs that are queued or running, by test ID
+cancel_tokens = {}
+
+def dispatch_job(record, job):
+    """Queue a job for the in-process dispatcher; shared stores leave it queued for worker.py"""
+    if job_store.dispatches_in_process:
+        cancel_tokens[record['id']] = job.cancel
+        job_dispatcher.submit((record, job), record['priority'], record['owner'])
+
+def cancel_job(test_id):
+    """Mark a job cancelled and abort its in-flight work; returns the job record (None if unknown).
+
+    Queued jobs are withdrawn from the dispatcher; running ones have their token
+    cancelled, which closes the open LLM stream (or cancels the asyncio task) so
+    the slot frees up right away. With the SQLite store, worker.py polls for
+    cancelled jobs and does the same.
+    """
+    record = job_store.get(test_id)
+    if record is None:
+        return None
+    if record['status'] not in TERMINAL_STATUSES:
+        now = datetime.now().isoformat()
+        job_store.update(test_id, status='cancelled', cancelled_at=now, completed_at=now)
+    if job_store.dispatches_in_process:
+        if job_dispatcher.remove(lambda item: item[0]['id'] == test_id):
+            cancel_tokens.pop(test_id, None)
+        token = cancel_tokens.get(test_id)
+        if token is not None:
+            token.cancel()
+    return job_store.get(test_id)
 
 @app.route('/api/start-testing', methods=['POST'])
 def start_testing():
     """Start automated testing process"""
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'No JSON data provided'}), 400
-            
-        url = data.get('url')
-        test_type = data.get('testType', 'comprehensive')
-        browsers = data.get('browsers', ['chrome'])
-        platforms = data.get('platforms', ['windows'])
-        test_categories = data.get('testCategories', {})
+        try:
+            record, job = create_job(request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        if not url:
-            return jsonify({'error': 'URL is required'}), 400
+        dispatch_job(record, job)
 
-        
-        test_id = str(uuid.uuid4())
+        return jsonify({'test_id': record['id'], 'status': 'started'}), 200
 
-        
-        test_results[test_id] = {
-            'id': test_id,
-            'url': url,
-            'status': 'running',
-            'progress': 0,
-            'created_at': datetime.now().isoformat(),
-            'test_type': test_type,
-            'browsers': browsers,
-            'platforms': platforms,
-            'test_categories': test_categories,
-            'report': {}
-        }
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Start testing in background thread
-        thread = threading.Thread(
-            target=run_testing_process,
-            args=(test_id, url, test_type, browsers, platforms, test_categories)
-        )
-        thread.daemon = True
-        thread.start()
+@app.route('/api/start-batch', methods=['POST'])
+def start_batch():
+    """Queue one job per URL at batch priority"""
+    try:
+        try:
+            batch_id, jobs = create_batch(request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        return jsonify({'test_id': test_id, 'status': 'started'}), 200
+        for record, job in jobs:
+            dispatch_job(record, job)
+
+        packs = {record['pack']['id'] for record, _ in jobs if record.get('pack')}
+        return jsonify({
+            'batch_id': batch_id,
+            'test_ids': [record['id'] for record, _ in jobs],
+            'packs': len(packs),
+            'packed_pages': sum(1 for record, _ in jobs if record.get('pack')),
+            'status': 'queued'
+        }), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def run_testing_process(test_id, url, test_type, browsers, platforms, test_categories):
+# Recurring schedules (see schedules.py); the runner thread is started by the server entry points
+schedule_store = None
+schedule_runner = None
+_schedule_lock = threading.Lock()
+
+# Payload fields that configure the schedule rather than its jobs
+SCHEDULE_FIELDS = ('name', 'cron', 'timezone', 'url', 'urls', 'spreadSeconds', 'enabled')
+
+
+def get_schedule_store():
+    global schedule_store
+    if schedule_store is None:
+        with _schedule_lock:
+            if schedule_store is None:
+                schedule_store = ScheduleStore()
+    return schedule_store
+
+
+def launch_scheduled_run(schedule, url):
+    """Create and dispatch the job of one scheduled run (batch priority unless the schedule says otherwise)"""
+    options = dict(schedule['options'])
+    options['priority'] = options.get('priority') or 'batch'
+    record, job = create_job({**options, 'url': url, 'schedule_id': schedule['id']})
+    dispatch_job(record, job)
+    return record['id']
+
+
+def scheduled_job_status(test_id):
+    record = job_store.get(test_id)
+    return record['status'] if record is not None else None
+
+
+def start_schedule_runner():
+    """Start this process's schedule runner (``SCHEDULES_ENABLED=0`` leaves schedules to another process)"""
+    global schedule_runner
+    if os.getenv('SCHEDULES_ENABLED', '1') == '0':
+        return None
+    # Outside the lock: get_schedule_store takes it too
+    store = get_schedule_store()
+    with _schedule_lock:
+        if schedule_runner is None:
+            schedule_runner = ScheduleRunner(store, launch_scheduled_run, scheduled_job_status)
+            schedule_runner.start()
+    return schedule_runner
+
+
+def schedule_metrics():
+    metrics = {'runner': schedule_runner.metrics() if schedule_runner is not None else None}
+    if schedule_store is not None:
+        metrics['runs'] = schedule_store.counts()
+    return metrics
+
+
+def parse_schedule(data):
+    """``(name, cron, timezone, urls, options, spread seconds, enabled)`` of a create-schedule payload"""
+    if not data:
+        raise ValueError('No JSON data provided')
+    if not data.get('cron'):
+        raise ValueError('cron is required')
+    urls = data.get('urls') or ([data['url']] if data.get('url') else None)
+    if not isinstance(urls, list) or not urls:
+        raise ValueError('url or urls is required')
+    if not all(isinstance(url, str) and url.strip() for url in urls):
+        raise ValueError('Every URL must be a non-empty string')
+    options = {key: value for key, value in data.items() if key not in SCHEDULE_FIELDS}
+    validate_callback_url(options.get('callbackUrl'))
+    # Checked now rather than failing every run the schedule starts
+    if options.get('deadlineSeconds') is not None:
+        deadline_seconds(options['deadlineSeconds'])
+    options['priority'] = normalize_priority(options.get('priority') or 'batch')
+    return (data.get('name'), data['cron'], data.get('timezone') or 'UTC', [url.strip() for url in urls], options,
+            data.get('spreadSeconds'), data.get('enabled', True) is not False)
+
+
+def schedule_details(schedule, now):
+    """A schedule with the planned start of each URL's next run and its run history"""
+    store = get_schedule_store()
+    details = schedule_summary(schedule)
+    horizon = max(0, (schedule['next_tick'] or now) - now)
+    details['upcoming'] = store.upcoming(now, horizon, 2 * len(schedule['urls']), schedule['id'])
+    details['runs'] = store.runs(schedule['id'])
+    return details
+
+
+@app.route('/api/schedules', methods=['GET', 'POST'])
+def schedules_collection():
+    """List schedules, or create one (``cron``, ``timezone``, ``url``/``urls``, ``spreadSeconds`` and start-testing options)"""
+    store = get_schedule_store()
+    if request.method == 'GET':
+        return jsonify([schedule_summary(schedule) for schedule in store.list()])
+    try:
+        name, cron, tz, urls, options, spread_seconds, enabled = parse_schedule(request.get_json())
+        schedule = store.create(name, cron, tz, urls, options, spread_seconds, enabled)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(schedule_details(schedule, time.time())), 201
+
+
+@app.route('/api/schedules/next-runs', methods=['GET'])
+def list_next_runs():
+    """Upcoming scheduled runs of every schedule, per URL with its spread start time"""
+    try:
+        limit = min(int(request.args.get('limit', '100')), 10000)
+        hours = float(request.args.get('hours', '24'))
+    except ValueError:
+        return jsonify({'error': 'limit and hours must be numbers'}), 400
+    return jsonify(get_schedule_store().upcoming(time.time(), hours * 3600, limit))
+
+
+@app.route('/api/schedules/<schedule_id>', methods=['GET', 'PATCH', 'DELETE'])
+def schedule_resource(schedule_id):
+    """Get a schedule with its next runs and run history, change it (``enabled``, ``cron``, ``timezone``,
+    ``spreadSeconds``) or delete it"""
+    store = get_schedule_store()
+    now = time.time()
+    if request.method == 'DELETE':
+        if not store.delete(schedule_id):
+            return jsonify({'error': 'Schedule not found'}), 404
+        return jsonify({'id': schedule_id, 'status': 'deleted'})
+    if request.method == 'PATCH':
+        data = request.get_json() or {}
+        try:
+            schedule = store.update(schedule_id, enabled=data.get('enabled'), cron=data.get('cron'),
+                                    tz=data.get('timezone'), spread_seconds=data.get('spreadSeconds'), now=now)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+    else:
+        schedule = store.get(schedule_id)
+    if schedule is None:
+        return jsonify({'error': 'Schedule not found'}), 404
+    return jsonify(schedule_details(schedule, now))
+
+# Simulated phases of testing shown as progress while a job runs
+TESTING_PHASES = [
+    (20, "Initializing browser testing..."),
+    (40, "Analyzing UI components..."),
+    (60, "Running accessibility checks..."),
+    (80, "Performing security analysis..."),
+    (90, "Generating comprehensive report..."),
+]
+
+# Seconds spent on each progress phase (benchmarks set 0 to measure the LLM path only)
+PHASE_DELAY_SECONDS = float(os.getenv('TESTING_PHASE_DELAY', '2'))
+
+# Completion webhooks (see webhooks.py): outbox shared by every process, delivered by each process's dispatcher
+webhook_outbox = None
+webhook_dispatcher = None
+_webhook_lock = threading.Lock()
+
+# Base of the report links in notifications (relative links without it)
+WEBHOOK_REPORT_BASE_URL = os.getenv('WEBHOOK_REPORT_BASE_URL', '')
+
+
+def get_webhook_outbox():
+    global webhook_outbox
+    if webhook_outbox is None:
+        with _webhook_lock:
+            if webhook_outbox is None:
+                webhook_outbox = WebhookOutbox()
+    return webhook_outbox
+
+
+def start_webhook_dispatcher():
+    """Start this process's delivery threads (resuming notifications left in the outbox)"""
+    global webhook_dispatcher
+    # Outside the lock: get_webhook_outbox takes it too
+    outbox = get_webhook_outbox()
+    with _webhook_lock:
+        if webhook_dispatcher is None:
+            dispatcher = WebhookDispatcher(outbox)
+            dispatcher.start()
+            webhook_dispatcher = dispatcher
+    return webhook_dispatcher
+
+
+def notify_job_finished(test_id):
+    """Queue the completion webhook of a finished job; webhooks must never fail a job"""
+    try:
+        record = job_store.get(test_id)
+        if record is None or not record.get('callback_url') or record['status'] not in EVENTS:
+            return
+        event = EVENTS[record['status']]
+        get_webhook_outbox().enqueue(test_id, event, record['callback_url'],
+                                     job_summary(record, event, WEBHOOK_REPORT_BASE_URL))
+        start_webhook_dispatcher().notify()
+    except Exception as e:
+        print(f"Error queueing completion webhook: {str(e)}")
+
+
+def webhook_metrics():
+    metrics = {'dispatcher': webhook_dispatcher.metrics() if webhook_dispatcher is not None else None}
+    if webhook_outbox is not None:
+        metrics['outbox'] = webhook_outbox.counts()
+    return metrics
+
+
+@app.route('/api/webhooks', methods=['GET'])
+def list_webhooks():
+    """Outbox notifications, newest first (``testId``, ``state`` and ``limit`` filters)"""
+    try:
+        limit = min(int(request.args.get('limit', '100')), 1000)
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+    return jsonify(get_webhook_outbox().list(request.args.get('testId'), request.args.get('state'), limit))
+
+
+@app.route('/api/webhooks/<notification_id>/retry', methods=['POST'])
+def retry_webhook(notification_id):
+    """Queue a failed notification for delivery again"""
+    if not get_webhook_outbox().requeue(notification_id):
+        return jsonify({'error': 'No failed notification with this ID'}), 404
+    start_webhook_dispatcher().notify()
+    return jsonify({'id': notification_id, 'state': 'pending'})
+
+
+def complete_job(test_id, job, report):
+    job_store.update(
+        test_id,
+        status='completed',
+        progress=100,
+        completed_at=datetime.now().isoformat(),
+        report=report,
+        timed_out=bool(job.timed_out_stages),
+        timeline=job.timeline.to_list()
+    )
+    notify_job_finished(test_id)
+
+    # Partial reports of timed-out jobs would skew the defect frequencies
+    if job.timed_out_stages:
+        return
+
+    # Fold the defects into the cross-run rollups; analytics must never fail a job
+    try:
+        get_defect_analytics().record_job(job_store.get(test_id))
+    except Exception as e:
+        print(f"Error updating defect analytics: {str(e)}")
+
+def fail_job(test_id, job, error):
+    job_store.update(
+        test_id,
+        status='failed',
+        error=str(error),
+        completed_at=datetime.now().isoformat(),
+        timeline=job.timeline.to_list()
+    )
+    notify_job_finished(test_id)
+
+def finish_cancelled_job(test_id, job):
+    """Store the timeline of a cancelled job (the cancel request already set its status)"""
+    job_store.update(test_id, status='cancelled', timeline=job.timeline.to_list())
+
+def run_testing_process(test_id, url, test_type, browsers, platforms, test_categories, job=None):
     """Run the testing process in background"""
+    job = job or JobContext(test_id)
+    job.timeline.add_span('queue', job.timeline.origin, time.perf_counter())
+    job.start_deadline()
     try:
+        job.cancel.raise_if_cancelled()
         # Update progress
-        test_results[test_id]['progress'] = 10
-        
-        # Simulate different phases of testing
-        phases = [
-            (20, "Initializing browser testing..."),
-            (40, "Analyzing UI components..."),
-            (60, "Running accessibility checks..."),
-            (80, "Performing security analysis..."),
-            (90, "Generating comprehensive report..."),
-        ]
+        job_store.update(test_id, status='running', progress=10)
         
-        for progress, phase in phases:
-            test_results[test_id]['progress'] = progress
-            time.sleep(2)  # Simulate processing time
+        for progress, phase in TESTING_PHASES:
+            job_store.update(test_id, progress=progress)
+            with job.span('progress_delay', phase=phase):
+                job.cancel.wait(job.budget(PHASE_DELAY_SECONDS))  # Simulate processing time
+            job.cancel.raise_if_cancelled()
         
         # Perform actual analysis
-        report = testing_engine.analyze_website(url, test_type, browsers, platforms, test_categories)
+        report = testing_engine.analyze_website(url, test_type, browsers, platforms, test_categories, job)
+        job.cancel.raise_if_cancelled()
         
         # Update final results
-        test_results[test_id].update({
-            'status': 'completed',
-            'progress': 100,
-            'completed_at': datetime.now().isoformat(),
-            'report': report
-        })
+        complete_job(test_id, job, report)
 
+    except JobCancelled:
+        finish_cancelled_job(test_id, job)
     except Exception as e:
-        test_results[test_id].update({
-            'status': 'failed',
-            'error': str(e),
-            'completed_at': datetime.now().isoformat()
-        })
+        fail_job(test_id, job, e)
+
+async def run_testing_process_async(test_id, url, test_type, browsers, platforms, test_categories, job=None):
+    """Async variant of run_testing_process used by the ASGI serving mode (see asgi.py)"""
+    job = job or JobContext(test_id)
+    job.timeline.add_span('queue', job.timeline.origin, time.perf_counter())
+    job.start_deadline()
+    try:
+        job.cancel.raise_if_cancelled()
+        job_store.update(test_id, status='running', progress=10)
+        
+        for progress, phase in TESTING_PHASES:
+            job_store.update(test_id, progress=progress)
+            with job.span('progress_delay', phase=phase):
+                await asyncio.sleep(job.budget(PHASE_DELAY_SECONDS))  # Simulate processing time
+        
+        report = await testing_engine.analyze_website_async(url, test_type, browsers, platforms, test_categories, job)
+        job.cancel.raise_if_cancelled()
+        # Completion writes to SQLite (job store, defect analytics, webhook outbox) and may wait out a
+        # busy timeout: keep it off the event loop that serves every other request and job
+        await asyncio.to_thread(complete_job, test_id, job, report)
+
+    except (JobCancelled, asyncio.CancelledError):
+        # asyncio.CancelledError: asgi.py cancels the job's task when the job is cancelled (or on shutdown)
+        if not job.cancel.cancelled:
+            job_store.update(test_id, status='cancelled', error='Server shutting down',
+                             completed_at=datetime.now().isoformat())
+        finish_cancelled_job(test_id, job)
+    except Exception as e:
+        await asyncio.to_thread(fail_job, test_id, job, e)
+
+def job_record_arguments(record):
+    return (
+        record['id'],
+        record['url'],
+        record.get('test_type', 'comprehensive'),
+        record.get('browsers', ['chrome']),
+        record.get('platforms', ['windows']),
+        record.get('test_categories', {})
+    )
+
+def run_job_record(record, job=None):
+    """Run a stored job record (background threads and worker.py)"""
+    run_testing_process(*job_record_arguments(record), job or JobContext.for_record(record))
+
+async def run_job_record_async(record, job=None):
+    """Run a stored job record on the event loop (asgi.py)"""
+    await run_testing_process_async(*job_record_arguments(record), job or JobContext.for_record(record))
 
 @app.route('/api/test-results/<test_id>', methods=['GET'])
 def get_test_results(test_id):
     """Get test results by ID"""
-    if test_id not in test_results:
+    result = job_store.get(test_id)
+    if result is None:
         return jsonify({'error': 'Test not found'}), 404
     
-    return jsonify(test_results[test_id])
+    # Finished results never change: clients and the browser cache keep them
+    return cache_job_result(jsonify(result), result).make_conditional(request)
+
+@app.route('/api/test-results/<test_id>', methods=['DELETE'])
+def cancel_test(test_id):
+    """Cancel a queued or running test"""
+    record = cancel_job(test_id)
+    if record is None:
+        return jsonify({'error': 'Test not found'}), 404
+    if record['status'] != 'cancelled':
+        return jsonify({'error': f"Test already {record['status']}", 'status': record['status']}), 409
+    return jsonify({'test_id': test_id, 'status': 'cancelled'}), 200
+
+@app.route('/api/test-results/<test_id>/timeline', methods=['GET'])
+def export_test_timeline(test_id):
+    """Export the per-job timing spans as JSON (default) or CSV for offline analysis"""
+    result = job_store.get(test_id)
+    if result is None:
+        return jsonify({'error': 'Test not found'}), 404
+
+    spans = result.get('timeline', [])
+    export_format = request.args.get('format', 'json').lower()
+
+    if export_format == 'csv':
+        attribute_keys = sorted({key for span in spans for key in span.get('attributes', {})})
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['test_id', 'name', 'start_offset', 'duration'] + attribute_keys)
+        for span in spans:
+            attributes = span.get('attributes', {})
+            writer.writerow([test_id, span['name'], span['start_offset'], span['duration']] +
+                            [attributes.get(key, '') for key in attribute_keys])
+        response = Response(
+            buffer.getvalue(),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename=timeline-{test_id}.csv'}
+        )
+        return cache_job_result(response, result).make_conditional(request)
+
+    if export_format != 'json':
+        return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+
+    response = jsonify({
+        'test_id': test_id,
+        'url': result['url'],
+        'status': result['status'],
+        'created_at': result['created_at'],
+        'completed_at': result.get('completed_at'),
+        'total_duration': max((span['start_offset'] + span['duration'] for span in spans), default=0),
+        'spans': spans
+    })
+    return cache_job_result(response, result).make_conditional(request)
+
+def stream_export(records, export_format, sections, filename):
+    """Stream exporter chunks without building the whole file (chunked transfer encoding)"""
+    try:
+        chunks, mimetype = export_records(records, export_format, parse_sections(sections))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    extension = 'xml' if export_format == 'junit' else export_format
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}.{extension}'}
+    )
+
+@app.route('/api/test-results/<test_id>/report', methods=['GET'])
+def render_test_report(test_id):
+    """Render the report as a vector PDF (default) or standalone HTML, cached per report version"""
+    result = job_store.get(test_id)
+    if result is None:
+        return jsonify({'error': 'Test not found'}), 404
+
+    render_format = request.args.get('format', 'pdf').lower()
+    try:
+        document, etag = report_cache.render(result, render_format)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    disposition = 'attachment' if render_format == 'pdf' else 'inline'
+    response = Response(
+        document,
+        mimetype=RENDER_FORMATS[render_format],
+        headers={'Content-Disposition': f'{disposition}; filename=test-report-{test_id}.{render_format}'}
+    )
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+@app.route('/api/test-results/<test_id>/export', methods=['GET'])
+def export_test_results(test_id):
+    """Export one report's scenarios, defects and browser scenarios as CSV, JSONL or JUnit XML"""
+    result = job_store.get(test_id)
+    if result is None:
+        return jsonify({'error': 'Test not found'}), 404
+
+    return stream_export(
+        [result],
+        request.args.get('format', 'csv').lower(),
+        request.args.get('sections'),
+        f'report-{test_id}'
+    )
+
+@app.route('/api/exports', methods=['GET', 'POST'])
+def export_batch():
+    """Export many reports in one stream; records are loaded one at a time while streaming"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        test_ids = data.get('ids') or []
+        export_format = data.get('format', 'csv')
+        sections = data.get('sections')
+        if isinstance(sections, list):
+            sections = ','.join(sections)
+    else:
+        test_ids = [test_id for test_id in request.args.get('ids', '').split(',') if test_id.strip()]
+        export_format = request.args.get('format', 'csv')
+        sections = request.args.get('sections')
+
+    if not test_ids:
+        return jsonify({'error': 'ids are required'}), 400
+
+    # Unknown IDs are skipped rather than failing a stream that has already started
+    records = (job_store.get(test_id.strip()) for test_id in test_ids)
+    return stream_export(records, export_format.lower(), sections, 'reports')
+
+@app.route('/api/analytics/defects', methods=['GET'])
+def get_defect_analytics_report():
+    """Defect trends from the pre-aggregated rollups (per day or week, by one dimension)"""
+    try:
+        result = get_defect_analytics().query_defects(
+            dimension=request.args.get('dimension', 'severity'),
+            domain=request.args.get('domain'),
+            url=request.args.get('url'),
+            feature=request.args.get('feature'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            interval=request.args.get('interval', 'day')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
+@app.route('/api/analytics/features', methods=['GET'])
+def get_defect_features():
+    """Features with recorded defects, most affected first"""
+    return jsonify(get_defect_analytics().list_features(request.args.get('domain')))
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Scheduler queue depth, running jobs, per-class queue-wait percentiles, LLM hedging and routing stats and schedule runs"""
+    if job_store.dispatches_in_process:
+        scheduler_metrics = job_dispatcher.metrics()
+    else:
+        scheduler_metrics = job_store.scheduler_metrics()
+    return jsonify({
+        'scheduler': scheduler_metrics,
+        # Hedging and routing count the calls made by this process (worker.py processes keep their own)
+        'hedging': llm_transport.hedging.metrics(),
+        'routing': model_router.metrics(),
+        'templates': template_baselines.metrics(),
+        'packing': pack_results.metrics(),
+        'llm_pool': llm_pool_metrics(),
+        'schedules': schedule_metrics(),
+        'webhooks': webhook_metrics(),
+        'timestamp': datetime.now().isoformat()
+    })
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -1771,14 +3085,41 @@ def get_test_history():
             'created_at': result['created_at'],
             'test_type': result.get('test_type', 'comprehensive')
         }
-        for result in test_results.values()
+        for result in job_store.list()
     ]
     return jsonify(history)
 
+@app.route('/', defaults={'path': ''}, methods=['GET'])
+@app.route('/<path:path>', methods=['GET'])
+def serve_frontend(path):
+    """Serve the production frontend build (precompressed variants when accepted, index.html for client routes)"""
+    if path.startswith('api/') or not os.path.isdir(FRONTEND_BUILD_DIR):
+        return jsonify({'error': 'Not found'}), 404
+    asset = static_file(FRONTEND_BUILD_DIR, path, request.headers.get('Accept-Encoding'))
+    if asset is None:
+        return jsonify({'error': 'Not found'}), 404
+
+    filename, mimetype, encoding, cache_control = asset
+    response = send_file(filename, mimetype=mimetype, conditional=True, etag=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    return response
+
 if __name__ == '__main__':
     # Test the browser compatibility parsing if running directly
     if len(sys.argv) > 1 and sys.argv[1] == 'test':
-        print("Testing browser compatibility JSON parsing...")
+        import subprocess
+        budget_ms = os.getenv('IMPORT_TIME_BUDGET_MS', '400')
+        print(f"Checking cold import time (budget {budget_ms} ms, no eager openai import)...")
+        startup_check = subprocess.run([
+            sys.executable, os.path.join(BACKEND_DIR, 'benchmarks', 'bench_startup.py'),
+            '--modules', 'app', 'worker', '--repeat', '3', '--budget-ms', budget_ms
+        ])
+        print(" Import time within budget" if startup_check.returncode == 0 else " Import time budget exceeded")
+
+        print("\nTesting browser compatibility JSON parsing...")
         engine = TestingEngine()
         
         # Test with sample truncated JSON (like the one in the error)
@@ -1812,7 +3153,7 @@ if __name__ == '__main__':
             print(" Failed to parse JSON")
         
         # Test with actual API call
-        print("\nTesting actual API call...")
+        print(f"\nTesting actual API call (LLM_MODE={llm_transport.mode})...")
         try:
             scenarios = engine.test_browser_compatibility(
                 "https://example.com", 
@@ -1823,4 +3164,9 @@ if __name__ == '__main__':
         except Exception as e:
             print(f" API test failed: {str(e)}")
     else:
+        # The debug reloader runs this twice; only its serving child needs the connections
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            prewarm_llm_pool()
+            start_schedule_runner()
+            start_webhook_dispatcher()
         app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,153 @@
+"""
+ASGI serving mode:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+Testing jobs (single runs and ``/api/start-batch``) run as asyncio tasks using
+the async engine path (``AsyncOpenAI`` + ``TestingEngine.analyze_website_async``),
+so one process can keep thousands of jobs waiting on Perplexity without holding
+an OS thread per job. The same priority/fair-share scheduler as the threaded
+server (scheduler.py) picks the next job, with up to ``ASYNC_JOB_CONCURRENCY``
+(default 1000) in flight. Every other endpoint is served by the regular Flask app through
+a2wsgi's ``WSGIMiddleware``, which runs requests on a pool of
+``ASGI_WSGI_WORKERS`` threads (default 32); the WSGI entry point (``app:app``)
+keeps working unchanged.
+"""
+import asyncio
+import json
+import os
+
+from a2wsgi import WSGIMiddleware
+
+import app as backend
+from scheduler import JobDispatcher
+
+
+# asgiref's WsgiToAsgi funnels every request through one thread-sensitive executor,
+# which serializes polling clients and breaks under concurrent requests
+flask_application = WSGIMiddleware(backend.app, workers=int(os.getenv('ASGI_WSGI_WORKERS', '32')))
+
+# Keep references to running jobs so the event loop does not garbage collect them
+running_jobs = set()
+
+# Startup tasks (LLM connection prewarm), kept for the same reason and cancelled on shutdown
+startup_tasks = set()
+
+event_loop = None
+
+
+def launch_job_task(item, queue_wait, done):
+    """JobDispatcher launcher: run the job as an asyncio task on the server's event loop"""
+    record, job = item
+
+    async def run():
+        task = asyncio.current_task()
+        # Cancelling the job cancels this task, which aborts the in-flight LLM requests
+        remove_callback = job.cancel.add_callback(lambda: event_loop.call_soon_threadsafe(task.cancel))
+        try:
+            backend.job_store.update(record['id'], queue_wait_seconds=round(queue_wait, 3))
+            await backend.run_job_record_async(record, job)
+        finally:
+            remove_callback()
+            backend.cancel_tokens.pop(record['id'], None)
+            done()
+
+    def start():
+        task = asyncio.ensure_future(run())
+        running_jobs.add(task)
+        task.add_done_callback(running_jobs.discard)
+
+    # Jobs may also be dispatched from Flask routes (e.g. /api/start-batch) on WSGI threads
+    event_loop.call_soon_threadsafe(start)
+
+
+# Same scheduling policy as the threaded server, with a much higher in-flight limit
+backend.job_dispatcher = JobDispatcher(launch_job_task, int(os.getenv('ASYNC_JOB_CONCURRENCY', '1000')))
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+            (b'access-control-allow-origin', b'*'),
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def start_testing(receive, send):
+    """Async counterpart of the Flask start_testing route"""
+    try:
+        try:
+            data = json.loads(await read_body(receive) or b'null')
+            record, job = backend.create_job(data)
+        except (ValueError, AttributeError) as e:
+            await send_json(send, 400, {'error': str(e)})
+            return
+
+        # Shared stores leave the job queued for worker.py, like the WSGI app
+        backend.dispatch_job(record, job)
+
+        await send_json(send, 200, {'test_id': record['id'], 'status': 'started'})
+
+    except Exception as e:
+        await send_json(send, 500, {'error': str(e)})
+
+
+def start_background_task(coroutine, name):
+    """Run a startup coroutine without delaying startup; failures are logged rather than lost"""
+    task = asyncio.ensure_future(coroutine)
+    startup_tasks.add(task)
+
+    def finished(task):
+        startup_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"{name} failed: {str(task.exception())}")
+
+    task.add_done_callback(finished)
+    return task
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Open LLM connections in the background; startup does not wait for them
+            start_background_task(backend.prewarm_llm_pool_async(), 'LLM connection prewarm')
+            backend.start_schedule_runner()
+            backend.start_webhook_dispatcher()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if backend.schedule_runner is not None:
+                backend.schedule_runner.stop()
+            if backend.webhook_dispatcher is not None:
+                backend.webhook_dispatcher.stop()
+            for task in list(running_jobs) + list(startup_tasks):
+                task.cancel()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    global event_loop
+    if event_loop is None:
+        event_loop = asyncio.get_running_loop()
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] == '/api/start-testing':
+        await start_testing(receive, send)
+    else:
+        await flask_application(scope, receive, send)
@@ -0,0 +1,92 @@
+"""
+Near-duplicate scenario merging on large synthetic reports.
+
+    cd backend
+    python benchmarks/bench_dedup.py --sizes 1000 10000 50000 --repeat 3
+
+Every distinct check appears once per browser with a reworded title (plus a
+failing copy now and then), like model output that repeats a check per
+browser. Prints one JSON line per report size with the merge time, time per
+scenario (flat when the LSH index keeps the stage linear), the scenarios left
+and how far the duplicates had pulled the pass rate.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scenario_dedup import dedupe_scenarios  # noqa: E402
+from scoring import PASSING_STATUSES, derive_status  # noqa: E402
+
+BROWSERS = ['Chrome', 'Firefox', 'Safari', 'Edge']
+CATEGORIES = ['Functional', 'Security', 'Accessibility', 'Performance', 'Usability']
+TITLES = ['Verify {} on {}', 'Check that {} works in {}', 'Verify {} ({})']
+FEATURES = ['login', 'search', 'checkout', 'signup', 'cart', 'profile', 'navigation', 'filters', 'reviews', 'contact']
+ACTIONS = ['open', 'submit', 'reload', 'scroll', 'resize', 'cancel', 'retry', 'share', 'sort', 'export']
+
+
+def make_scenarios(size, seed=42):
+    rng = random.Random(seed)
+    scenarios = []
+    check = 0
+    while len(scenarios) < size:
+        feature = f"{rng.choice(FEATURES)} {rng.choice(ACTIONS)} {check}"
+        steps = [f"Go to the {feature} page", f"Use the {feature} control with sample data {check}", "Observe the result"]
+        category = CATEGORIES[check % len(CATEGORIES)]
+        # Checks covered on a single browser stay unique
+        browsers = BROWSERS if check % 3 else BROWSERS[:1]
+        for browser in browsers:
+            failed = rng.random() < 0.1
+            scenarios.append({
+                "id": f"SCENARIO-{len(scenarios) + 1:05d}",
+                "title": rng.choice(TITLES).format(feature, browser),
+                "category": category,
+                "browser": browser,
+                "platform": "Windows",
+                "steps": steps,
+                "expected_result": f"The {feature} control responds as expected.",
+                "status": "fail" if failed else "pass"
+            })
+        check += 1
+    return scenarios[:size]
+
+
+def pass_rate(scenarios):
+    statuses = [derive_status(scenario) for scenario in scenarios]
+    return round(sum(1 for status in statuses if status in PASSING_STATUSES) / len(statuses), 4) if statuses else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate scenario merging")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--threshold', type=float, default=0.8)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        scenarios = make_scenarios(size)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            merged, merged_away = dedupe_scenarios(scenarios, args.threshold)
+            timings.append(time.perf_counter() - started)
+        seconds = min(timings)
+        print(json.dumps({
+            "scenarios": size,
+            "after": len(merged),
+            "merged": merged_away,
+            "dedup_ms": round(seconds * 1000, 2),
+            "us_per_scenario": round(seconds / size * 1e6, 2),
+            "pass_rate_before": pass_rate(scenarios),
+            "pass_rate_after": pass_rate(merged),
+            "payload_kb_before": round(len(json.dumps(scenarios)) / 1024, 1),
+            "payload_kb_after": round(len(json.dumps(merged)) / 1024, 1)
+        }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""
+End-to-end throughput and latency benchmark.
+
+    cd backend
+    python benchmarks/bench_e2e.py --jobs 200 --concurrency 50
+    python benchmarks/bench_e2e.py --jobs 300 --rate 5 --latency 2 --jitter 0.6 --output result.json
+    python benchmarks/bench_e2e.py --jobs 200 --baseline result.json
+
+Starts fake_perplexity.py and the backend (Flask threaded server, or uvicorn with
+``--server asgi``) as subprocesses, drives ``/api/start-testing`` either closed
+loop (``--concurrency`` clients, each waiting for its job) or open loop
+(``--rate`` Poisson arrivals per second), polls every job until it finishes and
+prints one JSON document: throughput, job latency percentiles, peak thread
+count and RSS of the backend process, and fallback/error rates derived from the
+job timelines. ``--baseline`` compares against a previous result and exits with
+status 1 on a throughput drop or p99 increase beyond ``--tolerance``.
+
+Latency is measured from each job's scheduled arrival time, so client-side
+queueing in open-loop runs is counted rather than hidden.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAYLOAD = {
+    'url': 'https://example.com',
+    'test_type': 'comprehensive',
+    'browsers': ['Chrome', 'Firefox'],
+    'platforms': ['Windows', 'macOS'],
+    'test_categories': {'functional': True, 'accessibility': True, 'performance': True, 'security': True}
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(values):
+    if not values:
+        return {}
+    return {
+        'p50': round(percentile(values, 50), 3),
+        'p90': round(percentile(values, 90), 3),
+        'p99': round(percentile(values, 99), 3),
+        'max': round(max(values), 3),
+        'mean': round(sum(values) / len(values), 3)
+    }
+
+
+class ProcessSampler(threading.Thread):
+    """Samples thread count and RSS of a process from /proc (Linux only)"""
+
+    def __init__(self, pid, interval=0.25):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak_threads = None
+        self.peak_rss_mb = None
+        self.stop_event = threading.Event()
+
+    def sample(self):
+        try:
+            with open(f'/proc/{self.pid}/status') as f:
+                fields = dict(line.split(':', 1) for line in f if ':' in line)
+        except OSError:
+            return
+        threads = int(fields['Threads'].strip())
+        rss_mb = int(fields['VmRSS'].split()[0]) / 1024
+        self.peak_threads = max(self.peak_threads or 0, threads)
+        self.peak_rss_mb = max(self.peak_rss_mb or 0, rss_mb)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+
+def classify(timeline):
+    """Outcome flags from a job's timeline spans"""
+    spans = {span['name']: span for span in timeline.get('spans', [])}
+    main = spans.get('llm.main', {}).get('attributes', {})
+    browser_llm = spans.get('llm.browser', {}).get('attributes', {})
+    browser_parse = spans.get('parse.browser', {}).get('attributes', {})
+    return {
+        'main_error': 'error' in main,
+        'main_fallback': 'parse.fallback' in spans,
+        'browser_fallback': 'error' in browser_llm or browser_parse.get('strategy') is None
+    }
+
+
+def run_job(base_url, scheduled_at, poll_interval, timeout):
+    session = requests.Session()
+    posted = time.perf_counter()
+    response = session.post(f'{base_url}/api/start-testing', json=PAYLOAD, timeout=30)
+    start_latency = time.perf_counter() - posted
+    if response.status_code != 200:
+        return {'status': f'http_{response.status_code}', 'start_latency': start_latency}
+    test_id = response.json()['test_id']
+
+    deadline = time.perf_counter() + timeout
+    status = 'running'
+    while time.perf_counter() < deadline:
+        status = session.get(f'{base_url}/api/test-results/{test_id}', timeout=30).json().get('status')
+        if status in ('completed', 'failed'):
+            break
+        time.sleep(poll_interval)
+    finished = time.perf_counter()
+
+    result = {
+        'status': status if status in ('completed', 'failed') else 'timeout',
+        'latency': finished - scheduled_at,
+        'start_latency': start_latency
+    }
+    if result['status'] != 'timeout':
+        result.update(classify(session.get(f'{base_url}/api/test-results/{test_id}/timeline', timeout=30).json()))
+    return result
+
+
+def drive(base_url, args):
+    """Run all jobs and return (per-job results, wall clock seconds)"""
+    results = []
+    lock = threading.Lock()
+
+    def record(scheduled_at):
+        try:
+            outcome = run_job(base_url, scheduled_at, args.poll_interval, args.timeout)
+        except requests.RequestException as e:
+            outcome = {'status': 'client_error', 'error': str(e)}
+        with lock:
+            results.append(outcome)
+
+    started = time.perf_counter()
+    if args.rate:
+        # Open loop: Poisson arrivals regardless of how fast jobs finish
+        rng = random.Random(args.seed)
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            arrival = started
+            for _ in range(args.jobs):
+                arrival += rng.expovariate(args.rate)
+                time.sleep(max(0.0, arrival - time.perf_counter()))
+                pool.submit(record, arrival)
+    else:
+        # Closed loop: each client starts its next job when the previous one finished
+        remaining = iter(range(args.jobs))
+        remaining_lock = threading.Lock()
+
+        def client():
+            while True:
+                with remaining_lock:
+                    if next(remaining, None) is None:
+                        return
+                record(time.perf_counter())
+
+        clients = [threading.Thread(target=client) for _ in range(args.concurrency)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+    return results, time.perf_counter() - started
+
+
+def summarize(results, elapsed, sampler, stub_stats, args):
+    completed = [r for r in results if r['status'] == 'completed']
+    finished = [r for r in results if 'main_error' in r]
+
+    def rate(flag):
+        return round(sum(1 for r in finished if r[flag]) / len(finished), 4) if finished else None
+
+    statuses = {}
+    for r in results:
+        statuses[r['status']] = statuses.get(r['status'], 0) + 1
+
+    return {
+        'config': {
+            'server': args.server, 'jobs': args.jobs, 'concurrency': args.concurrency, 'rate': args.rate,
+            'latency': args.latency, 'jitter': args.jitter, 'distribution': args.distribution,
+            'tokens_per_second': args.tokens_per_second, 'error_rate': args.error_rate,
+            'truncate_rate': args.truncate_rate, 'phase_delay': args.phase_delay
+        },
+        'elapsed_seconds': round(elapsed, 3),
+        'statuses': statuses,
+        'throughput_jobs_per_minute': round(len(completed) / elapsed * 60, 2) if elapsed else None,
+        'job_latency_seconds': latency_summary([r['latency'] for r in completed]),
+        'start_latency_seconds': latency_summary([r['start_latency'] for r in results if 'start_latency' in r]),
+        'server_peak_threads': sampler.peak_threads if sampler else None,
+        'server_peak_rss_mb': round(sampler.peak_rss_mb, 1) if sampler and sampler.peak_rss_mb else None,
+        'fallback_rates': {
+            'main_error': rate('main_error'),
+            'main_fallback': rate('main_fallback'),
+            'browser_fallback': rate('browser_fallback')
+        },
+        'stub': stub_stats
+    }
+
+
+def compare(summary, baseline, tolerance):
+    """Regression messages for throughput drops and p99 increases beyond the tolerance"""
+    regressions = []
+    old_throughput = baseline.get('throughput_jobs_per_minute')
+    new_throughput = summary.get('throughput_jobs_per_minute')
+    if old_throughput and new_throughput is not None and new_throughput < old_throughput * (1 - tolerance):
+        regressions.append(f"throughput {new_throughput} < baseline {old_throughput}")
+    old_p99 = baseline.get('job_latency_seconds', {}).get('p99')
+    new_p99 = summary.get('job_latency_seconds', {}).get('p99')
+    if old_p99 and new_p99 is not None and new_p99 > old_p99 * (1 + tolerance):
+        regressions.append(f"p99 latency {new_p99}s > baseline {old_p99}s")
+    return regressions
+
+
+def start_processes(args):
+    stub_port, app_port = free_port(), free_port()
+    stub_command = [
+        sys.executable, os.path.join(BACKEND_DIR, 'fake_perplexity.py'), '--port', str(stub_port),
+        '--latency', str(args.latency), '--jitter', str(args.jitter), '--distribution', args.distribution,
+        '--tokens-per-second', str(args.tokens_per_second), '--error-rate', str(args.error_rate),
+        '--truncate-rate', str(args.truncate_rate), '--seed', str(args.seed)
+    ]
+    env = dict(
+        os.environ,
+        PERPLEXITY_BASE_URL=f'http://127.0.0.1:{stub_port}',
+        PERPLEXITY_API_KEY='fake-key',
+        LLM_MODE='live',
+        JOB_STORE='memory',
+        TESTING_PHASE_DELAY=str(args.phase_delay)
+    )
+    if args.server == 'asgi':
+        app_command = [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(app_port), '--log-level', 'warning']
+    else:
+        app_command = [sys.executable, '-c',
+                       f'import app; app.app.run(host="127.0.0.1", port={app_port}, threaded=True)']
+
+    output = None if args.verbose else subprocess.DEVNULL
+    stub = subprocess.Popen(stub_command, cwd=BACKEND_DIR, stdout=output, stderr=output)
+    server = subprocess.Popen(app_command, cwd=BACKEND_DIR, env=env, stdout=output, stderr=output)
+    return stub, server, f'http://127.0.0.1:{stub_port}', f'http://127.0.0.1:{app_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end backend benchmark against the fake Perplexity server")
+    parser.add_argument('--jobs', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=20, help="closed-loop clients, or the open-loop client pool size")
+    parser.add_argument('--rate', type=float, default=0.0, help="open-loop arrivals per second (0 = closed loop)")
+    parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--latency', type=float, default=1.5, help="stub LLM median latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.5)
+    parser.add_argument('--distribution', choices=['uniform', 'lognormal'], default='lognormal')
+    parser.add_argument('--tokens-per-second', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--truncate-rate', type=float, default=0.0)
+    parser.add_argument('--phase-delay', type=float, default=0.0, help="TESTING_PHASE_DELAY for the backend")
+    parser.add_argument('--poll-interval', type=float, default=0.25)
+    parser.add_argument('--timeout', type=float, default=300.0, help="per-job timeout in seconds")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help="also write the JSON result to this file")
+    parser.add_argument('--baseline', help="previous result to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    parser.add_argument('--verbose', action='store_true', help="show stub and backend output")
+    args = parser.parse_args()
+
+    stub, server, stub_url, base_url = start_processes(args)
+    sampler = None
+    try:
+        wait_until_up(f'{stub_url}/health')
+        wait_until_up(f'{base_url}/api/health')
+        sampler = ProcessSampler(server.pid)
+        sampler.start()
+        results, elapsed = drive(base_url, args)
+        sampler.stop_event.set()
+        sampler.sample()
+        stub_stats = requests.get(f'{stub_url}/stats', timeout=5).json()
+    finally:
+        for process in (server, stub):
+            process.terminate()
+            process.wait(timeout=10)
+
+    summary = summarize(results, elapsed, sampler, stub_stats, args)
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            summary['regressions'] = compare(summary, json.load(f), args.tolerance)
+        exit_code = 1 if summary['regressions'] else 0
+
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
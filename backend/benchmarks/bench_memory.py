@@ -0,0 +1,145 @@
+"""
+Memory held by stored reports: plain dicts vs compact records.
+
+    cd backend
+    python benchmarks/bench_memory.py --reports 1000 5000 --scenarios 40
+
+Each measurement runs in a fresh interpreter, which parses one JSON report per
+job (like a model response, so no strings are shared between reports), stores
+it in a ``MemoryJobStore`` and reports the growth of the process RSS per 1,000
+stored reports. Prints one JSON line per report count with both modes and
+checks the compact reports serialize to the same JSON.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+CATEGORIES = ['Functional', 'UI/UX', 'Security', 'Accessibility', 'Performance', 'Usability']
+SEVERITIES = ['Critical', 'High', 'Medium', 'Low']
+BROWSERS = ['Chrome', 'Firefox', 'Safari', 'Edge']
+PLATFORMS = ['Windows', 'macOS', 'Android', 'iOS']
+
+
+def report_json(index, scenario_count, seed=42):
+    """One synthetic report as JSON text, shaped like the engine's reports"""
+    rng = random.Random(seed * 100003 + index)
+    url = f"https://site{index}.example.com"
+    scenarios = []
+    for number in range(scenario_count):
+        failed = rng.random() < 0.3
+        scenarios.append({
+            "id": f"SCENARIO-{number + 1:03d}",
+            "title": f"Verify page behaviour {number + 1}",
+            "feature": rng.choice(["Navigation", "Search", "Checkout", "Forms"]),
+            "category": CATEGORIES[number % len(CATEGORIES)],
+            "browser": rng.choice(BROWSERS),
+            "platform": rng.choice(PLATFORMS),
+            "priority": rng.choice(["High", "Medium", "Low"]),
+            "steps": [f"Navigate to {url}", "Interact with the page element", "Observe the result"],
+            "expected_result": "The element responds as expected.",
+            "observed_result": "An error message is shown instead." if failed else "The element responds as expected.",
+            "status": "fail" if failed else "pass"
+        })
+    defects = [{
+        "id": f"BUG-{number + 1:03d}",
+        "title": f"Defect found in {scenario['title'].lower()}",
+        "description": "The observed result differs from the expected result.",
+        "severity": rng.choice(SEVERITIES),
+        "feature": scenario['feature'],
+        "affected_browsers": ["Chrome", "Firefox"],
+        "affected_platforms": ["Windows"]
+    } for number, scenario in enumerate(s for s in scenarios if s['status'] == 'fail')]
+    browser_scenarios = [{
+        "id": f"BC-{number + 1:03d}",
+        "title": f"Cross-browser rendering check {number + 1}",
+        "test_case": "Verify the page renders and behaves consistently.",
+        "steps": [f"Open {url}", "Compare layout and interactions across browsers"],
+        "expected_result": "Consistent rendering across browsers",
+        "observed_result": rng.choice(["Consistent rendering across browsers", "Minor spacing differences in Safari"]),
+        "status": rng.choice(["pass", "pass", "warning", "fail"]),
+        "affected_browsers": rng.sample(BROWSERS, 2),
+        "affected_platforms": rng.sample(PLATFORMS, 1),
+        "severity": rng.choice(SEVERITIES)
+    } for number in range(5)]
+    return json.dumps({
+        "scenarios": scenarios,
+        "defects_and_gaps": defects,
+        "browser_compatibility_scenarios": browser_scenarios,
+        "functional_observations": [f"Core navigation on {url} works."],
+        "recommendations": ["Add alt text to images", "Review error handling on forms"],
+        "confidence_score": rng.randint(40, 95),
+        "category_scores": {"functionality": {"score": rng.randint(40, 100), "status": "good"}}
+    })
+
+
+def rss_bytes():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def measure(reports, scenarios, compact):
+    """Runs in the child interpreter: RSS growth from storing the reports"""
+    from compact_reports import json_default
+    from job_store import MemoryJobStore
+
+    store = MemoryJobStore({}, compact=compact)
+    gc.collect()
+    before = rss_bytes()
+    for index in range(reports):
+        store.create({'id': str(index), 'url': f"https://site{index}.example.com", 'status': 'completed',
+                      'report': json.loads(report_json(index, scenarios))})
+    gc.collect()
+    grown = rss_bytes() - before
+    # The API output must not change: compare one report's JSON with the original
+    sample = json.loads(json.dumps(store.get('0')['report'], default=json_default))
+    return {
+        'rss_mb': round(grown / 2 ** 20, 1),
+        'rss_mb_per_1000_reports': round(grown / 2 ** 20 / reports * 1000, 1),
+        'same_json': sample == json.loads(report_json(0, scenarios))
+    }
+
+
+def run_child(reports, scenarios, compact):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', '--reports', str(reports),
+         '--scenarios', str(scenarios)] + (['--compact'] if compact else []),
+        check=True, capture_output=True, text=True, cwd=BACKEND_DIR
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory held by stored reports")
+    parser.add_argument('--reports', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--scenarios', type=int, default=40)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--compact', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.reports[0], args.scenarios, args.compact)))
+        return
+
+    for reports in args.reports:
+        plain = run_child(reports, args.scenarios, compact=False)
+        compact = run_child(reports, args.scenarios, compact=True)
+        print(json.dumps({
+            'reports': reports,
+            'scenarios_per_report': args.scenarios,
+            'dict_rss_mb_per_1000_reports': plain['rss_mb_per_1000_reports'],
+            'compact_rss_mb_per_1000_reports': compact['rss_mb_per_1000_reports'],
+            'reduction': round(1 - compact['rss_mb_per_1000_reports'] / plain['rss_mb_per_1000_reports'], 3)
+            if plain['rss_mb_per_1000_reports'] else None,
+            'same_json': compact['same_json']
+        }))
+
+
+if __name__ == '__main__':
+    main()
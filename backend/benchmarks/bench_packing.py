@@ -0,0 +1,132 @@
+"""
+Pages per LLM request with and without multi-page packing.
+
+    cd backend
+    python benchmarks/bench_packing.py --pages 40 --rpm 60
+
+Starts fake_perplexity.py, then runs a batch of thin pages (``/privacy``,
+``/terms``, ``/contact``, ... of several sites) through ``/api/start-batch`` on
+the in-process app, once as separate jobs and once with ``"pack": true``.
+Prints one JSON line per mode: LLM requests made, pages per request, wall
+time, and the pages per minute a ``--rpm`` requests-per-minute limit allows
+(``rpm * pages / requests``).
+"""
+import argparse
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+THIN_PATHS = ['privacy', 'terms', 'contact', 'about', 'cookies', 'imprint', 'legal', 'faq']
+
+PAYLOAD = {
+    'testType': 'comprehensive',
+    'browsers': ['chrome', 'firefox'],
+    'platforms': ['windows', 'macos'],
+    'testCategories': {'functional': True, 'accessibility': True, 'security': True}
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def batch_urls(pages):
+    return [f"https://site{index // len(THIN_PATHS)}.example.com/{THIN_PATHS[index % len(THIN_PATHS)]}"
+            for index in range(pages)]
+
+
+def run_batch(client, urls, pack, stats):
+    """Run one batch to completion; returns the mode's measurements"""
+    requests_before = stats()['requests']
+    started = time.perf_counter()
+    response = client.post('/api/start-batch', json={**PAYLOAD, 'urls': urls, 'pack': pack})
+    batch = response.get_json()
+    pending = set(batch['test_ids'])
+    statuses = {}
+    while pending:
+        time.sleep(0.1)
+        for test_id in list(pending):
+            record = client.get(f'/api/test-results/{test_id}').get_json()
+            if record['status'] in ('completed', 'failed', 'cancelled'):
+                statuses[test_id] = record
+                pending.discard(test_id)
+    elapsed = time.perf_counter() - started
+    requests_made = stats()['requests'] - requests_before
+    return {
+        'pages': len(urls),
+        'packs': batch.get('packs', 0),
+        'llm_requests': requests_made,
+        'pages_per_request': round(len(urls) / requests_made, 2) if requests_made else None,
+        'seconds': round(elapsed, 2),
+        'completed': sum(1 for record in statuses.values() if record['status'] == 'completed'),
+        'packed_reports': sum(1 for record in statuses.values() if (record.get('report') or {}).get('packing')),
+        'scenarios_per_page': round(sum(len((record.get('report') or {}).get('scenarios') or [])
+                                        for record in statuses.values()) / len(urls), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-page packing")
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--rpm', type=float, default=60, help="requests-per-minute limit to convert to pages per minute")
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--tokens-per-second', type=float, default=2000)
+    args = parser.parse_args()
+
+    port = free_port()
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, 'fake_perplexity.py'), '--port', str(port),
+         '--latency', str(args.latency), '--tokens-per-second', str(args.tokens_per_second), '--seed', '1'],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    os.environ.update(
+        PERPLEXITY_BASE_URL=f'http://127.0.0.1:{port}',
+        PERPLEXITY_API_KEY='fake-key',
+        LLM_MODE='live',
+        JOB_STORE='memory',
+        TESTING_PHASE_DELAY='0',
+        LLM_POOL_PREWARM='0'
+    )
+    try:
+        import requests
+        import app as backend
+
+        def stats():
+            return requests.get(f'http://127.0.0.1:{port}/stats', timeout=5).json()
+
+        deadline = time.time() + 30
+        while True:
+            try:
+                stats()
+                break
+            except requests.RequestException:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.2)
+
+        client = backend.app.test_client()
+        urls = batch_urls(args.pages)
+        for pack in (False, True):
+            # The engine logs every response; keep stdout for the results
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                result = run_batch(client, urls, pack, stats)
+            result['mode'] = 'packed' if pack else 'separate'
+            if result['pages_per_request']:
+                result['pages_per_minute_at_rpm'] = round(args.rpm * result['pages_per_request'], 1)
+            print(json.dumps(result))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Scoring benchmark on large synthetic reports (batch roll-up sizes).
+
+    cd backend
+    python benchmarks/bench_scoring.py --sizes 1000 10000 --repeat 5
+
+Compares the single-pass scorer used by ``TestingEngine`` against the previous
+per-category scan (kept below as ``legacy_scores`` for reference), checks both
+produce the same scores and prints one JSON line per report size.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import (  # noqa: E402
+    CATEGORY_MAPPING, compute_category_scores, compute_confidence_score, derive_status, normalize_scenarios
+)
+
+CATEGORIES = ['Functional', 'Security', 'Accessibility', 'Performance', 'Usability', 'UI/UX']
+SELECTED_CATEGORIES = {
+    'functional': True,
+    'accessibility': True,
+    'performance': True,
+    'security': True,
+    'usability': True
+}
+
+
+def make_report(size, seed=42):
+    rng = random.Random(seed)
+    scenarios = []
+    for index in range(size):
+        scenario = {
+            "id": f"SCENARIO-{index + 1:05d}",
+            "title": f"Verify behaviour {index}",
+            "category": rng.choice(CATEGORIES),
+            "expected_result": "The page should respond correctly.",
+            "observed_result": rng.choice([
+                "The page should respond correctly.",
+                "An error message is shown instead.",
+                "Works with some issues on mobile.",
+                "Layout overlaps the footer."
+            ])
+        }
+        # Roughly half of the scenarios come without an explicit status
+        if rng.random() < 0.5:
+            scenario["status"] = rng.choice(["pass", "fail", "warning"])
+        scenarios.append(scenario)
+    browser_scenarios = [{"status": rng.choice(["pass", "fail", "warning"])} for _ in range(5)]
+    defects = [{"severity": rng.choice(["Critical", "High", "Medium", "Low"])} for _ in range(size // 4)]
+    return {"scenarios": scenarios, "browser_compatibility_scenarios": browser_scenarios, "defects_and_gaps": defects}
+
+
+def legacy_scores(report, selected_categories):
+    """The previous algorithm: one scan of every scenario per selected category"""
+    scenarios = report['scenarios']
+    category_scores = {}
+    for category_key, is_enabled in selected_categories.items():
+        if not is_enabled:
+            continue
+        key = category_key.lower()
+        mapped = CATEGORY_MAPPING.get(key, key)
+        matched = []
+        for scenario in scenarios:
+            scenario_category = str(scenario.get('category', '') or '').lower()
+            scenario_type = str(scenario.get('type', '') or '').lower()
+            if (scenario_category and key in scenario_category) or \
+               (scenario_type and key in scenario_type) or \
+               (scenario_category and mapped in scenario_category) or \
+               (key == 'functional' and scenario_category and ('functional' in scenario_category or 'function' in scenario_category)) or \
+               (key == 'security' and scenario_category and 'security' in scenario_category) or \
+               (key == 'accessibility' and scenario_category and ('accessibility' in scenario_category or 'a11y' in scenario_category)) or \
+               (key == 'performance' and scenario_category and ('performance' in scenario_category or 'speed' in scenario_category)) or \
+               (key == 'usability' and scenario_category and ('usability' in scenario_category or 'ux' in scenario_category)):
+                matched.append(scenario)
+        passed = sum(1 for s in matched if derive_status(s) in ['pass', 'warning'])
+        category_scores[mapped] = int((passed / len(matched)) * 100) if matched else 0
+    # Confidence re-derived every status a second time
+    passed_regular = sum(1 for s in scenarios if derive_status(s) in ['pass', 'warning'])
+    return category_scores, passed_regular
+
+
+def single_pass_scores(report, selected_categories):
+    records = normalize_scenarios(report['scenarios'])
+    category_scores = compute_category_scores(records, selected_categories)
+    confidence = compute_confidence_score(
+        records, report['browser_compatibility_scenarios'], report['defects_and_gaps']
+    )
+    return category_scores, confidence
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark report scoring")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        report = make_report(size)
+        legacy_categories, _ = legacy_scores(report, SELECTED_CATEGORIES)
+        new_categories, _ = single_pass_scores(report, SELECTED_CATEGORIES)
+        consistent = legacy_categories == {key: value['score'] for key, value in new_categories.items()}
+
+        legacy_seconds = best_of(args.repeat, legacy_scores, report, SELECTED_CATEGORIES)
+        single_pass_seconds = best_of(args.repeat, single_pass_scores, report, SELECTED_CATEGORIES)
+        print(json.dumps({
+            "scenarios": size,
+            "legacy_ms": round(legacy_seconds * 1000, 2),
+            "single_pass_ms": round(single_pass_seconds * 1000, 2),
+            "speedup": round(legacy_seconds / single_pass_seconds, 1) if single_pass_seconds else None,
+            "consistent": consistent
+        }))
+
+
+if __name__ == '__main__':
+    main()
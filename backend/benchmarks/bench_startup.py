@@ -0,0 +1,78 @@
+"""
+Cold start benchmark for the backend entry points.
+
+    cd backend
+    python benchmarks/bench_startup.py --repeat 5
+    python benchmarks/bench_startup.py --modules app --budget-ms 400
+
+Imports each module in a fresh interpreter (what a gunicorn worker, ``worker.py``
+or a CLI invocation pays before doing any work), reports the median import time
+and lists any heavy modules that were loaded eagerly. Heavy modules such as
+``openai`` (which pulls in httpx and pydantic) are only imported on the first
+LLM call. With ``--budget-ms`` the run exits with status 1 when a median
+exceeds the budget or a heavy module was imported.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ['app', 'worker', 'asgi']
+
+# Modules that must not be imported until they are actually used
+HEAVY_MODULES = ['openai', 'httpx', 'pydantic', 'requests']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms': elapsed * 1000, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure(module, repeat):
+    """Median import time of a module in fresh interpreters and the heavy modules it loaded"""
+    env = dict(os.environ, JOB_STORE='memory')
+    samples = []
+    heavy = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        samples.append(result['ms'])
+        heavy = result['heavy']
+    return {
+        'module': module,
+        'median_ms': round(statistics.median(samples), 1),
+        'min_ms': round(min(samples), 1),
+        'heavy_imports': heavy
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import time of the backend entry points")
+    parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help="fail when a median import time exceeds this or a heavy module is imported")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        if args.budget_ms is not None:
+            result['within_budget'] = result['median_ms'] <= args.budget_ms and not result['heavy_imports']
+            failed = failed or not result['within_budget']
+        print(json.dumps(result))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
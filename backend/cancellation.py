@@ -0,0 +1,66 @@
+"""
+Cooperative job cancellation.
+
+Every job carries a ``CancelToken``. ``DELETE /api/test-results/<id>`` cancels
+it: callbacks registered by in-flight work run right away (the LLM transport
+closes its response stream, the ASGI server cancels the job's task), waits on
+the token return early, and the job raises ``JobCancelled`` at its next check
+instead of running the remaining stages.
+"""
+import threading
+
+
+class JobCancelled(BaseException):
+    """Raised inside a cancelled job.
+
+    Like ``asyncio.CancelledError`` this derives from ``BaseException``, so the
+    engine's ``except Exception`` fallbacks do not turn a cancellation into a
+    fallback report.
+    """
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with callbacks for aborting blocking work"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error running cancel callback: {str(e)}")
+
+    def add_callback(self, callback):
+        """Run ``callback`` on cancellation (immediately if already cancelled); returns a remover"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout):
+        """Sleep up to ``timeout`` seconds, returning True early if cancelled"""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelled()
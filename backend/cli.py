@@ -0,0 +1,311 @@
+"""
+Headless command line runner: drives ``TestingEngine`` directly, without the
+web server, job store polling or the simulated progress phases.
+
+    python cli.py run https://example.com --categories functional security
+    python cli.py batch urls.txt --parallel 8 --output results.jsonl
+    python cli.py replay results.jsonl --parallel 16 --output replayed.jsonl
+
+``batch`` reads one URL per line (blank lines and ``#`` comments are skipped);
+a line may also be a JSON object with the ``/api/start-testing`` payload fields
+(``url``, ``testType``, ``browsers``, ``platforms``, ``testCategories``,
+``deadlineSeconds``, ``urlTemplate``).
+``replay`` re-runs the jobs of an earlier JSONL output from LLM cassettes only
+(``LLM_MODE=replay``), so a recorded suite can be re-scored offline.
+
+One JSONL record per URL is written as soon as its job finishes (stdout or
+``--output``); engine logs go to stderr and a JSON summary is printed to stderr
+at the end. The exit status is 1 when any job failed or produced an error
+report, so the runner can gate cron and CI pipelines.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from deadlines import deadline_seconds
+
+DEFAULT_CATEGORIES = ['functional']
+
+
+def parse_job_line(line, defaults):
+    """A job payload from a URL-list line, or None for blank and comment lines"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    payload = dict(defaults)
+    if line.startswith('{'):
+        payload.update(json.loads(line))
+    else:
+        payload['url'] = line
+    if not payload.get('url'):
+        raise ValueError(f"No URL in line: {line}")
+    return payload
+
+
+def read_lines(path):
+    if path == '-':
+        return sys.stdin.read().splitlines()
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def replay_payload(record):
+    """Start-testing payload that reproduces a record from an earlier CLI (or export) run"""
+    return {
+        'url': record['url'],
+        'testType': record.get('test_type', 'comprehensive'),
+        'browsers': record.get('browsers', ['chrome']),
+        'platforms': record.get('platforms', ['windows']),
+        'testCategories': record.get('test_categories', {}),
+        'urlTemplate': record.get('url_template')
+    }
+
+
+def is_error_report(report):
+    """create_error_report marks engine failures with an ERROR-001 defect"""
+    return any(defect.get('id') == 'ERROR-001' for defect in report.get('defects_and_gaps') or [])
+
+
+def new_record(payload):
+    return {
+        'id': str(uuid.uuid4()),
+        'url': payload['url'],
+        'status': 'running',
+        'created_at': datetime.now().isoformat(),
+        'test_type': payload.get('testType', 'comprehensive'),
+        'browsers': payload.get('browsers', ['chrome']),
+        'platforms': payload.get('platforms', ['windows']),
+        'test_categories': payload.get('testCategories', {}),
+        'deadline_seconds': payload.get('deadlineSeconds'),
+        'url_template': payload.get('urlTemplate'),
+        'report': {},
+        'timeline': []
+    }
+
+
+def new_job(backend, record):
+    job = backend.JobContext(record['id'], deadline_seconds=record['deadline_seconds'],
+                             url_template=record.get('url_template'))
+    job.start_deadline()
+    return job
+
+
+def finish_record(record, job, started, report=None, error=None):
+    if error is not None:
+        record.update(status='failed', error=str(error))
+    else:
+        record.update(status='error' if is_error_report(report) else 'completed', report=report,
+                      timed_out=bool(report.get('timed_out')))
+    record.update(
+        completed_at=datetime.now().isoformat(),
+        duration_seconds=round(time.perf_counter() - started, 3),
+        timeline=job.timeline.to_list()
+    )
+    return record
+
+
+def engine_arguments(record):
+    return (record['url'], record['test_type'], record['browsers'], record['platforms'], record['test_categories'])
+
+
+def run_payload(backend, payload):
+    """Run one job synchronously and return its record"""
+    record = new_record(payload)
+    job = new_job(backend, record)
+    started = time.perf_counter()
+    try:
+        report = backend.testing_engine.analyze_website(*engine_arguments(record), job)
+    except Exception as e:
+        return finish_record(record, job, started, error=e)
+    return finish_record(record, job, started, report)
+
+
+async def run_payload_async(backend, payload):
+    record = new_record(payload)
+    job = new_job(backend, record)
+    started = time.perf_counter()
+    try:
+        report = await backend.testing_engine.analyze_website_async(*engine_arguments(record), job)
+    except Exception as e:
+        return finish_record(record, job, started, error=e)
+    return finish_record(record, job, started, report)
+
+
+class JsonlWriter:
+    """Thread-safe JSONL sink that flushes every record so consumers can tail it"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+
+def run_threaded(backend, payloads, parallel, on_record):
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        futures = [pool.submit(run_payload, backend, payload) for payload in payloads]
+        for future in as_completed(futures):
+            on_record(future.result())
+
+
+def run_async(backend, payloads, parallel, on_record):
+    async def main():
+        semaphore = asyncio.Semaphore(parallel)
+
+        async def bounded(payload):
+            async with semaphore:
+                on_record(await run_payload_async(backend, payload))
+
+        await asyncio.gather(*(bounded(payload) for payload in payloads))
+
+    asyncio.run(main())
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+def summarize(records, elapsed, llm_mode):
+    durations = [record['duration_seconds'] for record in records]
+    statuses = {}
+    for record in records:
+        statuses[record['status']] = statuses.get(record['status'], 0) + 1
+    reports = [record['report'] for record in records if record['status'] == 'completed']
+    scores = [report.get('confidence_score') for report in reports if isinstance(report.get('confidence_score'), (int, float))]
+    return {
+        'jobs': len(records),
+        'statuses': statuses,
+        'timed_out': sum(1 for record in records if record.get('timed_out')),
+        'llm_mode': llm_mode,
+        'elapsed_seconds': round(elapsed, 3),
+        'jobs_per_minute': round(len(records) / elapsed * 60, 2) if elapsed > 0 else None,
+        'duration_seconds': {
+            'p50': percentile(durations, 50),
+            'p90': percentile(durations, 90),
+            'max': max(durations) if durations else None
+        },
+        'defects': sum(len(report.get('defects_and_gaps') or []) for report in reports),
+        'mean_confidence_score': round(sum(scores) / len(scores), 1) if scores else None
+    }
+
+
+def load_payloads(args):
+    if args.command == 'replay':
+        payloads = [replay_payload(json.loads(line)) for line in read_lines(args.results) if line.strip()]
+    else:
+        defaults = {
+            'testType': args.test_type,
+            'browsers': args.browsers,
+            'platforms': args.platforms,
+            'testCategories': {category: True for category in args.categories},
+            'deadlineSeconds': args.deadline
+        }
+        if args.command == 'run':
+            payloads = [dict(defaults, url=url) for url in args.urls]
+        else:
+            payloads = [payload for payload in (parse_job_line(line, defaults) for line in read_lines(args.url_file)) if payload]
+    # Validate up front so a bad deadline is an input error, not a failed job
+    for payload in payloads:
+        payload['deadlineSeconds'] = deadline_seconds(payload.get('deadlineSeconds'))
+    return payloads
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run website tests without the web server")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--parallel', type=int, default=4, help="jobs running at the same time")
+    common.add_argument('--async', dest='use_async', action='store_true',
+                        help="run jobs as asyncio tasks on the async engine path instead of threads")
+    common.add_argument('--output', '-o', default='-', help="JSONL output file (default: stdout)")
+    common.add_argument('--quiet', '-q', action='store_true', help="discard engine logs instead of writing them to stderr")
+    common.add_argument('--deadline', type=float, default=None,
+                        help="per-job deadline in seconds (default: JOB_DEADLINE_SECONDS or 300; 0 disables)")
+
+    job_options = argparse.ArgumentParser(add_help=False)
+    job_options.add_argument('--test-type', default='comprehensive')
+    job_options.add_argument('--browsers', nargs='+', default=['chrome'])
+    job_options.add_argument('--platforms', nargs='+', default=['windows'])
+    job_options.add_argument('--categories', nargs='+', default=DEFAULT_CATEGORIES,
+                             help="test categories to enable (functional, accessibility, performance, security, usability)")
+
+    run_parser = subparsers.add_parser('run', parents=[common, job_options], help="test one or more URLs")
+    run_parser.add_argument('urls', nargs='+')
+
+    batch_parser = subparsers.add_parser('batch', parents=[common, job_options], help="test every URL in a file")
+    batch_parser.add_argument('url_file', help="one URL or JSON payload per line ('-' for stdin)")
+
+    replay_parser = subparsers.add_parser('replay', parents=[common],
+                                          help="re-run an earlier JSONL output from LLM cassettes")
+    replay_parser.add_argument('results', help="JSONL output of an earlier run ('-' for stdin)")
+    replay_parser.add_argument('--cassette-dir', default=None, help="LLM_CASSETTE_DIR to replay from")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # The CLI keeps reports in memory; replay never touches the network
+    os.environ['JOB_STORE'] = 'memory'
+    if args.command == 'replay':
+        os.environ['LLM_MODE'] = 'replay'
+        if args.cassette_dir:
+            os.environ['LLM_CASSETTE_DIR'] = args.cassette_dir
+
+    try:
+        payloads = load_payloads(args)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error reading jobs: {e}", file=sys.stderr)
+        return 2
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    writer = JsonlWriter(output)
+    records = []
+
+    def on_record(record):
+        records.append(record)
+        writer.write(record)
+
+    # Engine logging uses print(); keep it off the JSONL stream
+    log_target = open(os.devnull, 'w') if args.quiet else sys.stderr
+    try:
+        with contextlib.redirect_stdout(log_target):
+            import app as backend
+
+            started = time.perf_counter()
+            runner = run_async if args.use_async else run_threaded
+            runner(backend, payloads, max(1, args.parallel), on_record)
+            elapsed = time.perf_counter() - started
+            llm_mode = backend.llm_transport.mode
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if args.quiet:
+            log_target.close()
+
+    summary = summarize(records, elapsed, llm_mode)
+    print(json.dumps(summary), file=sys.stderr)
+    return 0 if summary['statuses'].get('completed', 0) == len(records) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Compact in-memory reports for the memory job store.
+
+A report is a few hundred small dicts whose values repeat endlessly: the same
+categories, statuses, severities and browser/platform names in every scenario.
+When a report is stored it is validated and converted once into ``__slots__``
+records (``Scenario``, ``Defect``, ``BrowserScenario``):
+
+- enum-like fields (category, status, severity, browser, ...) are interned, so
+  every report shares one string object per distinct value;
+- list fields become tuples, and browser/platform lists are shared as well;
+- text repeated within a report (steps, expected results) is stored once;
+- scalars in text fields are converted to strings, entries that are not
+  objects are dropped and any field the record does not declare is kept in
+  ``extra``, so nothing the model produced is lost.
+
+Records and reports are read-only mappings, so exporters, the renderer and the
+analytics read them like the original dicts. They are only turned back into
+plain JSON at the API boundary (``json_default``). ``COMPACT_REPORTS=0``
+stores reports as plain dicts again.
+"""
+import os
+import sys
+from collections.abc import Mapping
+
+
+class _Missing:
+    """Slot value of a field the original entry did not have (a class, so it survives copying)"""
+
+
+# Distinct browser/platform lists shared between records (bounded against unusual output)
+_SHARED_TUPLES = {}
+MAX_SHARED_TUPLES = 4096
+
+
+def compact_reports_enabled():
+    return os.getenv('COMPACT_REPORTS', '1').lower() not in ('0', 'false', 'no', 'off')
+
+
+def intern_text(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def shared_tuple(values):
+    values = tuple(intern_text(value) for value in values)
+    shared = _SHARED_TUPLES.get(values)
+    if shared is None:
+        if len(_SHARED_TUPLES) >= MAX_SHARED_TUPLES:
+            return values
+        shared = _SHARED_TUPLES.setdefault(values, values)
+    return shared
+
+
+def text_value(value):
+    """A text field's value, or _Missing when it cannot be one"""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return str(value)
+    return _Missing
+
+
+def list_value(value, shared):
+    """A list field's value as a tuple of scalars (a string is kept), or _Missing"""
+    if value is None or isinstance(value, str):
+        return intern_text(value) if shared else value
+    if isinstance(value, (list, tuple)) and all(item is None or isinstance(item, (str, int, float)) for item in value):
+        return shared_tuple(value) if shared else tuple(value)
+    return _Missing
+
+
+def share_text(value, texts):
+    """The first equal string (or tuple of strings) seen in the report"""
+    if isinstance(value, str):
+        return texts.setdefault(value, value)
+    if isinstance(value, tuple) and all(isinstance(item, str) for item in value):
+        return texts.setdefault(value, value)
+    return value
+
+
+class CompactMapping(Mapping):
+    __slots__ = ()
+
+    def to_dict(self):
+        return dict(self.items())
+
+
+class CompactRecord(CompactMapping):
+    """One report entry; subclasses declare their fields as slots"""
+
+    __slots__ = ()
+    TEXT_FIELDS = ()
+    ENUM_FIELDS = ()
+    LIST_FIELDS = ()
+    SHARED_LIST_FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = cls.TEXT_FIELDS + cls.ENUM_FIELDS + cls.LIST_FIELDS + cls.SHARED_LIST_FIELDS
+        converters = {}
+        converters.update((field, text_value) for field in cls.TEXT_FIELDS)
+        converters.update((field, lambda value: intern_text(text_value(value))) for field in cls.ENUM_FIELDS)
+        converters.update((field, lambda value: list_value(value, False)) for field in cls.LIST_FIELDS)
+        converters.update((field, lambda value: list_value(value, True)) for field in cls.SHARED_LIST_FIELDS)
+        cls._converters = converters
+
+    @classmethod
+    def from_dict(cls, item, texts=None):
+        """Record of a report entry; ``texts`` shares equal text values within one report"""
+        record = cls.__new__(cls)
+        for field in cls.FIELDS:
+            setattr(record, field, _Missing)
+        extra = None
+        for key, value in item.items():
+            convert = cls._converters.get(key)
+            converted = convert(value) if convert is not None else _Missing
+            if texts is not None:
+                converted = share_text(converted, texts)
+            if converted is _Missing:
+                if extra is None:
+                    extra = {}
+                extra[intern_text(key)] = value
+            else:
+                setattr(record, key, converted)
+        record.extra = extra
+        return record
+
+    def __getitem__(self, key):
+        if key in self._converters:
+            value = getattr(self, key)
+            if value is not _Missing:
+                return value
+        # Declared fields with an unexpected value are kept in extra too
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        for field in self.FIELDS:
+            if getattr(self, field) is not _Missing:
+                yield field
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Scenario(CompactRecord):
+    TEXT_FIELDS = ('id', 'title', 'test_case', 'expected_result', 'observed_result', 'feature')
+    ENUM_FIELDS = ('category', 'type', 'status', 'priority', 'browser', 'platform', 'source')
+    LIST_FIELDS = ('steps', 'merged_ids')
+    SHARED_LIST_FIELDS = ('browsers', 'platforms')
+    __slots__ = TEXT_FIELDS + ENUM_FIELDS + LIST_FIELDS + SHARED_LIST_FIELDS + ('extra',)
+
+
+class Defect(CompactRecord):
+    TEXT_FIELDS = ('id', 'title', 'description', 'feature')
+    ENUM_FIELDS = ('severity', 'category')
+    SHARED_LIST_FIELDS = ('affected_browsers', 'affected_platforms')
+    __slots__ = TEXT_FIELDS + ENUM_FIELDS + SHARED_LIST_FIELDS + ('extra',)
+
+
+class BrowserScenario(CompactRecord):
+    TEXT_FIELDS = ('id', 'title', 'test_case', 'expected_result', 'observed_result')
+    ENUM_FIELDS = ('status', 'severity')
+    LIST_FIELDS = ('steps',)
+    SHARED_LIST_FIELDS = ('affected_browsers', 'affected_platforms')
+    __slots__ = TEXT_FIELDS + ENUM_FIELDS + LIST_FIELDS + SHARED_LIST_FIELDS + ('extra',)
+
+
+SECTION_RECORDS = {
+    'scenarios': Scenario,
+    'defects_and_gaps': Defect,
+    'browser_compatibility_scenarios': BrowserScenario
+}
+
+
+class CompactReport(CompactMapping):
+    """A report: its three entry lists as record tuples, every other key as stored"""
+
+    __slots__ = tuple(SECTION_RECORDS) + ('rest',)
+
+    def __getitem__(self, key):
+        if key in SECTION_RECORDS:
+            value = getattr(self, key)
+            if value is not _Missing:
+                return value
+            raise KeyError(key)
+        return self.rest[key]
+
+    def __iter__(self):
+        for section in SECTION_RECORDS:
+            if getattr(self, section) is not _Missing:
+                yield section
+        yield from self.rest
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def compact_report(report):
+    """Validate a report and convert it to a CompactReport (raises ValueError for malformed reports)"""
+    if isinstance(report, CompactReport):
+        return report
+    if not isinstance(report, dict):
+        raise ValueError(f"Report must be an object, got {type(report).__name__}")
+    compact = CompactReport()
+    compact.rest = {}
+    texts = {}
+    for key, value in report.items():
+        if key not in SECTION_RECORDS:
+            compact.rest[key] = value
+    for section, record_class in SECTION_RECORDS.items():
+        items = report.get(section, _Missing)
+        if items is _Missing or items is None:
+            setattr(compact, section, _Missing if items is _Missing else None)
+            continue
+        if not isinstance(items, (list, tuple)):
+            raise ValueError(f"Report {section} must be a list, got {type(items).__name__}")
+        records = tuple(record_class.from_dict(item, texts) for item in items if isinstance(item, dict))
+        if len(records) != len(items):
+            print(f"Dropped {len(items) - len(records)} malformed {section} entries from report")
+        setattr(compact, section, records)
+    return compact
+
+
+def json_default(value):
+    """``default`` hook for JSON encoders: compact records and reports become plain objects"""
+    if isinstance(value, CompactMapping):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
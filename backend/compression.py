@@ -0,0 +1,140 @@
+"""
+Response compression and caching headers.
+
+- JSON (and other text) responses of at least ``COMPRESS_MIN_BYTES`` (default
+  1024) are compressed with the best encoding the client accepts: brotli when
+  the optional ``brotli`` package is installed, otherwise gzip. Streamed
+  responses (exports) and responses that already have an encoding are left
+  alone; strong ETags become weak, as the body bytes change with the encoding.
+- Results of finished jobs never change, so they are served with a long-lived
+  ``Cache-Control`` (``RESULT_CACHE_MAX_AGE``, default one year) and an ETag;
+  results of queued and running jobs are always revalidated.
+- The production frontend build (``FRONTEND_BUILD_DIR``, default
+  ``frontend/build``) is served with the ``.br``/``.gz`` files written by
+  ``npm run build`` (``frontend/scripts/precompress.js``); the hashed files
+  under ``static/`` are cached as immutable and ``index.html`` is revalidated.
+"""
+import gzip
+import mimetypes
+import os
+
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+RESULT_CACHE_MAX_AGE = int(os.getenv('RESULT_CACHE_MAX_AGE', str(365 * 24 * 3600)))
+
+# Fast levels: dynamic responses are compressed on every request
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_MIMETYPES = frozenset([
+    'application/json', 'application/xml', 'application/x-ndjson', 'text/html', 'text/csv', 'text/plain'
+])
+
+# Finished jobs whose records are never written again
+IMMUTABLE_STATUSES = ('completed', 'failed')
+
+# Precompressed variants of the frontend build, most preferred first
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(accept_encoding):
+    """Encodings the ``Accept-Encoding`` header allows, with their q-values"""
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding, available):
+    """Best of ``available`` (in preference order) the client accepts, or None"""
+    accepted = accepted_encodings(accept_encoding)
+    best = None
+    for encoding in available:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+
+def dynamic_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, accept_encoding):
+    """Compress a buffered text response in place when the client accepts it and it is worth it"""
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 206, 304) or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    encoding = choose_encoding(accept_encoding, dynamic_encodings())
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def cache_job_result(response, record):
+    """Long-lived caching for finished jobs' results; polls of unfinished jobs always revalidate"""
+    if record.get('status') in IMMUTABLE_STATUSES:
+        response.set_etag(f"{record['id']}-{record.get('completed_at') or ''}")
+        response.headers['Cache-Control'] = f'private, max-age={RESULT_CACHE_MAX_AGE}, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def static_file(build_dir, path, accept_encoding):
+    """``(file to send, mimetype, encoding, cache_control)`` for a frontend build path, or None
+
+    Unknown paths that do not look like files get ``index.html`` (client-side routes).
+    """
+    requested = safe_join(build_dir, path) if path else None
+    if requested is None or not os.path.isfile(requested):
+        if path and '.' in os.path.basename(path):
+            return None
+        requested = os.path.join(build_dir, 'index.html')
+        if not os.path.isfile(requested):
+            return None
+
+    mimetype = mimetypes.guess_type(requested)[0] or 'application/octet-stream'
+    # Files under static/ carry a content hash in their name, everything else may change on deploy
+    hashed = os.path.relpath(requested, build_dir).replace(os.sep, '/').startswith('static/')
+    cache_control = 'public, max-age=31536000, immutable' if hashed else 'no-cache'
+
+    variants = {encoding: requested + suffix for encoding, suffix in STATIC_ENCODINGS
+                if os.path.isfile(requested + suffix)}
+    encoding = choose_encoding(accept_encoding, [encoding for encoding, _ in STATIC_ENCODINGS if encoding in variants])
+    return (variants[encoding] if encoding else requested), mimetype, encoding, cache_control
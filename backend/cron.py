@@ -0,0 +1,137 @@
+"""
+Five-field cron expressions (minute hour day-of-month month day-of-week).
+
+Fields accept ``*``, numbers, ranges (``1-5``), steps (``*/15``, ``0-30/10``),
+lists (``1,15``) and month/weekday names (``jan``, ``mon``; 0 and 7 are
+Sunday). As in Vixie cron, when both day fields are restricted a day matching
+either one fires. ``@hourly``, ``@daily`` (``@midnight``), ``@weekly``,
+``@monthly`` and ``@yearly`` (``@annually``) are shorthands.
+
+Times are evaluated as wall-clock times in the expression's time zone: a time
+skipped by a DST change fires an hour later, a repeated one fires once.
+"""
+import calendar
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *'
+}
+
+MONTH_NAMES = {name.lower(): index for index, name in enumerate(calendar.month_abbr) if name}
+WEEKDAY_NAMES = {'sun': 0, 'mon': 1, 'tue': 2, 'wed': 3, 'thu': 4, 'fri': 5, 'sat': 6}
+
+# (name, lowest, highest, names) per field
+FIELDS = (
+    ('minute', 0, 59, {}),
+    ('hour', 0, 23, {}),
+    ('day of month', 1, 31, {}),
+    ('month', 1, 12, MONTH_NAMES),
+    ('day of week', 0, 7, WEEKDAY_NAMES)
+)
+
+# An expression that matches nothing (``0 0 30 2 *``) is given up on after this many years
+SEARCH_YEARS = 5
+
+
+def parse_value(text, names, field):
+    value = names.get(text.lower()) if names else None
+    if value is not None:
+        return value
+    if not text.isdigit():
+        raise ValueError(f"Invalid {field} value: {text}")
+    return int(text)
+
+
+def parse_field(text, field, lowest, highest, names):
+    """Set of values one field matches"""
+    values = set()
+    for part in text.split(','):
+        expression, slash, step_text = part.partition('/')
+        step = 1
+        if slash:
+            if not step_text.isdigit() or int(step_text) < 1:
+                raise ValueError(f"Invalid {field} step: {part}")
+            step = int(step_text)
+        if expression == '*':
+            start, end = lowest, highest
+        elif '-' in expression:
+            first, _, last = expression.partition('-')
+            start, end = parse_value(first, names, field), parse_value(last, names, field)
+        else:
+            start = parse_value(expression, names, field)
+            end = highest if slash else start
+        if not lowest <= start <= end <= highest:
+            raise ValueError(f"Invalid {field} range: {part} (allowed {lowest}-{highest})")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """A parsed cron expression evaluated in a time zone (UTC by default)"""
+
+    def __init__(self, expression, tz='UTC'):
+        self.expression = expression.strip()
+        text = MACROS.get(self.expression.lower(), self.expression)
+        parts = text.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(parts)}: {expression}")
+        try:
+            self.tz = ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone: {tz}")
+        self.timezone = tz
+        (self.minutes, self.hours, self.days, self.months, weekdays) = (
+            parse_field(part, *field) for part, field in zip(parts, FIELDS)
+        )
+        # 7 is Sunday too
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    def day_matches(self, moment):
+        in_month = moment.day in self.days
+        # datetime weekday(): Monday is 0; cron: Sunday is 0
+        in_week = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, timestamp):
+        """Epoch seconds of the first match strictly after ``timestamp``"""
+        moment = datetime.fromtimestamp(timestamp, self.tz).replace(tzinfo=None, second=0, microsecond=0)
+        moment += timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * SEARCH_YEARS)
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+                moment = datetime(year, month, 1)
+            elif not self.day_matches(moment):
+                moment = datetime(moment.year, moment.month, moment.day) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                fired = moment.replace(tzinfo=self.tz).timestamp()
+                if fired > timestamp:
+                    return fired
+                moment += timedelta(minutes=1)
+        raise ValueError(f"Cron expression never fires: {self.expression}")
+
+    def next_runs(self, timestamp, count):
+        runs = []
+        for _ in range(count):
+            timestamp = self.next_after(timestamp)
+            runs.append(timestamp)
+        return runs
+
+
+def isoformat(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp is not None else None
@@ -0,0 +1,73 @@
+"""
+End-to-end job deadlines.
+
+Every job gets a time budget: ``JOB_DEADLINE_SECONDS`` (default 300, 0 turns
+deadlines off) or the ``deadlineSeconds`` field of the start-testing payload.
+The clock starts when the job leaves the queue. Each stage takes its budget
+from what is left:
+
+- LLM calls use the remaining time (minus ``DEADLINE_PARSE_RESERVE_SECONDS``,
+  kept for parsing and scoring) as their HTTP timeout and retry window, and a
+  timer aborts a response stream that is still open when that budget runs out.
+  The text streamed so far is kept.
+- The parse cascade stops trying further strategies once the deadline passes.
+- Later stages (the browser call) are skipped when no budget is left.
+
+A job that hits its deadline completes with the best partial report it has,
+marked ``timed_out``, instead of running on.
+"""
+import math
+import os
+import threading
+import time
+
+DEFAULT_DEADLINE_SECONDS = 300.0
+
+# Slice of the budget the LLM calls leave for parsing and scoring their output
+PARSE_RESERVE_SECONDS = float(os.getenv('DEADLINE_PARSE_RESERVE_SECONDS', '1'))
+
+
+def deadline_seconds(value=None):
+    """Validated per-job deadline in seconds (None when deadlines are off)"""
+    if value is None:
+        value = os.getenv('JOB_DEADLINE_SECONDS', DEFAULT_DEADLINE_SECONDS)
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid deadline: {value} (expected a number of seconds)")
+    # NaN and infinity would pass the sign check, zero every stage's budget and break the JSON job records
+    if not math.isfinite(seconds):
+        raise ValueError(f"Invalid deadline: {value} (must be a finite number of seconds)")
+    if seconds < 0:
+        raise ValueError(f"Invalid deadline: {value} (must not be negative)")
+    return seconds or None
+
+
+class Deadline:
+    """A point in time (monotonic clock) that a job's stages must finish by"""
+
+    def __init__(self, seconds, expires_at=None):
+        self.seconds = seconds
+        self.expires_at = expires_at if expires_at is not None else time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def budget(self, cap):
+        """``cap`` seconds, or less if the deadline comes first"""
+        return min(cap, self.remaining())
+
+    def minus(self, seconds):
+        """A deadline ``seconds`` earlier, leaving that much time for the stages after it"""
+        return Deadline(self.seconds, self.expires_at - seconds)
+
+    def call_at_expiry(self, callback):
+        """Run ``callback`` on a timer thread when the deadline passes; returns a canceller"""
+        timer = threading.Timer(self.remaining(), callback)
+        timer.daemon = True
+        timer.start()
+        return timer.cancel
@@ -0,0 +1,165 @@
+"""
+Streaming report exporters (CSV, JSONL and JUnit XML).
+
+Every exporter is a generator over job records that yields small text chunks,
+so the Flask routes can stream them with chunked transfer encoding and a batch
+of hundreds of reports is exported one report at a time.
+"""
+import csv
+import io
+import json
+from xml.sax.saxutils import escape, quoteattr
+
+from scoring import derive_status
+
+
+SECTIONS = ('scenarios', 'defects_and_gaps', 'browser_compatibility_scenarios')
+
+CSV_COLUMNS = [
+    'test_id', 'url', 'section', 'id', 'title', 'category', 'feature', 'browser', 'platform',
+    'status', 'severity', 'priority', 'steps', 'expected_result', 'observed_result', 'description'
+]
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'junit': 'application/xml'
+}
+
+
+def parse_sections(value):
+    """Validate a comma separated ``sections`` parameter (all sections by default)"""
+    if not value:
+        return list(SECTIONS)
+    sections = [section.strip() for section in value.split(',') if section.strip()]
+    unknown = [section for section in sections if section not in SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(unknown)}")
+    return sections
+
+
+def flatten(value):
+    if isinstance(value, (list, tuple)):
+        return '; '.join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return '' if value is None else str(value)
+
+
+def item_status(section, item):
+    if section == 'scenarios':
+        return derive_status(item)
+    if section == 'defects_and_gaps':
+        return 'fail'
+    return str(item.get('status') or 'unknown').lower()
+
+
+def iter_items(records, sections):
+    """Yield (record, section, item) for every exported entry, one report at a time"""
+    for record in records:
+        if not record:
+            continue
+        report = record.get('report') or {}
+        for section in sections:
+            for item in report.get(section, []) or []:
+                yield record, section, item
+
+
+def export_csv(records, sections):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return chunk
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+    for record, section, item in iter_items(records, sections):
+        writer.writerow([
+            record['id'],
+            record['url'],
+            section,
+            flatten(item.get('id')),
+            flatten(item.get('title') or item.get('test_case')),
+            flatten(item.get('category') or item.get('type')),
+            flatten(item.get('feature')),
+            flatten(item.get('browser') or item.get('affected_browsers')),
+            flatten(item.get('platform') or item.get('affected_platforms')),
+            item_status(section, item),
+            flatten(item.get('severity')),
+            flatten(item.get('priority')),
+            flatten(item.get('steps')),
+            flatten(item.get('expected_result') or item.get('expected')),
+            flatten(item.get('observed_result') or item.get('observed')),
+            flatten(item.get('description'))
+        ])
+        yield flush()
+
+
+def export_jsonl(records, sections):
+    for record, section, item in iter_items(records, sections):
+        yield json.dumps({'test_id': record['id'], 'url': record['url'], 'section': section, **item}) + '\n'
+
+
+def junit_testcase(classname, section, item):
+    name = item.get('title') or item.get('test_case') or item.get('id') or 'Unnamed'
+    if item.get('id'):
+        name = f"{item['id']}: {name}"
+    status = item_status(section, item)
+    parts = [f'    <testcase classname={quoteattr(classname)} name={quoteattr(str(name))}>']
+
+    details = '\n'.join(
+        f"{label}: {flatten(item.get(key))}"
+        for label, key in (('Expected', 'expected_result'), ('Observed', 'observed_result'),
+                           ('Description', 'description'), ('Severity', 'severity'))
+        if item.get(key)
+    )
+    if status in ('fail', 'failed'):
+        message = flatten(item.get('observed_result') or item.get('description') or 'Failed')
+        parts.append(f'      <failure message={quoteattr(message[:200])} type={quoteattr(section)}>'
+                     f'{escape(details)}</failure>')
+    elif status not in ('pass', 'passed', 'warning'):
+        parts.append(f'      <skipped message={quoteattr("status: " + status)}/>')
+    if status == 'warning' and details:
+        parts.append(f'      <system-out>{escape(details)}</system-out>')
+    parts.append('    </testcase>')
+    return '\n'.join(parts) + '\n'
+
+
+def export_junit(records, sections):
+    """One <testsuite> per report section so CI systems can consume the results directly"""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n'
+    for record in records:
+        if not record:
+            continue
+        report = record.get('report') or {}
+        for section in sections:
+            items = report.get(section, []) or []
+            statuses = [item_status(section, item) for item in items]
+            failures = sum(1 for status in statuses if status in ('fail', 'failed'))
+            skipped = sum(1 for status in statuses if status not in ('pass', 'passed', 'warning', 'fail', 'failed'))
+            suite_name = f"{record['url']} [{section}]"
+            yield (f'  <testsuite name={quoteattr(suite_name)} id={quoteattr(record["id"])} '
+                   f'tests="{len(items)}" failures="{failures}" errors="0" skipped="{skipped}" '
+                   f'timestamp={quoteattr(record.get("completed_at") or record.get("created_at") or "")}>\n')
+            for item in items:
+                yield junit_testcase(f"{record['id']}.{section}", section, item)
+            yield '  </testsuite>\n'
+    yield '</testsuites>\n'
+
+
+EXPORTERS = {
+    'csv': export_csv,
+    'jsonl': export_jsonl,
+    'junit': export_junit
+}
+
+
+def export_records(records, export_format, sections):
+    """Return (generator, mimetype) for the requested format"""
+    if export_format not in EXPORTERS:
+        raise ValueError(f"Unsupported format: {export_format}")
+    return EXPORTERS[export_format](records, sections), EXPORT_FORMATS[export_format]
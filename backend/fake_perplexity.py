@@ -0,0 +1,332 @@
+"""
+Local OpenAI-compatible stand-in for the Perplexity API.
+
+    python fake_perplexity.py --port 8100 --latency 1.5 --jitter 0.5 \\
+        --tokens-per-second 400 --truncate-rate 0.1 --error-rate 0.05
+    PERPLEXITY_BASE_URL=http://localhost:8100 python app.py
+
+``POST /chat/completions`` is answered from the cassettes written by
+``LLM_MODE=record`` (matched by the same prompt hash as llm_transport.py).
+Requests without a cassette get a synthetic, well-formed analysis, browser
+compatibility, template delta or packed multi-page JSON unless ``--strict`` is
+set. Latency, token generation rate (also used for ``stream: true``
+responses), truncation and injected HTTP errors are configurable;
+``--model-speedup`` and ``--invalid-rate`` make smaller models faster and less
+reliable, to exercise model routing and escalation.
+``GET /stats`` reports what was served.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+from flask import Flask, Response, jsonify, request
+
+from llm_transport import DEFAULT_CASSETTE_DIR, load_cassette, prompt_key
+
+
+CHARS_PER_TOKEN = 4
+CATEGORIES = ['Functional', 'UI/UX', 'Security', 'Accessibility', 'Performance', 'Usability']
+SEVERITIES = ['Critical', 'High', 'Medium', 'Low']
+
+# What an unreliable model answers instead of the requested JSON
+INVALID_CONTENT = "I could not produce the requested JSON for this page. The page appears to load normally."
+
+
+def message_text(body):
+    return '\n'.join(str(message.get('content', '')) for message in body.get('messages', []))
+
+
+def synthetic_browser_scenarios(url, rng, count=5):
+    return [{
+        "id": f"BC-{index + 1:03d}",
+        "title": f"Cross-browser rendering check {index + 1}",
+        "test_case": "Verify the page renders and behaves consistently.",
+        "steps": [f"Open {url}", "Compare layout and interactions across browsers"],
+        "expected_result": "Consistent rendering across browsers",
+        "observed_result": rng.choice(["Consistent rendering across browsers", "Minor spacing differences in Safari"]),
+        "status": rng.choice(["pass", "pass", "warning", "fail"]),
+        "affected_browsers": rng.sample(["Chrome", "Firefox", "Safari", "Edge"], 2),
+        "affected_platforms": rng.sample(["Windows", "macOS", "Android", "iOS"], 1),
+        "severity": rng.choice(SEVERITIES)
+    } for index in range(count)]
+
+
+def synthetic_analysis(url, rng, scenario_count):
+    scenarios = []
+    for index in range(scenario_count):
+        failed = rng.random() < 0.3
+        scenarios.append({
+            "id": f"SCENARIO-{index + 1:03d}",
+            "title": f"Verify page behaviour {index + 1}",
+            "category": CATEGORIES[index % len(CATEGORIES)],
+            "steps": [f"Navigate to {url}", "Interact with the page element", "Observe the result"],
+            "expected_result": "The element responds as expected.",
+            "observed_result": "An error message is shown instead." if failed else "The element responds as expected.",
+            "status": "fail" if failed else "pass"
+        })
+    defects = [{
+        "id": f"BUG-{index + 1:03d}",
+        "title": f"Defect found in {scenario['title'].lower()}",
+        "description": "The observed result differs from the expected result.",
+        "severity": rng.choice(SEVERITIES),
+        "feature": scenario['category'],
+        "affected_browsers": "Chrome, Firefox",
+        "affected_platforms": "Windows"
+    } for index, scenario in enumerate(s for s in scenarios if s['status'] == 'fail')]
+    return {
+        "scenarios": scenarios,
+        "functional_observations": [f"Core navigation on {url} works."],
+        "non_functional_observations": {
+            "performance": ["Page load is acceptable."],
+            "security": ["HTTPS is enforced."],
+            "accessibility": ["Some images lack alt text."],
+            "usability": ["Navigation labels are clear."]
+        },
+        "defects_and_gaps": defects,
+        "recommendations": ["Add alt text to images", "Review error handling on forms"]
+    }
+
+
+def synthetic_content(body, rng, scenario_count):
+    """Well-formed JSON shaped like the analysis, browser compatibility, delta or packed responses"""
+    prompt = message_text(body)
+    url_match = re.search(r'https?://[^\s"\'<>]+', prompt)
+    url = url_match.group(0).rstrip('.,)') if url_match else 'https://example.com'
+
+    if '{"pages": {"P1"' in prompt:
+        # Packed pages: the requested scenario and browser scenario counts for every listed page
+        pages = re.findall(r'^\s*- (P\d+): (\S+)$', prompt, re.MULTILINE)
+        per_page = re.search(r'at least (\d+) scenarios per page', prompt)
+        browser_count = re.search(r'Add (\d+) `browser_compatibility_scenarios`', prompt)
+        return json.dumps({"pages": {key: {
+            **synthetic_analysis(page_url, rng, int(per_page.group(1)) if per_page else scenario_count),
+            "browser_compatibility_scenarios": synthetic_browser_scenarios(
+                page_url, rng, int(browser_count.group(1)) if browser_count else 3)
+        } for key, page_url in pages}}, indent=2)
+
+    if '"browser_compatibility_scenarios"' in prompt:
+        return json.dumps({"browser_compatibility_scenarios": synthetic_browser_scenarios(url, rng)}, indent=2)
+
+    if 'PAGE-001' in prompt:
+        # Template delta: a few page-specific scenarios and one changed shared scenario
+        page_scenarios = [{
+            "id": f"PAGE-{index + 1:03d}",
+            "title": f"Verify page-specific content {index + 1}",
+            "category": CATEGORIES[index % len(CATEGORIES)],
+            "steps": [f"Navigate to {url}", "Check the content specific to this page"],
+            "expected_result": "The content is shown correctly.",
+            "observed_result": "The content is shown correctly.",
+            "status": "pass"
+        } for index in range(max(1, scenario_count // 5))]
+        page_scenarios.append({"id": "SCENARIO-001", "observed_result": "An error message is shown instead.", "status": "fail"})
+        return json.dumps({"scenarios": page_scenarios, "defects_and_gaps": [{
+            "id": "PAGE-BUG-001",
+            "title": "Shared scenario fails on this page",
+            "description": "The observed result differs from the expected result.",
+            "severity": rng.choice(SEVERITIES),
+            "feature": CATEGORIES[0]
+        }]}, indent=2)
+
+    return json.dumps(synthetic_analysis(url, rng, scenario_count), indent=2)
+
+
+class FakeServerState:
+    """Counters shared by request threads"""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {
+            'requests': 0, 'cassette_hits': 0, 'synthetic': 0, 'errors': 0,
+            'truncated': 0, 'invalid': 0, 'streamed': 0, 'in_flight': 0, 'max_in_flight': 0, 'models': {}
+        }
+
+    def count(self, key, delta=1):
+        with self.lock:
+            self.stats[key] += delta
+            if key == 'in_flight':
+                self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+
+    def count_model(self, model):
+        with self.lock:
+            self.stats['models'][model] = self.stats['models'].get(model, 0) + 1
+
+    def draw(self, func, *args):
+        with self.lock:
+            return func(*args)
+
+
+def create_app(options):
+    app = Flask(__name__)
+    state = FakeServerState(options.seed)
+    app.config['FAKE_STATE'] = state
+
+    def speedup(body):
+        return options.model_speedup.get(body.get('model'), 1.0)
+
+    def first_token_delay(body):
+        if options.distribution == 'lognormal':
+            # Median of options.latency with a long right tail, like real API latencies
+            wait = options.latency * state.draw(state.rng.lognormvariate, 0.0, options.jitter)
+        else:
+            wait = max(0.0, options.latency + state.draw(state.rng.uniform, -options.jitter, options.jitter))
+        return wait / speedup(body)
+
+    def delay(body, tokens):
+        wait = first_token_delay(body)
+        if options.tokens_per_second > 0:
+            wait += tokens / (options.tokens_per_second * speedup(body))
+        return wait
+
+    def error_response():
+        status = state.draw(state.rng.choice, options.error_statuses)
+        state.count('errors')
+        time.sleep(max(0.0, options.latency) / 4)
+        headers = {'Retry-After': '1'} if status == 429 else {}
+        return jsonify({'error': {
+            'message': f'Injected error ({status})',
+            'type': 'rate_limit_error' if status == 429 else 'server_error',
+            'code': status
+        }}), status, headers
+
+    def completion_payload(body, content, finish_reason):
+        prompt_tokens = len(message_text(body)) // CHARS_PER_TOKEN
+        completion_tokens = len(content) // CHARS_PER_TOKEN
+        return {
+            'id': f'chatcmpl-{uuid.uuid4().hex}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'sonar-pro'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': finish_reason
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        }
+
+    def stream_chunks(body, payload):
+        """Server-sent events emitting options.chunk_tokens tokens at the configured rate"""
+        content = payload['choices'][0]['message']['content']
+        chunk_size = options.chunk_tokens * CHARS_PER_TOKEN
+        pause = options.chunk_tokens / (options.tokens_per_second * speedup(body)) if options.tokens_per_second > 0 else 0
+        base = {'id': payload['id'], 'object': 'chat.completion.chunk', 'created': payload['created'], 'model': payload['model']}
+
+        # Like real streaming APIs, send the response headers (here with an SSE comment)
+        # before the first token, so clients get a stream they can close while waiting
+        yield ": stream opened\n\n"
+        time.sleep(first_token_delay(body))
+        try:
+            for start in range(0, len(content), chunk_size):
+                delta = {'content': content[start:start + chunk_size]}
+                if start == 0:
+                    delta['role'] = 'assistant'
+                yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})}\n\n"
+                time.sleep(pause)
+            final = {**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': payload['choices'][0]['finish_reason']}],
+                     'usage': payload['usage']}
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            state.count('in_flight', -1)
+
+    @app.route('/chat/completions', methods=['POST'])
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        body = request.get_json(silent=True) or {}
+        state.count('requests')
+        state.count_model(body.get('model', 'sonar-pro'))
+
+        if state.draw(state.rng.random) < options.error_rate:
+            return error_response()
+
+        cassette = load_cassette(options.cassette_dir, prompt_key(body))
+        if cassette is not None:
+            state.count('cassette_hits')
+            content = cassette['response']['choices'][0]['message']['content']
+        elif options.strict:
+            return jsonify({'error': {'message': 'No cassette for this request', 'type': 'invalid_request_error'}}), 404
+        else:
+            state.count('synthetic')
+            content = state.draw(synthetic_content, body, state.rng, options.scenarios)
+
+        finish_reason = 'stop'
+        if state.draw(state.rng.random) < options.invalid_rate.get(body.get('model'), 0.0):
+            state.count('invalid')
+            content = INVALID_CONTENT
+        elif state.draw(state.rng.random) < options.truncate_rate:
+            state.count('truncated')
+            content = content[:int(len(content) * state.draw(state.rng.uniform, 0.3, 0.9))]
+            finish_reason = 'length'
+
+        payload = completion_payload(body, content, finish_reason)
+        state.count('in_flight')
+
+        if body.get('stream'):
+            state.count('streamed')
+            return Response(stream_chunks(body, payload), mimetype='text/event-stream')
+
+        try:
+            time.sleep(delay(body, payload['usage']['completion_tokens']))
+        finally:
+            state.count('in_flight', -1)
+        return jsonify(payload)
+
+    @app.route('/stats', methods=['GET'])
+    def stats():
+        with state.lock:
+            return jsonify({**state.stats, 'models': dict(state.stats['models'])})
+
+    @app.route('/health', methods=['GET'])
+    def health():
+        return jsonify({'status': 'healthy'})
+
+    return app
+
+
+def parse_model_values(value):
+    """``sonar=3,sonar-pro=1`` -> {'sonar': 3.0, 'sonar-pro': 1.0}"""
+    values = {}
+    for item in value.split(','):
+        model, _, number = item.partition('=')
+        values[model.strip()] = float(number)
+    return values
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAI-compatible fake Perplexity server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--cassette-dir', default=DEFAULT_CASSETTE_DIR)
+    parser.add_argument('--strict', action='store_true', help="404 for requests without a cassette instead of synthesizing one")
+    parser.add_argument('--scenarios', type=int, default=12, help="scenario count of synthetic analysis responses")
+    parser.add_argument('--latency', type=float, default=1.0, help="seconds before the first token")
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help="uniform +/- jitter on the latency, or the sigma of the lognormal distribution")
+    parser.add_argument('--distribution', choices=['uniform', 'lognormal'], default='uniform')
+    parser.add_argument('--tokens-per-second', type=float, default=0.0, help="generation rate; 0 returns the whole body at once")
+    parser.add_argument('--chunk-tokens', type=int, default=8, help="tokens per streamed chunk")
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help="share of responses cut off with finish_reason=length")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with an injected error")
+    parser.add_argument('--error-statuses', type=lambda value: [int(item) for item in value.split(',')],
+                        default=[429, 500, 503])
+    parser.add_argument('--model-speedup', type=parse_model_values, default={},
+                        help="latency divisor and token-rate multiplier per model, e.g. sonar=3")
+    parser.add_argument('--invalid-rate', type=parse_model_values, default={},
+                        help="share of responses per model that are prose instead of JSON, e.g. sonar=0.2")
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    options = parse_args()
+    print(f"Fake Perplexity listening on http://{options.host}:{options.port} (cassettes: {options.cassette_dir})")
+    create_app(options).run(host=options.host, port=options.port, threaded=True)
@@ -0,0 +1,14 @@
+"""
+gunicorn settings picked up automatically when gunicorn runs from backend/
+(``gunicorn -w 4 -b 0.0.0.0:5000 app:app``).
+"""
+
+
+def post_worker_init(worker):
+    # Every worker process has its own LLM client; open its keep-alive connections right away
+    from app import prewarm_llm_pool, start_schedule_runner, start_webhook_dispatcher
+    prewarm_llm_pool()
+    # Runners of several workers share the schedule database and claim each run once
+    start_schedule_runner()
+    # Deliver webhooks left in the outbox by earlier processes
+    start_webhook_dispatcher()
@@ -0,0 +1,140 @@
+"""
+Hedged LLM requests for tail latency.
+
+A hedged call fires a duplicate request when the first one has not produced a
+token (streamed calls) or a response (non-streamed async calls) by the
+``LLM_HEDGE_PERCENTILE`` (default 95) of that call's recent latencies. The
+first attempt to finish wins and the other is aborted.
+
+    LLM_HEDGE_CALLS=llm.browser    span names of the calls to hedge (default: none)
+    LLM_HEDGE_PERCENTILE=95        latency percentile that triggers the hedge
+    LLM_HEDGE_MIN_SAMPLES=20       observed latencies needed before hedging starts
+    LLM_HEDGE_BUDGET=0.05          hedges allowed per hedgeable call, across all calls
+
+The budget is a token bucket shared by every hedged call: each call adds
+``LLM_HEDGE_BUDGET`` tokens (up to ``HEDGE_BURST``) and each hedge spends one,
+so duplicates stay within that share of the traffic (plus the burst) even
+when the provider is slow across the board.
+"""
+import math
+import os
+import threading
+from collections import deque
+
+# Latency samples kept per call
+LATENCY_SAMPLES = 500
+
+# Hedges the budget can save up while traffic is fast
+HEDGE_BURST = 10.0
+
+
+def parse_calls(value):
+    """``llm.browser,llm.main`` -> ['llm.browser', 'llm.main']"""
+    return [call.strip() for call in (value or '').split(',') if call.strip()]
+
+
+class HedgeBudget:
+    """Token bucket capping hedges at ``ratio`` of the hedgeable calls"""
+
+    def __init__(self, ratio, burst=HEDGE_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self):
+        with self._lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            self.denied += 1
+            return False
+
+    def snapshot(self):
+        with self._lock:
+            return {'ratio': self.ratio, 'tokens': round(self.tokens, 2), 'denied': self.denied}
+
+
+class Hedger:
+    """Latency history, hedge trigger and win counters of one call (e.g. ``llm.browser``)"""
+
+    def __init__(self, name, budget, percentile=95.0, min_samples=20):
+        self.name = name
+        self.budget = budget
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.latencies = {}
+        self.calls = 0
+        self.hedged = 0
+        self.wins = {'primary': 0, 'hedge': 0}
+        self._lock = threading.Lock()
+
+    def observe(self, kind, seconds):
+        """Record the latency of one attempt; ``kind`` separates first-token from full-response timings"""
+        with self._lock:
+            self.latencies.setdefault(kind, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+
+    def delay(self, kind):
+        """Seconds to wait before hedging, or None until enough latencies are known"""
+        with self._lock:
+            samples = sorted(self.latencies.get(kind, ()))
+        if not samples or len(samples) < self.min_samples:
+            return None
+        return samples[max(1, math.ceil(self.percentile / 100 * len(samples))) - 1]
+
+    def start_call(self):
+        self.budget.deposit()
+        with self._lock:
+            self.calls += 1
+
+    def try_hedge(self):
+        if not self.budget.try_spend():
+            return False
+        with self._lock:
+            self.hedged += 1
+        return True
+
+    def record_winner(self, winner):
+        with self._lock:
+            self.wins[winner] += 1
+
+    def snapshot(self):
+        with self._lock:
+            decided = self.wins['primary'] + self.wins['hedge']
+            stats = {
+                'calls': self.calls,
+                'hedged': self.hedged,
+                'hedge_rate': round(self.hedged / self.calls, 4) if self.calls else None,
+                'primary_wins': self.wins['primary'],
+                'hedge_wins': self.wins['hedge'],
+                'hedge_win_rate': round(self.wins['hedge'] / decided, 4) if decided else None
+            }
+        stats['delay_seconds'] = {kind: round(value, 3) for kind in list(self.latencies)
+                                  if (value := self.delay(kind)) is not None}
+        return stats
+
+
+class HedgePolicy:
+    """The hedgers of the configured calls, sharing one budget"""
+
+    def __init__(self, calls=None, percentile=None, min_samples=None, budget_ratio=None):
+        calls = calls if calls is not None else parse_calls(os.getenv('LLM_HEDGE_CALLS'))
+        percentile = percentile if percentile is not None else float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+        min_samples = min_samples if min_samples is not None else int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+        budget_ratio = budget_ratio if budget_ratio is not None else float(os.getenv('LLM_HEDGE_BUDGET', '0.05'))
+        self.budget = HedgeBudget(budget_ratio)
+        self.hedgers = {call: Hedger(call, self.budget, percentile, min_samples) for call in calls}
+
+    def get(self, call):
+        return self.hedgers.get(call)
+
+    def metrics(self):
+        return {
+            'budget': self.budget.snapshot(),
+            'calls': {name: hedger.snapshot() for name, hedger in self.hedgers.items()}
+        }
@@ -0,0 +1,280 @@
+"""
+Job storage shared by the API tier and the standalone job workers.
+
+The default in-memory store keeps the original single-process behaviour. The
+SQLite store lets several gunicorn workers and ``worker.py`` processes see the
+same jobs: the API enqueues, workers claim and update, any API worker can
+answer a poll.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from compact_reports import compact_report, compact_reports_enabled
+from scheduler import CLOCK, DEFAULT_OWNER, DEFAULT_PRIORITY, PRIORITY_CLASSES, SchedulerPolicy, wait_summary, WAIT_SAMPLES
+
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(BACKEND_DIR, 'data', 'jobs.db')
+
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+def status_is_final(job, fields):
+    """Finished jobs keep their status, so a cancel racing completion (or late
+    updates from a cancelled job that is still unwinding) cannot flip it"""
+    return job.get('status') in TERMINAL_STATUSES and fields.get('status', job['status']) != job['status']
+
+
+def connect_sqlite(path):
+    """Open a SQLite connection tuned for several processes sharing one file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=30000')
+    return conn
+
+
+class MemoryJobStore:
+    """Jobs kept in process memory; workers are threads of the API process.
+
+    Reports are validated and stored as compact records (see compact_reports.py)
+    unless ``COMPACT_REPORTS=0``.
+    """
+
+    dispatches_in_process = True
+
+    def __init__(self, jobs=None, compact=None):
+        self.jobs = jobs if jobs is not None else {}
+        self.compact = compact_reports_enabled() if compact is None else compact
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        if self.compact and job.get('report'):
+            job = {**job, 'report': compact_report(job['report'])}
+        with self._lock:
+            self.jobs[job['id']] = job
+
+    def get(self, test_id):
+        return self.jobs.get(test_id)
+
+    def update(self, test_id, **fields):
+        if self.compact and fields.get('report'):
+            fields['report'] = compact_report(fields['report'])
+        with self._lock:
+            job = self.jobs.get(test_id)
+            if job is not None and not status_is_final(job, fields):
+                job.update(fields)
+
+    def list(self):
+        return list(self.jobs.values())
+
+
+class SQLiteJobStore:
+    """Jobs persisted in SQLite and claimed by standalone workers"""
+
+    dispatches_in_process = False
+
+    def __init__(self, path=None, lease_seconds=None, policy=None):
+        self.path = path or os.getenv('JOB_STORE_PATH', DEFAULT_DB_PATH)
+        self.lease_seconds = lease_seconds or float(os.getenv('JOB_LEASE_SECONDS', '900'))
+        self.policy = policy or SchedulerPolicy()
+        self._local = threading.local()
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                worker_id TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                data TEXT NOT NULL
+            )
+        ''')
+        # Scheduling columns were added later; older databases get them in place
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(jobs)')}
+        for column, definition in (
+            ('priority', f"TEXT NOT NULL DEFAULT '{DEFAULT_PRIORITY}'"),
+            ('owner', f"TEXT NOT NULL DEFAULT '{DEFAULT_OWNER}'"),
+            ('claimed_at', 'REAL'),
+            ('queue_wait', 'REAL'),
+        ):
+            if column not in columns:
+                self.conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} {definition}')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS jobs_state_created ON jobs (state, created_at)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS jobs_state_owner_priority ON jobs (state, owner, priority, created_at)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS jobs_claimed_at ON jobs (claimed_at)')
+        # Stride passes of the fair scheduler, shared by every worker process
+        self.conn.execute('CREATE TABLE IF NOT EXISTS scheduler_passes (owner TEXT PRIMARY KEY, pass REAL NOT NULL)')
+
+    @property
+    def conn(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect_sqlite(self.path)
+            self._local.conn = conn
+        return conn
+
+    def create(self, job):
+        now = time.time()
+        self.conn.execute(
+            'INSERT INTO jobs (id, state, worker_id, created_at, updated_at, data, priority, owner) VALUES (?, ?, NULL, ?, ?, ?, ?, ?)',
+            (job['id'], 'queued', now, now, json.dumps(job),
+             job.get('priority', DEFAULT_PRIORITY), job.get('owner', DEFAULT_OWNER))
+        )
+
+    def get(self, test_id):
+        row = self.conn.execute('SELECT data FROM jobs WHERE id = ?', (test_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, test_id, **fields):
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT data, state FROM jobs WHERE id = ?', (test_id,)).fetchone()
+            if not row:
+                conn.execute('COMMIT')
+                return
+            job = json.loads(row[0])
+            if status_is_final(job, fields):
+                conn.execute('COMMIT')
+                return
+            job.update(fields)
+            state = 'finished' if job.get('status') in TERMINAL_STATUSES else row[1]
+            conn.execute(
+                'UPDATE jobs SET data = ?, state = ?, updated_at = ? WHERE id = ?',
+                (json.dumps(job), state, time.time(), test_id)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def list(self):
+        rows = self.conn.execute('SELECT data FROM jobs ORDER BY created_at').fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def claim_next(self, worker_id):
+        """Atomically claim the next queued job by the scheduler policy (expired leases first)"""
+        conn = self.conn
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                """SELECT id, data FROM jobs WHERE state = 'claimed' AND updated_at < ?
+                   ORDER BY created_at LIMIT 1""",
+                (now - self.lease_seconds,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET worker_id = ?, updated_at = ? WHERE id = ?",
+                    (worker_id, now, row[0])
+                )
+                conn.execute('COMMIT')
+                return json.loads(row[1])
+
+            # Oldest queued job of every (priority, owner) queue; SQLite returns the MIN row's columns
+            heads = [
+                (job_id, priority, owner, created_at)
+                for job_id, priority, owner, created_at in conn.execute(
+                    """SELECT id, priority, owner, MIN(created_at) FROM jobs
+                       WHERE state = 'queued' GROUP BY priority, owner"""
+                )
+            ]
+            if not heads:
+                conn.execute('COMMIT')
+                return None
+            owners = sorted({head[2] for head in heads} | {CLOCK})
+            passes = dict(conn.execute(
+                f"SELECT owner, pass FROM scheduler_passes WHERE owner IN ({','.join('?' * len(owners))})", owners
+            ))
+            head, updates = self.policy.select(heads, passes, now)
+            job_id, _, _, created_at = head
+            conn.executemany(
+                'INSERT OR REPLACE INTO scheduler_passes (owner, pass) VALUES (?, ?)', list(updates.items())
+            )
+            conn.execute(
+                "DELETE FROM scheduler_passes WHERE owner != ? AND pass <= ? AND owner NOT IN "
+                "(SELECT DISTINCT owner FROM jobs WHERE state = 'queued')",
+                (CLOCK, updates[CLOCK])
+            )
+
+            queue_wait = max(0.0, now - created_at)
+            job = json.loads(conn.execute('SELECT data FROM jobs WHERE id = ?', (job_id,)).fetchone()[0])
+            job['queue_wait_seconds'] = round(queue_wait, 3)
+            conn.execute(
+                """UPDATE jobs SET state = 'claimed', worker_id = ?, updated_at = ?, claimed_at = ?,
+                   queue_wait = ?, data = ? WHERE id = ?""",
+                (worker_id, now, now, queue_wait, json.dumps(job), job_id)
+            )
+            conn.execute('COMMIT')
+            return job
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def cancelled_ids(self, test_ids):
+        """The IDs among ``test_ids`` whose jobs were cancelled (polled by worker.py)"""
+        test_ids = list(test_ids)
+        if not test_ids:
+            return set()
+        rows = self.conn.execute(
+            f"""SELECT id FROM jobs WHERE id IN ({','.join('?' * len(test_ids))})
+                AND json_extract(data, '$.status') = 'cancelled'""",
+            test_ids
+        )
+        return {row[0] for row in rows}
+
+    def scheduler_metrics(self):
+        """Queue depth and queue-wait percentiles per priority class, in the JobDispatcher.metrics shape"""
+        conn = self.conn
+        classes = {}
+        for priority in PRIORITY_CLASSES:
+            queued = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND priority = ?", (priority,)
+            ).fetchone()[0]
+            dispatched, aged = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(queue_wait >= ?), 0) FROM jobs WHERE claimed_at IS NOT NULL AND priority = ?',
+                (self.policy.aging_seconds, priority)
+            ).fetchone()
+            waits = [row[0] for row in conn.execute(
+                'SELECT queue_wait FROM jobs WHERE claimed_at IS NOT NULL AND priority = ? ORDER BY claimed_at DESC LIMIT ?',
+                (priority, WAIT_SAMPLES)
+            )]
+            classes[priority] = {
+                'queued': queued,
+                'dispatched': dispatched,
+                'aged': aged if priority == 'batch' else 0,
+                'queue_wait_seconds': wait_summary(waits)
+            }
+        owners = {}
+        for owner, state, count in conn.execute(
+            "SELECT owner, state, COUNT(*) FROM jobs WHERE state IN ('queued', 'claimed') GROUP BY owner, state"
+        ):
+            owners.setdefault(owner, {'queued': 0, 'running': 0})['queued' if state == 'queued' else 'running'] = count
+        return {
+            'policy': {**self.policy.describe(), 'concurrency': None},
+            'running': sum(owner['running'] for owner in owners.values()),
+            'classes': classes,
+            'owners': owners
+        }
+
+
+def create_job_store(memory_jobs=None):
+    """Build the store selected by JOB_STORE (``memory`` or ``sqlite``)"""
+    backend = os.getenv('JOB_STORE', 'memory').lower()
+    if backend == 'sqlite':
+        return SQLiteJobStore()
+    if backend != 'memory':
+        raise ValueError(f"Unknown JOB_STORE backend: {backend}")
+    return MemoryJobStore(memory_jobs)
+
+
+def new_worker_id():
+    return f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
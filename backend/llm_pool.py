@@ -0,0 +1,200 @@
+"""
+Shared, tuned HTTP connection pool for the Perplexity clients.
+
+The OpenAI client's default pool keeps at most 20 idle connections for 5
+seconds, so with many job threads connections are closed between calls and
+every call risks a new TCP and TLS handshake. The clients are built on an
+explicitly sized transport instead:
+
+    LLM_POOL_MAX_CONNECTIONS=64      default: 2 per job slot (main + browser call, or a hedge), at most 256
+    LLM_POOL_MAX_KEEPALIVE=64        idle connections kept (default: all of them)
+    LLM_POOL_KEEPALIVE_SECONDS=60    how long an idle connection is kept open
+    LLM_POOL_PREWARM=4               connections opened when a server or worker starts (0 turns it off)
+
+The transport traces every request (httpcore ``trace`` extension) to count
+new connections and TLS handshakes and to time how long requests waited for a
+free connection; with the pool's active and idle connections these are
+reported under ``llm_pool`` in ``/api/metrics``.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+import httpx
+
+from scheduler import wait_summary
+
+MAX_DEFAULT_CONNECTIONS = 256
+
+# A request that took longer than this to get a connection counts as a wait
+POOL_WAIT_THRESHOLD_SECONDS = 0.005
+
+# Pool-wait samples kept
+WAIT_SAMPLES = 1000
+
+
+def pool_limits(concurrency):
+    """Pool limits for ``concurrency`` job slots, overridable from the environment"""
+    default_connections = min(MAX_DEFAULT_CONNECTIONS, max(2, 2 * concurrency))
+    max_connections = int(os.getenv('LLM_POOL_MAX_CONNECTIONS', str(default_connections)))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=int(os.getenv('LLM_POOL_MAX_KEEPALIVE', str(max_connections))),
+        keepalive_expiry=float(os.getenv('LLM_POOL_KEEPALIVE_SECONDS', '60'))
+    )
+
+
+def prewarm_count():
+    return int(os.getenv('LLM_POOL_PREWARM', '4'))
+
+
+class PoolStats:
+    """Connection counters of one transport"""
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.waits = 0
+        self.wait_seconds = deque(maxlen=WAIT_SAMPLES)
+        self._lock = threading.Lock()
+
+    def record(self, waited, new_connection, tls):
+        with self._lock:
+            self.requests += 1
+            self.new_connections += new_connection
+            self.tls_handshakes += tls
+            if waited is not None:
+                self.wait_seconds.append(waited)
+                if waited > POOL_WAIT_THRESHOLD_SECONDS:
+                    self.waits += 1
+
+    def snapshot(self, connections):
+        with self._lock:
+            stats = {
+                'max_connections': self.limits.max_connections,
+                'max_keepalive_connections': self.limits.max_keepalive_connections,
+                'keepalive_seconds': self.limits.keepalive_expiry,
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'tls_handshakes': self.tls_handshakes,
+                'reuse_rate': round(1 - self.new_connections / self.requests, 4) if self.requests else None,
+                'waits': self.waits,
+                'wait_seconds': wait_summary(self.wait_seconds)
+            }
+        if connections is not None:
+            idle = sum(1 for connection in connections if connection.is_idle())
+            stats['active'] = len(connections) - idle
+            stats['idle'] = idle
+        return stats
+
+
+class RequestTrace:
+    """httpcore trace callback of one request: connection setup and time to get a connection"""
+
+    def __init__(self, chained=None):
+        self.chained = chained
+        self.started = time.perf_counter()
+        self.assigned = None
+        self.new_connection = False
+        self.tls = False
+
+    def event(self, name):
+        # The first connection-level event happens once the pool handed out a connection
+        if self.assigned is None:
+            self.assigned = time.perf_counter()
+        if name == 'connection.connect_tcp.complete':
+            self.new_connection = True
+        elif name == 'connection.start_tls.complete':
+            self.tls = True
+
+    def __call__(self, name, info):
+        self.event(name)
+        if self.chained is not None:
+            self.chained(name, info)
+
+    async def async_trace(self, name, info):
+        self.event(name)
+        if self.chained is not None:
+            await self.chained(name, info)
+
+    def waited(self):
+        return self.assigned - self.started if self.assigned is not None else None
+
+
+def pool_connections(transport):
+    """Connections of the transport's httpcore pool (None if the pool is not reachable)"""
+    return getattr(getattr(transport, '_pool', None), 'connections', None)
+
+
+class PooledTransport(httpx.HTTPTransport):
+    def __init__(self, limits, **kwargs):
+        super().__init__(limits=limits, **kwargs)
+        self.stats = PoolStats(limits)
+
+    def handle_request(self, request):
+        trace = RequestTrace(request.extensions.get('trace'))
+        request.extensions['trace'] = trace
+        try:
+            return super().handle_request(request)
+        finally:
+            self.stats.record(trace.waited(), trace.new_connection, trace.tls)
+
+    def snapshot(self):
+        return self.stats.snapshot(pool_connections(self))
+
+
+class AsyncPooledTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, limits, **kwargs):
+        super().__init__(limits=limits, **kwargs)
+        self.stats = PoolStats(limits)
+
+    async def handle_async_request(self, request):
+        trace = RequestTrace(request.extensions.get('trace'))
+        request.extensions['trace'] = trace.async_trace
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            self.stats.record(trace.waited(), trace.new_connection, trace.tls)
+
+    def snapshot(self):
+        return self.stats.snapshot(pool_connections(self))
+
+
+def build_http_client(concurrency):
+    """httpx client for the OpenAI client, with a pool sized for ``concurrency`` job slots"""
+    transport = PooledTransport(pool_limits(concurrency))
+    return httpx.Client(transport=transport, follow_redirects=True), transport
+
+
+def build_async_http_client(concurrency):
+    transport = AsyncPooledTransport(pool_limits(concurrency))
+    return httpx.AsyncClient(transport=transport, follow_redirects=True), transport
+
+
+def prewarm(http_client, url, count):
+    """Open up to ``count`` keep-alive connections at once (any HTTP status will do)"""
+    def touch():
+        try:
+            http_client.head(url, timeout=10)
+        except httpx.HTTPError as e:
+            print(f"LLM connection prewarm failed: {str(e)}")
+
+    threads = [threading.Thread(target=touch, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+async def prewarm_async(http_client, url, count):
+    async def touch():
+        try:
+            await http_client.head(url, timeout=10)
+        except httpx.HTTPError as e:
+            print(f"LLM connection prewarm failed: {str(e)}")
+
+    await asyncio.gather(*(touch() for _ in range(count)))
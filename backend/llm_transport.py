@@ -0,0 +1,402 @@
+"""
+Pluggable LLM transport with live, record and replay modes.
+
+    LLM_MODE=live     call Perplexity (default)
+    LLM_MODE=record   call Perplexity and save every request/response pair as a cassette
+    LLM_MODE=replay   answer from cassettes only, never touching the network
+
+Cassettes are JSON files in ``LLM_CASSETTE_DIR`` (default ``backend/cassettes``)
+named after a SHA-256 hash of the prompt-defining request fields, so the same
+analysis request always maps to the same file. ``fake_perplexity.py`` serves
+the same cassettes over an OpenAI-compatible HTTP API.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from datetime import datetime
+
+from cancellation import CancelToken
+from hedging import HedgePolicy
+from job_store import BACKEND_DIR
+
+
+DEFAULT_CASSETTE_DIR = os.path.join(BACKEND_DIR, 'cassettes')
+
+LLM_MODES = ('live', 'record', 'replay')
+
+# Request fields that determine the completion; transport options (timeouts, streaming) are not part of the key
+KEY_FIELDS = ('model', 'messages', 'temperature', 'top_p', 'max_tokens')
+
+
+class CassetteNotFound(Exception):
+    """Raised in replay mode when no cassette was recorded for a request"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before a response arrives"""
+
+
+def prompt_key(request_kwargs):
+    """Stable SHA-256 of the prompt-defining fields of a chat completion request"""
+    payload = {field: request_kwargs.get(field) for field in KEY_FIELDS}
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def cassette_path(cassette_dir, key):
+    return os.path.join(cassette_dir, f'{key}.json')
+
+
+def load_cassette(cassette_dir, key):
+    try:
+        with open(cassette_path(cassette_dir, key), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_cassette(cassette_dir, key, request_kwargs, response):
+    os.makedirs(cassette_dir, exist_ok=True)
+    path = cassette_path(cassette_dir, key)
+    temp_path = f'{path}.tmp{threading.get_ident()}'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'key': key,
+            'recorded_at': datetime.now().isoformat(),
+            'request': {field: request_kwargs.get(field) for field in KEY_FIELDS},
+            'response': response
+        }, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def retry_delay(attempt):
+    """Exponential backoff with jitter, the same schedule the openai client uses"""
+    return min(0.5 * 2 ** attempt, 8.0) * (1 - 0.25 * random.random())
+
+
+def abort_stream(stream):
+    """Close a streamed response from another thread.
+
+    Closing alone does not wake a thread blocked reading the socket, so the
+    socket is shut down first and the reader fails immediately.
+    """
+    network_stream = stream.response.extensions.get('network_stream')
+    sock = network_stream.get_extra_info('socket') if network_stream is not None else None
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    stream.close()
+
+
+class CompletionResult:
+    """Text and accounting for one completion, independent of where it came from"""
+
+    __slots__ = ('text', 'usage', 'retries', 'cassette', 'timed_out', 'hedge')
+
+    def __init__(self, text, usage=None, retries=0, cassette=None, timed_out=False):
+        self.text = text
+        self.usage = usage or {}
+        self.retries = retries
+        self.cassette = cassette
+        self.timed_out = timed_out
+        # Winning attempt ('primary' or 'hedge') of a call that was hedged
+        self.hedge = None
+
+    @classmethod
+    def from_response(cls, response, retries=0, cassette=None, timed_out=False):
+        """Build from a completion dict (``model_dump()`` output or a cassette's response)"""
+        usage = response.get('usage') or {}
+        return cls(
+            response['choices'][0]['message']['content'],
+            {key: usage.get(key) for key in ('prompt_tokens', 'completion_tokens', 'total_tokens') if key in usage},
+            retries,
+            cassette,
+            timed_out
+        )
+
+    def span_attributes(self):
+        """Token usage and retry count for timeline spans"""
+        attributes = {'retry_count': self.retries, **self.usage}
+        if self.cassette:
+            attributes['cassette'] = self.cassette[:12]
+        if self.timed_out:
+            attributes['timed_out'] = True
+        if self.hedge:
+            attributes['hedge_winner'] = self.hedge
+        return attributes
+
+
+class LLMTransport:
+    """Runs chat completions according to LLM_MODE"""
+
+    def __init__(self, get_client, get_async_client, mode=None, cassette_dir=None, max_retries=None, hedging=None):
+        self.get_client = get_client
+        self.get_async_client = get_async_client
+        self.mode = (mode or os.getenv('LLM_MODE', 'live')).lower()
+        if self.mode not in LLM_MODES:
+            raise ValueError(f"Unknown LLM_MODE: {self.mode} (expected one of {', '.join(LLM_MODES)})")
+        self.cassette_dir = cassette_dir or os.getenv('LLM_CASSETTE_DIR', DEFAULT_CASSETTE_DIR)
+        # Retries of calls that run under a deadline (others keep the client's own retry policy)
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('LLM_MAX_RETRIES', '2'))
+        # Calls that fire a duplicate request when slow (LLM_HEDGE_CALLS, see hedging.py)
+        self.hedging = hedging or HedgePolicy()
+
+    def replay(self, request_kwargs):
+        key = prompt_key(request_kwargs)
+        cassette = load_cassette(self.cassette_dir, key)
+        if cassette is None:
+            raise CassetteNotFound(f"No cassette {key} in {self.cassette_dir}; record it with LLM_MODE=record")
+        return CompletionResult.from_response(cassette['response'], cassette=key)
+
+    def finish(self, request_kwargs, payload, retries, timed_out=False):
+        key = None
+        # A response cut off by its deadline is not what the prompt produces; never record it
+        if self.mode == 'record' and not timed_out:
+            key = prompt_key(request_kwargs)
+            save_cassette(self.cassette_dir, key, request_kwargs, payload)
+        return CompletionResult.from_response(payload, retries, key, timed_out)
+
+    def retry_after(self, error, attempt, deadline):
+        """Backoff before the next attempt of a call under a deadline, or None to stop retrying"""
+        from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+        if isinstance(error, APITimeoutError) or deadline.expired:
+            raise DeadlineExceeded(f"Deadline passed after {attempt + 1} attempt(s)") from error
+        if not isinstance(error, (APIConnectionError, InternalServerError, RateLimitError)) or attempt >= self.max_retries:
+            return None
+        delay = retry_delay(attempt)
+        if delay >= deadline.remaining():
+            raise DeadlineExceeded(f"No time left to retry after {attempt + 1} attempt(s)") from error
+        return delay
+
+    def create(self, request_kwargs, cancel=None, deadline=None, **options):
+        """Send a request and return ``(raw_response, retries)``.
+
+        Under a deadline every attempt's timeout is the time left, and the
+        transport retries itself only while the backoff still fits.
+        """
+        client = self.get_client()
+        if deadline is None:
+            raw_response = client.chat.completions.with_raw_response.create(**request_kwargs, **options)
+            return raw_response, getattr(raw_response, 'retries_taken', 0)
+        attempt = 0
+        while True:
+            if deadline.expired:
+                raise DeadlineExceeded(f"Deadline passed after {attempt} attempt(s)")
+            bounded = client.with_options(timeout=deadline.remaining(), max_retries=0)
+            try:
+                return bounded.chat.completions.with_raw_response.create(**request_kwargs, **options), attempt
+            except Exception as e:
+                delay = self.retry_after(e, attempt, deadline)
+                if delay is None:
+                    raise
+            if cancel is not None:
+                cancel.wait(delay)
+                cancel.raise_if_cancelled()
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    def complete(self, request_kwargs, cancel=None, deadline=None, call=None):
+        """Run a completion; with a CancelToken the response is streamed so cancelling closes the connection.
+
+        Under a ``Deadline`` the call never runs past it: the result is marked
+        ``timed_out`` and carries whatever text was streamed until then.
+        ``call`` names the call (its span name) for hedging.
+        """
+        if self.mode == 'replay':
+            return self.replay(request_kwargs)
+        hedger = self.hedging.get(call)
+        try:
+            if hedger is not None:
+                return self.complete_hedged(request_kwargs, cancel or CancelToken(), deadline, hedger)
+            if cancel is not None:
+                return self.complete_streaming(request_kwargs, cancel, deadline)
+            raw_response, retries = self.create(request_kwargs, deadline=deadline)
+        except DeadlineExceeded as e:
+            print(f"LLM call timed out: {str(e)}")
+            return CompletionResult('', timed_out=True)
+        return self.finish(request_kwargs, raw_response.parse().model_dump(), retries)
+
+    def complete_streaming(self, request_kwargs, cancel, deadline=None, on_first_token=None):
+        cancel.raise_if_cancelled()
+        raw_response, retries = self.create(request_kwargs, cancel, deadline, stream=True)
+        stream = raw_response.parse()
+        remove_callback = cancel.add_callback(lambda: abort_stream(stream))
+        stop_timer = deadline.call_at_expiry(lambda: abort_stream(stream)) if deadline is not None else None
+        parts = []
+        payload = {'object': 'chat.completion', 'usage': None}
+        finish_reason = None
+        timed_out = False
+        try:
+            for chunk in stream:
+                if on_first_token is not None and 'id' not in payload:
+                    on_first_token()
+                payload.setdefault('id', chunk.id)
+                payload.setdefault('model', chunk.model)
+                payload.setdefault('created', chunk.created)
+                if chunk.usage is not None:
+                    payload['usage'] = chunk.usage.model_dump()
+                for choice in chunk.choices:
+                    if choice.delta.content:
+                        parts.append(choice.delta.content)
+                    finish_reason = choice.finish_reason or finish_reason
+        except Exception:
+            # Aborting the stream from the cancelling (or deadline timer) thread surfaces here as a read error
+            cancel.raise_if_cancelled()
+            if deadline is None or not deadline.expired:
+                raise
+            timed_out = True
+        finally:
+            remove_callback()
+            if stop_timer is not None:
+                stop_timer()
+            stream.close()
+        cancel.raise_if_cancelled()
+
+        # Same shape as a non-streamed model_dump(), so cassettes do not depend on the mode
+        payload['choices'] = [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': ''.join(parts)},
+            'finish_reason': finish_reason
+        }]
+        return self.finish(request_kwargs, payload, retries, timed_out)
+
+    def complete_hedged(self, request_kwargs, cancel, deadline, hedger):
+        """Streamed completion that fires a duplicate request when the first token is late.
+
+        Both attempts run on their own threads with their own cancel token; the
+        first to finish wins and the other's stream is aborted.
+        """
+        hedger.start_call()
+        cancel.raise_if_cancelled()
+        outcomes = queue.Queue()
+        responded = threading.Event()
+        attempts = []
+
+        def launch(role):
+            token = CancelToken()
+            started = time.monotonic()
+
+            def on_first_token():
+                hedger.observe('first_token', time.monotonic() - started)
+                responded.set()
+
+            def run():
+                try:
+                    outcomes.put((role, self.complete_streaming(request_kwargs, token, deadline, on_first_token), None))
+                except BaseException as e:
+                    outcomes.put((role, None, e))
+                finally:
+                    responded.set()
+
+            attempts.append(token)
+            threading.Thread(target=run, daemon=True).start()
+
+        remove_callback = cancel.add_callback(lambda: [token.cancel() for token in list(attempts)])
+        try:
+            launch('primary')
+            delay = hedger.delay('first_token')
+            if delay is not None and not responded.wait(delay) and not cancel.cancelled and hedger.try_hedge():
+                launch('hedge')
+
+            errors = []
+            for _ in attempts:
+                role, result, error = outcomes.get()
+                if error is None:
+                    if len(attempts) > 1:
+                        hedger.record_winner(role)
+                        result.hedge = role
+                    return result
+                errors.append(error)
+            cancel.raise_if_cancelled()
+            raise errors[0]
+        finally:
+            remove_callback()
+            for token in attempts:
+                token.cancel()
+
+    async def create_async(self, request_kwargs, deadline=None):
+        """Async variant of create; each attempt is also bounded by ``asyncio.wait_for``"""
+        client = self.get_async_client()
+        if deadline is None:
+            raw_response = await client.chat.completions.with_raw_response.create(**request_kwargs)
+            return raw_response, getattr(raw_response, 'retries_taken', 0)
+        attempt = 0
+        while True:
+            if deadline.expired:
+                raise DeadlineExceeded(f"Deadline passed after {attempt} attempt(s)")
+            bounded = client.with_options(timeout=deadline.remaining(), max_retries=0)
+            try:
+                request = bounded.chat.completions.with_raw_response.create(**request_kwargs)
+                return await asyncio.wait_for(request, deadline.remaining()), attempt
+            except asyncio.TimeoutError as e:
+                raise DeadlineExceeded(f"Deadline passed after {attempt + 1} attempt(s)") from e
+            except Exception as e:
+                delay = self.retry_after(e, attempt, deadline)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def create_hedged_async(self, request_kwargs, deadline, hedger):
+        """create_async with a duplicate request fired when the response is late; returns the winner too"""
+        hedger.start_call()
+
+        async def attempt():
+            started = time.monotonic()
+            response = await self.create_async(request_kwargs, deadline)
+            hedger.observe('response', time.monotonic() - started)
+            return response
+
+        tasks = {asyncio.ensure_future(attempt()): 'primary'}
+        try:
+            delay = hedger.delay('response')
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and hedger.try_hedge():
+                    tasks[asyncio.ensure_future(attempt())] = 'hedge'
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = None
+                        if len(tasks) > 1:
+                            winner = tasks[task]
+                            hedger.record_winner(winner)
+                        return task.result(), winner
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def complete_async(self, request_kwargs, deadline=None, call=None):
+        if self.mode == 'replay':
+            return self.replay(request_kwargs)
+        hedger = self.hedging.get(call)
+        winner = None
+        try:
+            if hedger is not None:
+                (raw_response, retries), winner = await self.create_hedged_async(request_kwargs, deadline, hedger)
+            else:
+                raw_response, retries = await self.create_async(request_kwargs, deadline)
+        except DeadlineExceeded as e:
+            print(f"LLM call timed out: {str(e)}")
+            return CompletionResult('', timed_out=True)
+        # with_raw_response returns the legacy response wrapper, whose parse() is synchronous on both clients
+        result = self.finish(request_kwargs, raw_response.parse().model_dump(), retries)
+        result.hedge = winner
+        return result
@@ -0,0 +1,99 @@
+"""
+Tiered model routing for the LLM calls.
+
+Each call type (its span name) is routed to a model tier; tiers are ordered
+from fastest to largest:
+
+    LLM_MODEL_TIERS=fast=sonar,large=sonar-pro          tier=model, smallest first
+    LLM_MODEL_ROUTES=llm.main=large,llm.browser=fast    starting tier per call
+
+A call whose output fails parsing or validation is retried one tier up (see
+``TestingEngine.escalate``), so the browser call runs on the fast model and
+only pays for the large one when the fast model's answer is unusable. Calls
+that are not routed use the largest tier.
+"""
+import os
+import threading
+from collections import deque
+
+from scheduler import wait_summary
+
+DEFAULT_TIERS = 'fast=sonar,large=sonar-pro'
+DEFAULT_ROUTES = 'llm.main=large,llm.browser=fast'
+
+# Latency samples kept per tier
+LATENCY_SAMPLES = 1000
+
+
+def parse_pairs(value):
+    """``a=x,b=y`` -> [('a', 'x'), ('b', 'y')]"""
+    pairs = []
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, _, target = item.partition('=')
+        if not target.strip():
+            raise ValueError(f"Expected name=value, got: {item.strip()}")
+        pairs.append((name.strip(), target.strip()))
+    return pairs
+
+
+class ModelRouter:
+    """Maps call types to model tiers and tracks per-tier latency and escalations"""
+
+    def __init__(self, tiers=None, routes=None):
+        self.tiers = tiers if tiers is not None else parse_pairs(os.getenv('LLM_MODEL_TIERS', DEFAULT_TIERS))
+        if not self.tiers:
+            raise ValueError("LLM_MODEL_TIERS must name at least one tier")
+        self.models = dict(self.tiers)
+        self.order = [name for name, _ in self.tiers]
+        self.routes = dict(routes if routes is not None else parse_pairs(os.getenv('LLM_MODEL_ROUTES', DEFAULT_ROUTES)))
+        for call, tier in self.routes.items():
+            if tier not in self.models:
+                raise ValueError(f"Unknown model tier for {call}: {tier} (expected one of {', '.join(self.order)})")
+        self.latencies = {name: deque(maxlen=LATENCY_SAMPLES) for name in self.order}
+        self.attempts = {name: 0 for name in self.order}
+        self.calls = {}
+        self.escalations = {}
+        self._lock = threading.Lock()
+
+    def ladder(self, call):
+        """Tiers to try for a call: its routed tier, then every larger one"""
+        start = self.routes.get(call, self.order[-1])
+        return self.order[self.order.index(start):]
+
+    def model(self, tier):
+        return self.models[tier]
+
+    def observe(self, call, tier, seconds, first=True):
+        """Record one attempt of a call on a tier (``first`` for its routed tier, not an escalation)"""
+        with self._lock:
+            self.attempts[tier] += 1
+            self.latencies[tier].append(seconds)
+            if first:
+                self.calls[call] = self.calls.get(call, 0) + 1
+
+    def record_escalation(self, call, from_tier, to_tier):
+        with self._lock:
+            key = f'{from_tier}->{to_tier}'
+            escalations = self.escalations.setdefault(call, {})
+            escalations[key] = escalations.get(key, 0) + 1
+
+    def metrics(self):
+        with self._lock:
+            tiers = {name: {
+                'model': self.models[name],
+                'attempts': self.attempts[name],
+                'latency_seconds': wait_summary(self.latencies[name])
+            } for name in self.order}
+            calls = {}
+            for call in sorted(set(self.routes) | set(self.calls)):
+                count = self.calls.get(call, 0)
+                escalated = sum(self.escalations.get(call, {}).values())
+                calls[call] = {
+                    'tier': self.ladder(call)[0],
+                    'calls': count,
+                    'escalations': dict(self.escalations.get(call, {})),
+                    'escalation_rate': round(escalated / count, 4) if count else None
+                }
+        return {'tiers': tiers, 'calls': calls}
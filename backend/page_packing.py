@@ -0,0 +1,210 @@
+"""
+Multi-page packing for batches of thin pages.
+
+Legal, contact and simple landing pages need only a handful of scenarios, yet
+each one pays for a full prompt and a round-trip of its own; under a
+requests-per-minute limit that caps a batch at one page per request. With
+``"pack": true`` on ``/api/start-batch``, thin pages (last path segment such
+as ``privacy``, ``terms`` or ``contact``; ``PACK_THIN_PAGES`` replaces the
+list) are grouped into packs that are tested by a single LLM call:
+
+- Each page's output is estimated from the scenarios, defects and browser
+  scenarios asked for it, and pages are packed in batch order while the
+  estimate stays within ``PACK_FILL`` (default 0.8) of the call's
+  ``PACK_OUTPUT_TOKENS`` (default 10000), at most ``PACK_MAX_PAGES`` (default
+  8) per pack, so the response is not cut off.
+- Pages stay separate jobs. The first job of a pack to run makes the packed
+  call (``llm.pack``) and the others wait for it; the response's per-page
+  results map is split back into one report per job, browser scenarios
+  included. A page missing from the response (or a wait longer than
+  ``PACK_WAIT_SECONDS``, default 300) falls back to its own full analysis.
+
+Pack results are shared between the jobs of one process, so packing applies
+to the in-process stores (threaded and ASGI servers).
+"""
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_THIN_PAGES = (
+    'about,about-us,accessibility,careers,contact,contact-us,cookie-policy,cookies,disclaimer,faq,'
+    'imprint,impressum,legal,privacy,privacy-policy,terms,terms-and-conditions,terms-of-service,terms-of-use,tos'
+)
+
+# Thin pages are shallow: /privacy or /legal/privacy, not /blog/2024/privacy
+MAX_THIN_PAGE_DEPTH = 2
+
+# Output token estimates per page (about 4 characters per token, as the API counts them)
+TOKENS_PER_SCENARIO = 130
+TOKENS_PER_DEFECT = 90
+TOKENS_PER_BROWSER_SCENARIO = 110
+TOKENS_PER_PAGE = 250           # page key, observations, recommendations, performance
+EXPECTED_DEFECT_RATE = 0.3
+
+MIN_SCENARIOS_PER_PAGE = 6
+SCENARIOS_PER_CATEGORY = 2
+MAX_BROWSER_SCENARIOS_PER_PAGE = 4
+
+# Drop results of packs whose remaining pages never came for them (cancelled jobs)
+PACK_RESULT_TTL_SECONDS = 3600
+
+
+def thin_page_names(value=None):
+    value = os.getenv('PACK_THIN_PAGES', DEFAULT_THIN_PAGES) if value is None else value
+    return frozenset(name.strip().lower() for name in value.split(',') if name.strip())
+
+
+def is_thin_page(canonical_url, names):
+    segments = [segment for segment in urlsplit(canonical_url).path.split('/') if segment]
+    if not segments or len(segments) > MAX_THIN_PAGE_DEPTH:
+        return False
+    name = segments[-1].lower().rsplit('.', 1)[0].replace('_', '-')
+    return name in names
+
+
+def scenarios_per_page(test_categories):
+    enabled = sum(1 for enabled in test_categories.values() if enabled)
+    return max(MIN_SCENARIOS_PER_PAGE, SCENARIOS_PER_CATEGORY * enabled)
+
+
+def browser_scenarios_per_page(browsers):
+    return max(2, min(MAX_BROWSER_SCENARIOS_PER_PAGE, len(browsers)))
+
+
+def page_output_tokens(test_categories, browsers):
+    """Estimated output tokens of one page in a packed response"""
+    scenarios = scenarios_per_page(test_categories)
+    return int(scenarios * TOKENS_PER_SCENARIO
+               + scenarios * EXPECTED_DEFECT_RATE * TOKENS_PER_DEFECT
+               + browser_scenarios_per_page(browsers) * TOKENS_PER_BROWSER_SCENARIO
+               + TOKENS_PER_PAGE)
+
+
+def pack_output_tokens():
+    return int(os.getenv('PACK_OUTPUT_TOKENS', '10000'))
+
+
+def pack_budget():
+    """``(output token budget, page limit)`` of one pack"""
+    fill = float(os.getenv('PACK_FILL', '0.8'))
+    if not 0 < fill <= 1:
+        raise ValueError(f"Invalid PACK_FILL: {fill} (expected 0-1)")
+    return int(pack_output_tokens() * fill), int(os.getenv('PACK_MAX_PAGES', '8'))
+
+
+def plan_packs(pages, budget, max_pages):
+    """Group ``(page, estimated tokens)`` pairs, in order, into packs within the budget.
+
+    Returns lists of pages; a page whose estimate alone exceeds the budget gets
+    a pack of its own (callers test single-page packs unpacked).
+    """
+    packs = []
+    current, used = [], 0
+    for page, tokens in pages:
+        if current and (used + tokens > budget or len(current) >= max_pages):
+            packs.append(current)
+            current, used = [], 0
+        current.append(page)
+        used += tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def page_key(index):
+    """Key of the ``index``-th page of a pack in the prompt and the response"""
+    return f'P{index + 1}'
+
+
+def split_pack_response(json_data, urls):
+    """``{url: page result}`` of a packed response; pages without a usable result are left out.
+
+    The model is asked for ``{"pages": {"P1": {...}}}``; results keyed by URL
+    or given as a list with a ``page`` or ``url`` field are accepted too.
+    """
+    pages = json_data.get('pages') if isinstance(json_data, dict) else None
+    if isinstance(pages, list):
+        pages = {str(item.get('page') or item.get('url')): item for item in pages if isinstance(item, dict)}
+    if not isinstance(pages, dict):
+        return {}
+    results = {}
+    for index, url in enumerate(urls):
+        page = pages.get(page_key(index), pages.get(url))
+        if isinstance(page, dict) and isinstance(page.get('scenarios'), list) and page['scenarios']:
+            results[url] = {field: value for field, value in page.items() if field not in ('page', 'url')}
+    return results
+
+
+class PackResults:
+    """Per-page results of packed calls, with single-flight calls per pack"""
+
+    def __init__(self, ttl_seconds=PACK_RESULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._results = {}
+        self._building = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.pages_packed = 0
+        self.pages_served = 0
+        self.fallbacks = 0
+
+    def claim(self, pack_id):
+        """``(True, None)`` once the pack's result is in (``take`` the page); ``(False, None)`` when the
+        caller should make the packed call (and then ``put`` or ``release``); ``(False, event)`` while
+        another job makes it"""
+        with self._lock:
+            if pack_id in self._results:
+                return True, None
+            event = self._building.get(pack_id)
+            if event is not None:
+                return False, event
+            self._building[pack_id] = threading.Event()
+            return False, None
+
+    def put(self, pack_id, urls, pages):
+        """Store the pages of a packed call (possibly none) for the pack's ``urls`` and wake the jobs waiting for it"""
+        now = time.time()
+        with self._lock:
+            self._results = {key: entry for key, entry in self._results.items()
+                             if now - entry['stored_at'] < self.ttl_seconds}
+            self._results[pack_id] = {'stored_at': now, 'pages': dict(pages), 'remaining': set(urls)}
+            self.calls += 1
+            self.pages_packed += len(pages)
+        self.release(pack_id)
+
+    def release(self, pack_id):
+        with self._lock:
+            event = self._building.pop(pack_id, None)
+        if event is not None:
+            event.set()
+
+    def take(self, pack_id, url):
+        """The page's result (each page is handed out once), or None when the pack has none for it"""
+        with self._lock:
+            entry = self._results.get(pack_id)
+            if entry is None:
+                return None
+            page = entry['pages'].pop(url, None)
+            entry['remaining'].discard(url)
+            if not entry['remaining']:
+                del self._results[pack_id]
+            if page is not None:
+                self.pages_served += 1
+            return page
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'pending_packs': len(self._results),
+                'building': len(self._building),
+                'calls': self.calls,
+                'pages_packed': self.pages_packed,
+                'pages_served': self.pages_served,
+                'fallbacks': self.fallbacks,
+                'pages_per_call': round(self.pages_packed / self.calls, 2) if self.calls else None
+            }
@@ -0,0 +1,470 @@
+"""
+Server-side report rendering (vector PDF and standalone HTML).
+
+Both formats are laid out from the same list of blocks built from the report
+JSON, so the page count follows the amount of content. The PDF writer only uses
+the standard Helvetica fonts and vector drawing operators, which keeps files
+small and needs no extra dependency. Rendered documents are cached per job ID
+and report version in an in-memory LRU, optionally backed by a directory that
+several processes can share.
+"""
+import hashlib
+import html
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+from scoring import derive_status
+
+
+# Bump when the layout changes so stale documents in REPORT_CACHE_DIR are not served
+RENDERER_VERSION = 1
+
+RENDER_FORMATS = {
+    'pdf': 'application/pdf',
+    'html': 'text/html'
+}
+
+STATUS_COLORS = {
+    'pass': (0.18, 0.49, 0.2),
+    'passed': (0.18, 0.49, 0.2),
+    'warning': (0.93, 0.42, 0.0),
+    'fail': (0.78, 0.16, 0.16),
+    'failed': (0.78, 0.16, 0.16)
+}
+SEVERITY_COLORS = {
+    'critical': (0.78, 0.16, 0.16),
+    'high': (0.78, 0.16, 0.16),
+    'medium': (0.93, 0.42, 0.0),
+    'low': (0.1, 0.46, 0.82)
+}
+GREY = (0.45, 0.45, 0.45)
+
+
+def report_version(record):
+    """Reports are written once when a job finishes, so status + completion time identify a version"""
+    return f"{record.get('status')}-{record.get('completed_at') or ''}"
+
+
+def score_color(score):
+    if score >= 75:
+        return STATUS_COLORS['pass']
+    if score >= 50:
+        return STATUS_COLORS['warning']
+    return STATUS_COLORS['fail']
+
+
+def text_value(value):
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(item) for item in value)
+    return '' if value is None else str(value)
+
+
+def build_blocks(record):
+    """Turn a job record into layout blocks shared by the PDF and HTML renderers"""
+    report = record.get('report') or {}
+    blocks = [
+        ('title', 'Website Test Report'),
+        ('meta', [
+            ('URL', record.get('url', '')),
+            ('Test ID', record.get('id', '')),
+            ('Status', record.get('status', '')),
+            ('Test type', record.get('test_type', '')),
+            ('Started', record.get('created_at', '')),
+            ('Completed', record.get('completed_at') or '')
+        ])
+    ]
+
+    if 'confidence_score' in report:
+        blocks.append(('heading', 'Summary'))
+        blocks.append(('score', 'Confidence score', report['confidence_score'], ''))
+        for name, category in (report.get('category_scores') or {}).items():
+            if isinstance(category, dict):
+                blocks.append(('score', name.replace('_', ' ').title(), category.get('score', 0),
+                               category.get('status', '')))
+
+    performance = report.get('performance') or {}
+    if performance:
+        rows = [('Page load time', text_value(performance.get('page_load_time')))]
+        rows += [(key.replace('_', ' ').upper(), text_value(value))
+                 for key, value in (performance.get('core_web_vitals') or {}).items()]
+        blocks.append(('heading', 'Performance'))
+        blocks.append(('meta', rows))
+
+    sections = (
+        ('Test Scenarios', report.get('scenarios') or []),
+        ('Browser Compatibility', report.get('browser_compatibility_scenarios') or [])
+    )
+    for heading, scenarios in sections:
+        if not scenarios:
+            continue
+        blocks.append(('heading', f'{heading} ({len(scenarios)})'))
+        for scenario in scenarios:
+            status = derive_status(scenario)
+            lines = [
+                ('Category', text_value(scenario.get('category'))),
+                ('Browser', text_value(scenario.get('browser') or scenario.get('affected_browsers'))),
+                ('Platform', text_value(scenario.get('platform') or scenario.get('affected_platforms'))),
+                ('Steps', text_value(scenario.get('steps'))),
+                ('Expected', text_value(scenario.get('expected_result'))),
+                ('Observed', text_value(scenario.get('observed_result')))
+            ]
+            title = f"{scenario.get('id', '')} {scenario.get('title', '')}".strip()
+            blocks.append(('item', title, [line for line in lines if line[1]], status.upper(),
+                           STATUS_COLORS.get(status, GREY)))
+
+    defects = report.get('defects_and_gaps') or []
+    if defects:
+        blocks.append(('heading', f'Defects and Gaps ({len(defects)})'))
+        for defect in defects:
+            severity = str(defect.get('severity') or 'Medium')
+            lines = [
+                ('Feature', text_value(defect.get('feature'))),
+                ('Browsers', text_value(defect.get('affected_browsers'))),
+                ('Platforms', text_value(defect.get('affected_platforms'))),
+                ('Description', text_value(defect.get('description')))
+            ]
+            title = f"{defect.get('id', '')} {defect.get('title', '')}".strip()
+            blocks.append(('item', title, [line for line in lines if line[1]], severity.upper(),
+                           SEVERITY_COLORS.get(severity.lower(), GREY)))
+
+    observations = report.get('functional_observations') or []
+    if observations:
+        blocks.append(('heading', 'Functional Observations'))
+        blocks.extend(('bullet', text_value(observation)) for observation in observations)
+
+    non_functional = report.get('non_functional_observations') or {}
+    if non_functional:
+        blocks.append(('heading', 'Non-Functional Observations'))
+        for name, entries in non_functional.items():
+            blocks.append(('subheading', name.replace('_', ' ').title()))
+            if isinstance(entries, str):
+                entries = [entries]
+            blocks.extend(('bullet', text_value(entry)) for entry in entries or [])
+
+    recommendations = report.get('recommendations') or []
+    if recommendations:
+        blocks.append(('heading', 'Recommendations'))
+        blocks.extend(('bullet', text_value(recommendation)) for recommendation in recommendations)
+
+    return blocks
+
+
+# Helvetica advance widths (1/1000 em) for ASCII 32..126 from the standard AFM metrics
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584
+]
+
+
+def text_width(text, size, bold=False):
+    units = sum(HELVETICA_WIDTHS[ord(char) - 32] if 32 <= ord(char) <= 126 else 556 for char in text)
+    # Helvetica-Bold is about 5% wider on average; erring wide only wraps a little earlier
+    return units * size / 1000 * (1.05 if bold else 1.0)
+
+
+def wrap_text(text, size, width, bold=False):
+    lines = []
+    for paragraph in str(text).splitlines() or ['']:
+        line = ''
+        for word in paragraph.split(' '):
+            candidate = f'{line} {word}' if line else word
+            if text_width(candidate, size, bold) <= width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            # Break words that do not fit on a line by themselves (long URLs)
+            while text_width(word, size, bold) > width:
+                cut = len(word)
+                while cut > 1 and text_width(word[:cut], size, bold) > width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+            line = word
+        lines.append(line)
+    return lines
+
+
+def pdf_string(text):
+    encoded = text.encode('cp1252', errors='replace')
+    return b'(' + encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class PdfDocument:
+    """Minimal PDF writer: A4 pages, Helvetica text and filled rectangles"""
+
+    WIDTH, HEIGHT, MARGIN = 595, 842, 50
+
+    def __init__(self):
+        self.pages = []
+        self.new_page()
+
+    def new_page(self):
+        self.ops = []
+        self.pages.append(self.ops)
+        self.y = self.HEIGHT - self.MARGIN
+
+    def ensure_space(self, height):
+        if self.y - height < self.MARGIN:
+            self.new_page()
+
+    def text(self, x, y, text, size=10, bold=False, color=(0, 0, 0)):
+        self.ops.append(b'%.3f %.3f %.3f rg BT /%s %d Tf %.2f %.2f Td %s Tj ET' % (
+            *color, b'F2' if bold else b'F1', size, x, y, pdf_string(text)))
+
+    def rect(self, x, y, width, height, color):
+        self.ops.append(b'%.3f %.3f %.3f rg %.2f %.2f %.2f %.2f re f' % (*color, x, y, width, height))
+
+    def paragraph(self, text, x=None, size=10, bold=False, color=(0, 0, 0), leading=1.35):
+        x = self.MARGIN if x is None else x
+        for line in wrap_text(text, size, self.WIDTH - self.MARGIN - x, bold):
+            self.ensure_space(size * leading)
+            self.y -= size * leading
+            self.text(x, self.y, line, size, bold, color)
+
+    def to_bytes(self):
+        page_count = len(self.pages)
+        for number, ops in enumerate(self.pages, start=1):
+            footer = f'Page {number} of {page_count}'
+            ops.append(b'%.3f %.3f %.3f rg BT /F1 8 Tf %.2f 25 Td %s Tj ET' % (
+                *GREY, self.WIDTH - self.MARGIN - text_width(footer, 8), pdf_string(footer)))
+
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            None,
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>'
+        ]
+        page_ids = []
+        for ops in self.pages:
+            stream = zlib.compress(b'\n'.join(ops))
+            objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream')
+            content_id = len(objects)
+            objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                           b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>' % (
+                               self.WIDTH, self.HEIGHT, content_id))
+            page_ids.append(len(objects))
+        objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % page_id for page_id in page_ids), len(page_ids))
+
+        output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(output))
+            output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        xref = len(output)
+        output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+        output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+        return bytes(output)
+
+
+def render_pdf(record):
+    doc = PdfDocument()
+    left, content_width = doc.MARGIN, doc.WIDTH - 2 * doc.MARGIN
+
+    for block in build_blocks(record):
+        kind = block[0]
+        if kind == 'title':
+            doc.paragraph(block[1], size=20, bold=True)
+            doc.y -= 6
+        elif kind == 'meta':
+            for label, value in block[1]:
+                if not value:
+                    continue
+                doc.ensure_space(14)
+                doc.y -= 14
+                doc.text(left, doc.y, f'{label}:', 9, bold=True, color=GREY)
+                lines = wrap_text(value, 9, content_width - 90)
+                doc.text(left + 90, doc.y, lines[0], 9)
+                for line in lines[1:]:
+                    doc.ensure_space(12)
+                    doc.y -= 12
+                    doc.text(left + 90, doc.y, line, 9)
+        elif kind == 'heading':
+            doc.ensure_space(48)
+            doc.y -= 26
+            doc.text(left, doc.y, block[1], 14, bold=True)
+            doc.y -= 6
+            doc.rect(left, doc.y, content_width, 0.8, (0.8, 0.8, 0.8))
+        elif kind == 'subheading':
+            doc.ensure_space(22)
+            doc.y -= 18
+            doc.text(left, doc.y, block[1], 11, bold=True)
+        elif kind == 'score':
+            _, label, score, status = block
+            score = max(0, min(100, int(score or 0)))
+            doc.ensure_space(22)
+            doc.y -= 20
+            doc.text(left, doc.y + 3, label, 10)
+            bar_x, bar_width = left + 170, content_width - 250
+            doc.rect(bar_x, doc.y + 1, bar_width, 10, (0.92, 0.92, 0.92))
+            doc.rect(bar_x, doc.y + 1, bar_width * score / 100, 10, score_color(score))
+            doc.text(bar_x + bar_width + 10, doc.y + 3, f'{score}%  {status}'.strip(), 10, bold=True)
+        elif kind == 'item':
+            _, title, lines, badge, color = block
+            badge_width = text_width(badge, 8, bold=True) + 8
+            title_lines = wrap_text(title, 10, content_width - badge_width - 6, bold=True)
+            doc.ensure_space(40)
+            doc.y -= 24
+            doc.rect(left, doc.y - 3, badge_width, 12, color)
+            doc.text(left + 4, doc.y, badge, 8, bold=True, color=(1, 1, 1))
+            doc.text(left + badge_width + 6, doc.y, title_lines[0], 10, bold=True)
+            for line in title_lines[1:]:
+                doc.ensure_space(14)
+                doc.y -= 13.5
+                doc.text(left + badge_width + 6, doc.y, line, 10, bold=True)
+            for label, value in lines:
+                doc.paragraph(f'{label}: {value}', x=left + 12, size=9, color=(0.2, 0.2, 0.2))
+        elif kind == 'bullet':
+            doc.ensure_space(14)
+            doc.rect(left + 4, doc.y - 10, 3, 3, GREY)
+            doc.paragraph(block[1], x=left + 14, size=9)
+
+    return doc.to_bytes()
+
+
+HTML_STYLE = '''
+body { font-family: Helvetica, Arial, sans-serif; color: #212121; max-width: 900px; margin: 32px auto; padding: 0 16px; }
+h1 { margin-bottom: 8px; } h2 { border-bottom: 1px solid #ccc; padding-bottom: 4px; margin-top: 32px; }
+table.meta td { padding: 2px 12px 2px 0; vertical-align: top; } table.meta td:first-child { color: #757575; font-weight: bold; }
+.score { display: flex; align-items: center; gap: 12px; margin: 6px 0; } .score .label { width: 200px; }
+.bar { flex: 1; background: #ebebeb; height: 10px; } .bar div { height: 10px; }
+.item { margin: 12px 0; } .badge { color: #fff; font-size: 11px; font-weight: bold; padding: 2px 6px; margin-right: 6px; }
+.item ul { margin: 4px 0 0 12px; padding: 0; list-style: none; font-size: 14px; color: #424242; }
+'''
+
+
+def css_color(color):
+    return 'rgb(%d, %d, %d)' % tuple(int(channel * 255) for channel in color)
+
+
+def render_html(record):
+    escape = html.escape
+    parts = [f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Test Report - {escape(record.get("url", ""))}</title>'
+             f'<style>{HTML_STYLE}</style></head><body>']
+    bullets = []
+
+    def flush_bullets():
+        if bullets:
+            parts.append('<ul>' + ''.join(f'<li>{escape(bullet)}</li>' for bullet in bullets) + '</ul>')
+            bullets.clear()
+
+    for block in build_blocks(record):
+        kind = block[0]
+        if kind != 'bullet':
+            flush_bullets()
+        if kind == 'title':
+            parts.append(f'<h1>{escape(block[1])}</h1>')
+        elif kind == 'meta':
+            parts.append('<table class="meta">' + ''.join(
+                f'<tr><td>{escape(label)}</td><td>{escape(value)}</td></tr>' for label, value in block[1] if value
+            ) + '</table>')
+        elif kind == 'heading':
+            parts.append(f'<h2>{escape(block[1])}</h2>')
+        elif kind == 'subheading':
+            parts.append(f'<h3>{escape(block[1])}</h3>')
+        elif kind == 'score':
+            _, label, score, status = block
+            score = max(0, min(100, int(score or 0)))
+            parts.append(f'<div class="score"><span class="label">{escape(label)}</span>'
+                         f'<div class="bar"><div style="width: {score}%; background: {css_color(score_color(score))}"></div></div>'
+                         f'<strong>{score}% {escape(status)}</strong></div>')
+        elif kind == 'item':
+            _, title, lines, badge, color = block
+            parts.append(f'<div class="item"><span class="badge" style="background: {css_color(color)}">{escape(badge)}</span>'
+                         f'<strong>{escape(title)}</strong><ul>' + ''.join(
+                             f'<li><strong>{escape(label)}:</strong> {escape(value)}</li>' for label, value in lines
+                         ) + '</ul></div>')
+        elif kind == 'bullet':
+            bullets.append(block[1])
+    flush_bullets()
+
+    parts.append('</body></html>')
+    return '\n'.join(parts).encode('utf-8')
+
+
+RENDERERS = {
+    'pdf': render_pdf,
+    'html': render_html
+}
+
+
+class ReportCache:
+    """LRU of rendered documents keyed by (job ID, report version, format), optionally mirrored on disk"""
+
+    def __init__(self, max_entries=None, cache_dir=None):
+        self.max_entries = max_entries or int(os.getenv('REPORT_CACHE_SIZE', '64'))
+        self.cache_dir = cache_dir or os.getenv('REPORT_CACHE_DIR')
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def etag(record, render_format):
+        key = f"{RENDERER_VERSION}:{record['id']}:{report_version(record)}:{render_format}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def render(self, record, render_format):
+        """Return (document bytes, etag); only finished reports are cached since running ones still change"""
+        if render_format not in RENDERERS:
+            raise ValueError(f"Unsupported format: {render_format}")
+        etag = self.etag(record, render_format)
+        cacheable = record.get('status') in ('completed', 'failed')
+
+        if cacheable:
+            with self._lock:
+                document = self._entries.get(etag)
+                if document is not None:
+                    self._entries.move_to_end(etag)
+                    self.hits += 1
+                    return document, etag
+            document = self._read_disk(etag)
+            if document is not None:
+                self._store(etag, document)
+                self.hits += 1
+                return document, etag
+
+        self.misses += 1
+        document = RENDERERS[render_format](record)
+        if cacheable:
+            self._store(etag, document)
+            self._write_disk(etag, document)
+        return document, etag
+
+    def _store(self, etag, document):
+        with self._lock:
+            self._entries[etag] = document
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_disk(self, etag):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, etag), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, etag, document):
+        if not self.cache_dir:
+            return
+        path = os.path.join(self.cache_dir, etag)
+        try:
+            # Write then rename so concurrent readers never see a partial file
+            with open(f'{path}.tmp{threading.get_ident()}', 'wb') as f:
+                f.write(document)
+            os.replace(f'{path}.tmp{threading.get_ident()}', path)
+        except OSError as e:
+            print(f"Failed to write report cache entry {etag}: {e}")
@@ -0,0 +1,178 @@
+"""
+Near-duplicate scenario consolidation.
+
+Models often repeat one check per browser or platform with slightly reworded
+titles ("Verify login on Chrome", "Verify login works in Firefox"). Those
+copies inflate the report and weigh the same check several times in the pass
+rates. Before scoring, near-duplicates are merged into one scenario that lists
+every affected browser and platform:
+
+- Title words (without filler such as "verify" or "works in") and word
+  3-grams of the steps and expected result are the scenario's features,
+  with browser and platform names left out.
+- A MinHash signature of the features is split into LSH bands, so each
+  scenario is only compared with the earlier ones sharing a band bucket
+  (linear time instead of comparing every pair).
+- Candidates merge when the exact Jaccard similarity of their titles and of
+  all their features reaches ``SCENARIO_DEDUP_THRESHOLD`` (default 0.8, 0
+  turns merging off) and they have the same category and status, so a failing
+  copy is never folded into a passing one.
+
+The first scenario of a group is kept, with ``browsers``, ``platforms``,
+``merged_count`` and ``merged_ids`` added when it absorbed others.
+"""
+import hashlib
+import os
+import random
+import re
+from collections import Counter
+
+from scoring import derive_status
+
+# MinHash signature length = BANDS * ROWS; with 8 bands of 4 rows, pairs at
+# Jaccard 0.8 share a bucket ~98% of the time, pairs at 0.4 ~18%
+BANDS = 8
+ROWS = 4
+
+# Bounds on the work per scenario, whatever the bucket sizes: the most recent
+# entries of each bucket are considered and the best candidates verified
+BUCKET_SCAN = 64
+MAX_CANDIDATES = 8
+
+# Each MinHash function XORs the features' 64-bit hashes with its own random mask
+_rng = random.Random(0x5CE1)
+MASKS = [_rng.getrandbits(64) for _ in range(BANDS * ROWS)]
+
+ENVIRONMENT_WORDS = frozenset([
+    'chrome', 'chromium', 'firefox', 'safari', 'edge', 'opera', 'brave', 'ie', 'explorer', 'internet',
+    'windows', 'macos', 'mac', 'osx', 'linux', 'ubuntu', 'android', 'ios', 'iphone', 'ipad',
+    'desktop', 'mobile', 'tablet', 'browser', 'browsers', 'platform', 'platforms'
+])
+
+# Title words that say nothing about what is checked
+FILLER_WORDS = frozenset([
+    'verify', 'check', 'test', 'ensure', 'confirm', 'validate', 'that', 'the', 'a', 'an', 'is', 'are',
+    'on', 'in', 'with', 'using', 'via', 'across', 'for', 'of', 'and', 'to', 'works', 'work', 'working',
+    'correctly', 'properly'
+])
+
+WORD = re.compile(r'[a-z0-9]+')
+
+
+def dedup_threshold(value=None):
+    """Similarity needed to merge two scenarios (None when merging is off)"""
+    if value is None:
+        value = os.getenv('SCENARIO_DEDUP_THRESHOLD', '0.8')
+    threshold = float(value)
+    if not 0 <= threshold <= 1:
+        raise ValueError(f"Invalid scenario dedup threshold: {value} (expected 0-1)")
+    return threshold or None
+
+
+def words(text, environment):
+    return [word for word in WORD.findall(str(text or '').lower()) if word not in environment]
+
+
+def environment_values(scenario, field):
+    """Browser or platform names of a scenario (``browser: "chrome, firefox"`` or a ``browsers`` list)"""
+    values = scenario.get(f'{field}s') or scenario.get(field) or []
+    if isinstance(values, str):
+        values = values.split(',')
+    return [str(value).strip() for value in values if str(value).strip()]
+
+
+def scenario_features(scenario):
+    """``(title words, all features)`` of a scenario, without browser and platform names"""
+    environment = ENVIRONMENT_WORDS.union(
+        word for field in ('browser', 'platform')
+        for value in environment_values(scenario, field) for word in WORD.findall(value.lower())
+    )
+    title = frozenset(words(scenario.get('title') or scenario.get('test_case'), environment | FILLER_WORDS))
+    steps = scenario.get('steps')
+    steps = ' '.join(map(str, steps)) if isinstance(steps, list) else steps
+    body = words(f"{steps or ''} {scenario.get('expected_result') or scenario.get('expected') or ''}", environment)
+    shingles = {' '.join(body[index:index + 3]) for index in range(max(1, len(body) - 2))} if body else set()
+    return title, frozenset({f't:{word}' for word in title} | {f's:{shingle}' for shingle in shingles})
+
+
+def feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def minhash(features):
+    hashes = [feature_hash(feature) for feature in features] or [0]
+    return [min(map(mask.__xor__, hashes)) for mask in MASKS]
+
+
+def band_keys(signature):
+    return [(band, tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+def jaccard(first, second):
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def merge_group(scenarios):
+    """The first scenario of a group, listing the browsers and platforms of all of them"""
+    merged = dict(scenarios[0])
+    for field in ('browser', 'platform'):
+        values = []
+        for scenario in scenarios:
+            for value in environment_values(scenario, field):
+                if value.lower() not in (known.lower() for known in values):
+                    values.append(value)
+        if values:
+            merged[f'{field}s'] = values
+            merged[field] = ', '.join(values)
+    merged['merged_count'] = len(scenarios)
+    merged['merged_ids'] = [scenario.get('id') for scenario in scenarios if scenario.get('id')]
+    return merged
+
+
+def dedupe_scenarios(scenarios, threshold=None):
+    """Scenarios with near-duplicates merged, and the number of scenarios merged away"""
+    threshold = dedup_threshold() if threshold is None else threshold
+    if not threshold or len(scenarios) < 2:
+        return list(scenarios), 0
+
+    groups = []         # [scenarios] per kept scenario, in report order
+    kept = []           # (category, status, title words, features) per kept scenario
+    buckets = {}
+    for scenario in scenarios:
+        try:
+            if not isinstance(scenario, dict):
+                raise TypeError('not a scenario object')
+            title, features = scenario_features(scenario)
+            identity = (str(scenario.get('category') or '').lower(), derive_status(scenario))
+        except (TypeError, AttributeError, ValueError):
+            # Malformed LLM output (e.g. a numeric status) is kept as is; scoring deals with it
+            groups.append([scenario])
+            kept.append(None)
+            continue
+        keys = band_keys(minhash(features))
+
+        # Earlier scenarios sharing the most bands are the likeliest duplicates
+        shared = Counter()
+        for key in keys:
+            shared.update(buckets.get(key, ())[-BUCKET_SCAN:])
+        match = None
+        for candidate, _ in shared.most_common(MAX_CANDIDATES):
+            category, status, candidate_title, candidate_features = kept[candidate]
+            if ((category, status) == identity and jaccard(title, candidate_title) >= threshold
+                    and jaccard(features, candidate_features) >= threshold):
+                match = candidate
+                break
+
+        if match is not None:
+            groups[match].append(scenario)
+            continue
+        index = len(groups)
+        groups.append([scenario])
+        kept.append((*identity, title, features))
+        for key in keys:
+            buckets.setdefault(key, []).append(index)
+
+    merged = [group[0] if len(group) == 1 else merge_group(group) for group in groups]
+    return merged, len(scenarios) - len(merged)
@@ -0,0 +1,259 @@
+"""
+Job scheduling: priority classes, per-owner fair queuing and aging.
+
+Every job has a priority class (``interactive`` for runs started from the UI,
+``batch`` for bulk submissions) and an owner (the submitting user or team).
+The next job to run is chosen by ``SchedulerPolicy.select``:
+
+1. Interactive jobs go before batch jobs. A batch job that has waited
+   ``SCHEDULER_AGING_SECONDS`` (default 120) competes as interactive, so batch
+   work keeps moving even under a steady interactive load.
+2. Within a class, owners are served by stride scheduling (weighted
+   round-robin): each dispatch advances the owner's pass by ``1 / weight`` and
+   the owner with the lowest pass goes next, so one owner's 1,000-URL batch
+   interleaves with everyone else's jobs instead of running ahead of them.
+   Weights come from ``SCHEDULER_OWNER_WEIGHTS`` (``team-a=3,team-b=1``).
+3. Ties go to the oldest job.
+
+The in-process ``FairScheduler``/``JobDispatcher`` pair serves the memory job
+store (threads or asyncio tasks); ``SQLiteJobStore.claim_next`` applies the
+same policy to jobs shared with ``worker.py`` processes.
+"""
+import math
+import os
+import threading
+import time
+from collections import deque
+
+PRIORITY_CLASSES = ('interactive', 'batch')
+DEFAULT_PRIORITY = 'interactive'
+DEFAULT_OWNER = 'anonymous'
+
+CLASS_RANK = {name: rank for rank, name in enumerate(PRIORITY_CLASSES)}
+
+# Key of the scheduler's virtual clock in a passes mapping (never a valid owner)
+CLOCK = ''
+
+# Queue-wait samples kept per class for percentiles
+WAIT_SAMPLES = 1000
+
+
+def parse_owner_weights(value):
+    """``team-a=3,team-b=1`` -> {'team-a': 3.0, 'team-b': 1.0}"""
+    weights = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        owner, _, weight = item.partition('=')
+        weights[owner.strip()] = float(weight)
+    return weights
+
+
+def normalize_priority(value):
+    value = value or DEFAULT_PRIORITY
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid priority: {value!r} (expected one of {', '.join(PRIORITY_CLASSES)})")
+    priority = value.lower()
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority: {value} (expected one of {', '.join(PRIORITY_CLASSES)})")
+    return priority
+
+
+def wait_summary(waits):
+    if not waits:
+        return {}
+    ordered = sorted(waits)
+
+    def percentile(pct):
+        return round(ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1], 3)
+
+    return {
+        'p50': percentile(50),
+        'p90': percentile(90),
+        'p99': percentile(99),
+        'max': round(ordered[-1], 3),
+        'mean': round(sum(ordered) / len(ordered), 3)
+    }
+
+
+class SchedulerPolicy:
+    """Priority classes with aging, stride-scheduled (weighted round-robin) owners"""
+
+    def __init__(self, aging_seconds=None, owner_weights=None):
+        self.aging_seconds = aging_seconds if aging_seconds is not None else float(os.getenv('SCHEDULER_AGING_SECONDS', '120'))
+        self.owner_weights = owner_weights if owner_weights is not None else parse_owner_weights(os.getenv('SCHEDULER_OWNER_WEIGHTS'))
+
+    def weight(self, owner):
+        return max(self.owner_weights.get(owner, 1.0), 0.001)
+
+    def effective_class(self, priority, enqueued_at, now):
+        if priority == 'batch' and now - enqueued_at >= self.aging_seconds:
+            return 'interactive'
+        return priority
+
+    def select(self, heads, passes, now):
+        """Pick the next job from the queue heads.
+
+        ``heads`` are ``(key, priority, owner, enqueued_at)`` tuples, one per
+        (priority, owner) queue; ``passes`` maps owners (and ``CLOCK``) to stride
+        passes. Returns the chosen head and the pass updates to store, or
+        ``(None, {})`` when nothing is queued.
+        """
+        clock = passes.get(CLOCK, 0.0)
+
+        def rank(head):
+            _, priority, owner, enqueued_at = head
+            start = max(passes.get(owner, 0.0), clock)
+            return (CLASS_RANK[self.effective_class(priority, enqueued_at, now)], start, enqueued_at)
+
+        best = min(heads, key=rank, default=None)
+        if best is None:
+            return None, {}
+        owner = best[2]
+        start = max(passes.get(owner, 0.0), clock)
+        return best, {CLOCK: start, owner: start + 1.0 / self.weight(owner)}
+
+    def describe(self):
+        return {'aging_seconds': self.aging_seconds, 'owner_weights': dict(self.owner_weights)}
+
+
+class QueueMetrics:
+    """Per-class dispatch counts and queue-wait samples"""
+
+    def __init__(self, aging_seconds):
+        self.aging_seconds = aging_seconds
+        self.dispatched = {name: 0 for name in PRIORITY_CLASSES}
+        self.aged = {name: 0 for name in PRIORITY_CLASSES}
+        self.waits = {name: deque(maxlen=WAIT_SAMPLES) for name in PRIORITY_CLASSES}
+
+    def record(self, priority, wait):
+        self.dispatched[priority] += 1
+        self.waits[priority].append(wait)
+        if priority == 'batch' and wait >= self.aging_seconds:
+            self.aged[priority] += 1
+
+    def snapshot(self, queued):
+        return {name: {
+            'queued': queued.get(name, 0),
+            'dispatched': self.dispatched[name],
+            'aged': self.aged[name],
+            'queue_wait_seconds': wait_summary(self.waits[name])
+        } for name in PRIORITY_CLASSES}
+
+
+class FairScheduler:
+    """In-memory queues per (priority, owner) served by a SchedulerPolicy"""
+
+    def __init__(self, policy=None):
+        self.policy = policy or SchedulerPolicy()
+        self.queues = {}
+        self.passes = {}
+        self.metrics = QueueMetrics(self.policy.aging_seconds)
+        self._lock = threading.Lock()
+
+    def push(self, item, priority, owner, enqueued_at=None):
+        with self._lock:
+            queue = self.queues.setdefault((priority, owner), deque())
+            queue.append((enqueued_at if enqueued_at is not None else time.time(), item))
+
+    def pop(self, now=None):
+        """Next ``(item, priority, owner, queue_wait)`` by policy, or None when empty"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            heads = [(key, key[0], key[1], queue[0][0]) for key, queue in self.queues.items()]
+            head, updates = self.policy.select(heads, self.passes, now)
+            if head is None:
+                return None
+            key, priority, owner, enqueued_at = head
+            queue = self.queues[key]
+            _, item = queue.popleft()
+            if not queue:
+                del self.queues[key]
+            self.passes.update(updates)
+            # Passes at or below the clock rank the same as no pass at all; drop idle ones
+            clock = self.passes[CLOCK]
+            queued_owners = {queued_owner for _, queued_owner in self.queues}
+            for idle in [o for o, value in self.passes.items() if o != CLOCK and value <= clock and o not in queued_owners]:
+                del self.passes[idle]
+            wait = max(0.0, now - enqueued_at)
+            self.metrics.record(priority, wait)
+            return item, priority, owner, wait
+
+    def remove(self, match):
+        """Drop queued items for which ``match(item)`` is true; returns how many were dropped"""
+        removed = 0
+        with self._lock:
+            for key in list(self.queues):
+                queue = self.queues[key]
+                kept = deque(entry for entry in queue if not match(entry[1]))
+                removed += len(queue) - len(kept)
+                if kept:
+                    self.queues[key] = kept
+                else:
+                    del self.queues[key]
+        return removed
+
+    def snapshot(self):
+        with self._lock:
+            queued = {}
+            owners = {}
+            for (priority, owner), queue in self.queues.items():
+                queued[priority] = queued.get(priority, 0) + len(queue)
+                owners.setdefault(owner, {'queued': 0, 'running': 0})['queued'] += len(queue)
+            return {'classes': self.metrics.snapshot(queued), 'owners': owners}
+
+
+class JobDispatcher:
+    """Runs queued jobs with at most ``limit`` in flight.
+
+    ``launch(item, queue_wait, done)`` starts a job (on a thread or as an
+    asyncio task) and must call ``done()`` when it finishes.
+    """
+
+    def __init__(self, launch, limit, scheduler=None):
+        self.launch = launch
+        self.limit = max(1, limit)
+        self.scheduler = scheduler or FairScheduler()
+        self.running = {}
+        self._lock = threading.Lock()
+
+    def submit(self, item, priority, owner):
+        self.scheduler.push(item, priority, owner)
+        self.pump()
+
+    def remove(self, match):
+        """Withdraw queued (not yet launched) items, e.g. cancelled jobs"""
+        return self.scheduler.remove(match)
+
+    def pump(self):
+        while True:
+            with self._lock:
+                if sum(self.running.values()) >= self.limit:
+                    return
+                popped = self.scheduler.pop()
+                if popped is None:
+                    return
+                item, _, owner, wait = popped
+                self.running[owner] = self.running.get(owner, 0) + 1
+            self.launch(item, wait, self.done_callback(owner))
+
+    def done_callback(self, owner):
+        def done():
+            with self._lock:
+                self.running[owner] -= 1
+                if not self.running[owner]:
+                    del self.running[owner]
+            self.pump()
+        return done
+
+    def metrics(self):
+        snapshot = self.scheduler.snapshot()
+        with self._lock:
+            running = dict(self.running)
+        for owner, count in running.items():
+            snapshot['owners'].setdefault(owner, {'queued': 0, 'running': 0})['running'] = count
+        return {
+            'policy': {**self.scheduler.policy.describe(), 'concurrency': self.limit},
+            'running': sum(running.values()),
+            **snapshot
+        }
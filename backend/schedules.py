@@ -0,0 +1,400 @@
+"""
+Recurring test schedules with load spreading.
+
+Schedules live in SQLite (``SCHEDULE_DB_PATH``, default
+``backend/data/schedules.db``): a cron expression and time zone (see
+cron.py), the URLs to test and the ``/api/start-testing`` options of their
+jobs. Instead of firing every URL at the cron time, each tick's runs are
+spread over the schedule's window (``spreadSeconds``, default
+``SCHEDULE_SPREAD_SECONDS`` = 3600, at most 90% of the time to the next tick):
+the window is cut into one slot per URL and every run gets a random position
+within its slot (stratified jitter), so runs arrive evenly but never on a
+fixed grid, and schedules sharing a cron time interleave.
+
+A ``ScheduleRunner`` thread in the API process polls every
+``SCHEDULE_POLL_SECONDS`` (default 5):
+
+- a schedule whose tick has come materializes one pending run per URL (a tick
+  missed while no server was up is made up once, older pending runs of the
+  schedule are dropped as ``missed``);
+- due runs start as jobs while fewer than ``SCHEDULE_MAX_ACTIVE`` (default
+  16) scheduled jobs are queued or running, across all schedules; the others
+  wait for a free slot, in due order;
+- a run whose previous run of the same URL is still active is ``skipped``.
+
+Ticks and runs are claimed with conditional updates, so API processes that
+share the database never start a run twice.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+from cron import CronExpression, isoformat
+from job_store import BACKEND_DIR, TERMINAL_STATUSES, connect_sqlite
+
+DEFAULT_DB_PATH = os.path.join(BACKEND_DIR, 'data', 'schedules.db')
+
+# Share of the interval between two ticks the runs of one tick may spread over
+MAX_SPREAD_SHARE = 0.9
+
+# Runs kept per schedule (finished, skipped and missed ones are pruned beyond this)
+RUN_HISTORY = 500
+
+
+def spread_offsets(schedule_id, tick, urls, window):
+    """Seconds after the tick at which each URL runs: one slot of the window per URL, a random
+    position within the slot (seeded by schedule and tick, so listings and runs agree)"""
+    if not urls or window <= 0:
+        return [0.0] * len(urls)
+    seed = int.from_bytes(hashlib.blake2b(f'{schedule_id}:{tick}'.encode('utf-8'), digest_size=8).digest(), 'little')
+    rng = random.Random(seed)
+    slot = window / len(urls)
+    return [(index + rng.random()) * slot for index in range(len(urls))]
+
+
+class ScheduleStore:
+    """Schedules and their runs in SQLite"""
+
+    def __init__(self, path=None, spread_seconds=None):
+        self.path = path or os.getenv('SCHEDULE_DB_PATH', DEFAULT_DB_PATH)
+        self.spread_seconds = spread_seconds if spread_seconds is not None else float(os.getenv('SCHEDULE_SPREAD_SECONDS', '3600'))
+        self._local = threading.local()
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS schedules (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                cron TEXT NOT NULL,
+                timezone TEXT NOT NULL,
+                spread_seconds REAL NOT NULL,
+                urls TEXT NOT NULL,
+                options TEXT NOT NULL,
+                enabled INTEGER NOT NULL,
+                next_tick REAL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS schedule_runs (
+                schedule_id TEXT NOT NULL,
+                tick REAL NOT NULL,
+                url TEXT NOT NULL,
+                due REAL NOT NULL,
+                state TEXT NOT NULL,
+                test_id TEXT,
+                started_at REAL,
+                finished_at REAL,
+                PRIMARY KEY (schedule_id, tick, url)
+            );
+            CREATE INDEX IF NOT EXISTS schedule_runs_state_due ON schedule_runs (state, due);
+            CREATE INDEX IF NOT EXISTS schedule_runs_url ON schedule_runs (schedule_id, url, state);
+        ''')
+
+    @property
+    def conn(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect_sqlite(self.path)
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, work):
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(conn)
+            conn.execute('COMMIT')
+            return result
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def window(self, schedule, tick):
+        """Spread window of a tick: the schedule's, but well before the next tick"""
+        interval = schedule['cron_expression'].next_after(tick) - tick
+        return min(schedule['spread_seconds'], interval * MAX_SPREAD_SHARE)
+
+    def _row_schedule(self, row):
+        (schedule_id, name, cron, tz, spread_seconds, urls, options, enabled, next_tick, created_at) = row
+        return {
+            'id': schedule_id,
+            'name': name,
+            'cron': cron,
+            'timezone': tz,
+            'cron_expression': CronExpression(cron, tz),
+            'spread_seconds': spread_seconds,
+            'urls': json.loads(urls),
+            'options': json.loads(options),
+            'enabled': bool(enabled),
+            'next_tick': next_tick,
+            'created_at': created_at
+        }
+
+    def create(self, name, cron, tz, urls, options, spread_seconds=None, enabled=True, now=None):
+        """Store a schedule (raises ValueError for an invalid cron expression or window)"""
+        expression = CronExpression(cron, tz)
+        spread_seconds = self.spread_seconds if spread_seconds is None else float(spread_seconds)
+        if spread_seconds < 0:
+            raise ValueError(f"Invalid spread window: {spread_seconds}")
+        now = time.time() if now is None else now
+        schedule_id = str(uuid.uuid4())
+        self.conn.execute(
+            'INSERT INTO schedules (id, name, cron, timezone, spread_seconds, urls, options, enabled, next_tick, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (schedule_id, name, expression.expression, tz, spread_seconds, json.dumps(urls), json.dumps(options),
+             int(enabled), expression.next_after(now), now)
+        )
+        return self.get(schedule_id)
+
+    def get(self, schedule_id):
+        row = self.conn.execute('SELECT * FROM schedules WHERE id = ?', (schedule_id,)).fetchone()
+        return self._row_schedule(row) if row else None
+
+    def list(self):
+        return [self._row_schedule(row) for row in self.conn.execute('SELECT * FROM schedules ORDER BY created_at')]
+
+    def update(self, schedule_id, enabled=None, cron=None, tz=None, spread_seconds=None, now=None):
+        """Change a schedule; a new cron expression or time zone restarts it from the next tick"""
+        schedule = self.get(schedule_id)
+        if schedule is None:
+            return None
+        cron = schedule['cron'] if cron is None else cron
+        tz = schedule['timezone'] if tz is None else tz
+        expression = CronExpression(cron, tz)
+        spread_seconds = schedule['spread_seconds'] if spread_seconds is None else float(spread_seconds)
+        if spread_seconds < 0:
+            raise ValueError(f"Invalid spread window: {spread_seconds}")
+        enabled = schedule['enabled'] if enabled is None else bool(enabled)
+        next_tick = schedule['next_tick']
+        if (cron, tz) != (schedule['cron'], schedule['timezone']) or (enabled and not schedule['enabled']):
+            next_tick = expression.next_after(time.time() if now is None else now)
+        self.conn.execute(
+            'UPDATE schedules SET cron = ?, timezone = ?, spread_seconds = ?, enabled = ?, next_tick = ? WHERE id = ?',
+            (expression.expression, tz, spread_seconds, int(enabled), next_tick, schedule_id)
+        )
+        if not enabled:
+            self.conn.execute("UPDATE schedule_runs SET state = 'missed' WHERE schedule_id = ? AND state = 'pending'",
+                              (schedule_id,))
+        return self.get(schedule_id)
+
+    def delete(self, schedule_id):
+        def work(conn):
+            deleted = conn.execute('DELETE FROM schedules WHERE id = ?', (schedule_id,)).rowcount
+            conn.execute('DELETE FROM schedule_runs WHERE schedule_id = ?', (schedule_id,))
+            return bool(deleted)
+        return self._transaction(work)
+
+    def materialize(self, now):
+        """Create the pending runs of every tick that has come; returns the number of runs created"""
+        created = 0
+        for schedule in self.list():
+            tick = schedule['next_tick']
+            if not schedule['enabled'] or tick is None or tick > now:
+                continue
+            # A tick missed while no server was up is made up once, from now
+            next_tick = schedule['cron_expression'].next_after(now)
+            offsets = spread_offsets(schedule['id'], tick, schedule['urls'], self.window(schedule, tick))
+
+            def work(conn):
+                # Another process may have taken the tick already
+                claimed = conn.execute('UPDATE schedules SET next_tick = ? WHERE id = ? AND next_tick = ?',
+                                       (next_tick, schedule['id'], tick)).rowcount
+                if not claimed:
+                    return 0
+                conn.execute("UPDATE schedule_runs SET state = 'missed' WHERE schedule_id = ? AND state = 'pending'",
+                             (schedule['id'],))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO schedule_runs (schedule_id, tick, url, due, state) VALUES (?, ?, ?, ?, 'pending')",
+                    [(schedule['id'], tick, url, max(tick, now) + offset) for url, offset in zip(schedule['urls'], offsets)]
+                )
+                return len(offsets)
+
+            created += self._transaction(work)
+            self.prune(schedule['id'])
+        return created
+
+    def active_runs(self):
+        return self.conn.execute(
+            "SELECT schedule_id, tick, url, test_id FROM schedule_runs WHERE state = 'started'"
+        ).fetchall()
+
+    def finish(self, schedule_id, tick, url, state, now):
+        """Record how a run ended (also a run whose job could not be started)"""
+        self.conn.execute(
+            "UPDATE schedule_runs SET state = ?, finished_at = ? WHERE schedule_id = ? AND tick = ? AND url = ? "
+            "AND state IN ('starting', 'started')",
+            (state, now, schedule_id, tick, url)
+        )
+
+    def due_runs(self, now):
+        return self.conn.execute(
+            "SELECT schedule_id, tick, url FROM schedule_runs WHERE state = 'pending' AND due <= ? ORDER BY due",
+            (now,)
+        ).fetchall()
+
+    def claim(self, schedule_id, tick, url, state, now):
+        """Move a pending run to ``state`` (``starting`` or ``skipped``); False if another process got it"""
+        return bool(self.conn.execute(
+            "UPDATE schedule_runs SET state = ?, started_at = ? WHERE schedule_id = ? AND tick = ? AND url = ? AND state = 'pending'",
+            (state, now, schedule_id, tick, url)
+        ).rowcount)
+
+    def started(self, schedule_id, tick, url, test_id):
+        self.conn.execute(
+            "UPDATE schedule_runs SET state = 'started', test_id = ? WHERE schedule_id = ? AND tick = ? AND url = ?",
+            (test_id, schedule_id, tick, url)
+        )
+
+    def prune(self, schedule_id):
+        self.conn.execute(
+            "DELETE FROM schedule_runs WHERE schedule_id = ? AND state NOT IN ('pending', 'starting', 'started') AND rowid NOT IN ("
+            "SELECT rowid FROM schedule_runs WHERE schedule_id = ? ORDER BY tick DESC LIMIT ?)",
+            (schedule_id, schedule_id, RUN_HISTORY)
+        )
+
+    def runs(self, schedule_id, limit=50):
+        rows = self.conn.execute(
+            'SELECT tick, url, due, state, test_id, started_at, finished_at FROM schedule_runs '
+            'WHERE schedule_id = ? ORDER BY tick DESC, due DESC LIMIT ?',
+            (schedule_id, limit)
+        ).fetchall()
+        return [{
+            'tick': isoformat(tick), 'url': url, 'due': isoformat(due), 'state': state, 'test_id': test_id,
+            'started_at': isoformat(started_at), 'finished_at': isoformat(finished_at)
+        } for tick, url, due, state, test_id, started_at, finished_at in rows]
+
+    def upcoming(self, now, horizon_seconds, limit, schedule_id=None):
+        """Next runs in due order: pending runs, then the spread runs of ticks within the horizon"""
+        query = "SELECT schedule_id, tick, url, due FROM schedule_runs WHERE state = 'pending'"
+        parameters = ()
+        if schedule_id is not None:
+            query += ' AND schedule_id = ?'
+            parameters = (schedule_id,)
+        runs = [{'schedule_id': sid, 'tick': tick, 'url': url, 'due': due, 'state': 'pending'}
+                for sid, tick, url, due in self.conn.execute(query + ' ORDER BY due LIMIT ?', parameters + (limit,))]
+        end = now + horizon_seconds
+        for schedule in self.list():
+            if not schedule['enabled'] or schedule_id not in (None, schedule['id']):
+                continue
+            tick = schedule['next_tick']
+            while tick is not None and tick <= end:
+                offsets = spread_offsets(schedule['id'], tick, schedule['urls'], self.window(schedule, tick))
+                runs.extend({'schedule_id': schedule['id'], 'tick': tick, 'url': url, 'due': max(tick, now) + offset,
+                             'state': 'scheduled'} for url, offset in zip(schedule['urls'], offsets))
+                tick = schedule['cron_expression'].next_after(tick)
+        runs = sorted(runs, key=lambda run: run['due'])[:limit]
+        return [{**run, 'tick': isoformat(run['tick']), 'due': isoformat(run['due'])} for run in runs]
+
+    def counts(self):
+        return dict(self.conn.execute('SELECT state, COUNT(*) FROM schedule_runs GROUP BY state').fetchall())
+
+
+def schedule_summary(schedule, ticks=5):
+    """A schedule as returned by the API, with its next ``ticks`` cron times"""
+    next_ticks = []
+    if schedule['enabled'] and schedule['next_tick'] is not None:
+        next_ticks = [schedule['next_tick']] + schedule['cron_expression'].next_runs(schedule['next_tick'], ticks - 1)
+    return {
+        'id': schedule['id'],
+        'name': schedule['name'],
+        'cron': schedule['cron'],
+        'timezone': schedule['timezone'],
+        'spread_seconds': schedule['spread_seconds'],
+        'urls': schedule['urls'],
+        'options': schedule['options'],
+        'enabled': schedule['enabled'],
+        'next_ticks': [isoformat(tick) for tick in next_ticks],
+        'created_at': isoformat(schedule['created_at'])
+    }
+
+
+class ScheduleRunner:
+    """Background thread starting due scheduled runs within a global budget of active jobs.
+
+    ``launch(schedule, url)`` creates and dispatches a job and returns its test
+    ID; ``job_status(test_id)`` returns the job's status (None when unknown).
+    """
+
+    def __init__(self, store, launch, job_status, max_active=None, poll_seconds=None):
+        self.store = store
+        self.launch = launch
+        self.job_status = job_status
+        self.max_active = max_active or int(os.getenv('SCHEDULE_MAX_ACTIVE', '16'))
+        self.poll_seconds = poll_seconds or float(os.getenv('SCHEDULE_POLL_SECONDS', '5'))
+        self._stop = threading.Event()
+        self._thread = None
+        self.started = 0
+        self.skipped = 0
+        self.deferred = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='schedule-runner', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error running schedules: {str(e)}")
+            self._stop.wait(self.poll_seconds)
+
+    def refresh_active(self, now):
+        """Scheduled jobs still queued or running, by (schedule, URL); finished ones are recorded"""
+        active = set()
+        for schedule_id, tick, url, test_id in self.store.active_runs():
+            status = self.job_status(test_id)
+            if status is None or status in TERMINAL_STATUSES:
+                self.store.finish(schedule_id, tick, url, status or 'unknown', now)
+            else:
+                active.add((schedule_id, url))
+        return active
+
+    def poll(self, now=None):
+        now = time.time() if now is None else now
+        self.store.materialize(now)
+        active = self.refresh_active(now)
+        free = self.max_active - len(active)
+        deferred = 0
+        schedules = {}
+        for schedule_id, tick, url in self.store.due_runs(now):
+            if (schedule_id, url) in active:
+                if self.store.claim(schedule_id, tick, url, 'skipped', now):
+                    self.skipped += 1
+                    print(f"Skipping scheduled run of {url}: its previous run is still active")
+                continue
+            if free <= 0:
+                # Waits for a free slot, ahead of runs that become due later
+                deferred += 1
+                continue
+            if schedule_id not in schedules:
+                schedules[schedule_id] = self.store.get(schedule_id)
+            schedule = schedules[schedule_id]
+            if schedule is None or not self.store.claim(schedule_id, tick, url, 'starting', now):
+                continue
+            try:
+                test_id = self.launch(schedule, url)
+            except Exception as e:
+                print(f"Error starting scheduled run of {url}: {str(e)}")
+                self.store.finish(schedule_id, tick, url, 'failed', now)
+                continue
+            self.store.started(schedule_id, tick, url, test_id)
+            active.add((schedule_id, url))
+            free -= 1
+            self.started += 1
+        self.deferred = deferred
+
+    def metrics(self):
+        return {
+            'max_active': self.max_active,
+            'poll_seconds': self.poll_seconds,
+            'started': self.started,
+            'skipped': self.skipped,
+            'deferred': self.deferred
+        }
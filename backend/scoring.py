@@ -0,0 +1,211 @@
+"""
+Single-pass scenario scoring.
+
+Scenarios are normalized once into ``ScenarioRecord`` objects (lower-cased
+category and type plus the derived status) and every category score and the
+confidence score are computed from those records, instead of re-scanning and
+re-lowercasing the raw scenario dicts once per selected category.
+"""
+import re
+
+
+# Map frontend category names to backend category names
+CATEGORY_MAPPING = {
+    'functional': 'functionality',
+    'security': 'security',
+    'accessibility': 'accessibility',
+    'performance': 'performance',
+    'usability': 'usability'
+}
+
+# Extra keywords that also count a scenario's category towards a selected category
+CATEGORY_KEYWORDS = {
+    'functional': ('functional', 'function'),
+    'ui': ('ui', 'interface'),
+    'security': ('security',),
+    'accessibility': ('accessibility', 'a11y'),
+    'performance': ('performance', 'speed'),
+    'usability': ('usability', 'ux')
+}
+
+FAILURE_INDICATORS = re.compile('|'.join(re.escape(indicator) for indicator in [
+    'error', 'fail', 'not working', 'broken', 'doesn\'t', 'unable', 'overlaps', 'misaligned', 'incorrect'
+]))
+PARTIAL_SUCCESS_INDICATORS = re.compile('|'.join(re.escape(indicator) for indicator in [
+    'partially', 'some issues', 'minor'
+]))
+
+PASSING_STATUSES = frozenset(['pass', 'warning'])
+
+
+def derive_status(scenario):
+    """Get the status of a scenario, deriving it from expected vs observed results when missing"""
+    if scenario.get('status'):
+        return scenario['status'].lower()
+
+    expected = (scenario.get('expected_result') or scenario.get('expected') or '').lower().strip()
+    observed = (scenario.get('observed_result') or scenario.get('observed') or '').lower().strip()
+
+    if not expected or not observed:
+        return 'unknown'
+
+    if expected == observed:
+        return 'pass'
+
+    if FAILURE_INDICATORS.search(observed):
+        return 'fail'
+
+    if PARTIAL_SUCCESS_INDICATORS.search(observed):
+        return 'warning'
+
+    # If expected and observed are different but no clear failure indicators
+    return 'fail'
+
+
+class ScenarioRecord:
+    """Normalized view of a scenario with everything scoring needs precomputed"""
+
+    __slots__ = ('category', 'type', 'status', 'passed')
+
+    def __init__(self, category, scenario_type, status):
+        self.category = category
+        self.type = scenario_type
+        self.status = status
+        self.passed = status in PASSING_STATUSES
+
+
+def normalize_scenario(scenario):
+    return ScenarioRecord(
+        str(scenario.get('category', '') or '').lower(),
+        str(scenario.get('type', '') or '').lower(),
+        derive_status(scenario)
+    )
+
+
+def normalize_scenarios(scenarios):
+    return [normalize_scenario(scenario) for scenario in scenarios]
+
+
+class CategoryMatcher:
+    """Compiled keyword matcher deciding which selected categories a scenario counts towards"""
+
+    def __init__(self, category_keys):
+        self.category_keys = list(category_keys)
+        self._patterns = []
+        for category_key in self.category_keys:
+            key = category_key.lower()
+            mapped = CATEGORY_MAPPING.get(key, key)
+            keywords = {key, mapped, *CATEGORY_KEYWORDS.get(key, ())}
+            self._patterns.append((
+                re.compile('|'.join(re.escape(keyword) for keyword in sorted(keywords))),
+                key
+            ))
+        # Reports repeat a handful of category/type values, so cache the match per pair
+        self._cache = {}
+
+    def match(self, record):
+        """Return the indexes (into category_keys) of the categories the record belongs to"""
+        cache_key = (record.category, record.type)
+        matches = self._cache.get(cache_key)
+        if matches is None:
+            matches = tuple(
+                index for index, (category_pattern, key) in enumerate(self._patterns)
+                if (record.category and category_pattern.search(record.category)) or
+                   (record.type and key in record.type)
+            )
+            self._cache[cache_key] = matches
+        return matches
+
+
+def score_status(pass_rate):
+    if pass_rate >= 90:
+        return "Excellent"
+    elif pass_rate >= 75:
+        return "Good"
+    elif pass_rate >= 50:
+        return "Needs Work"
+    return "Critical Issues"
+
+
+def compute_category_scores(records, selected_categories):
+    """Score every selected category in a single pass over the normalized records"""
+    all_keys = list(selected_categories.keys())
+    enabled_keys = [key for key, is_enabled in selected_categories.items() if is_enabled]
+    matcher = CategoryMatcher(enabled_keys)
+
+    totals = [0] * len(enabled_keys)
+    passed = [0] * len(enabled_keys)
+    for record in records:
+        for index in matcher.match(record):
+            totals[index] += 1
+            passed[index] += record.passed
+
+    # Categories without matching scenarios get an even slice of all scenarios;
+    # prefix sums make each slice's pass count O(1)
+    prefix_passed = None
+    if records and 0 in totals:
+        prefix_passed = [0]
+        for record in records:
+            prefix_passed.append(prefix_passed[-1] + record.passed)
+
+    category_scores = {}
+    scenario_count = len(records)
+    for index, category_key in enumerate(enabled_keys):
+        mapped_category = CATEGORY_MAPPING.get(category_key.lower(), category_key.lower())
+        total_count, passed_count = totals[index], passed[index]
+
+        if not total_count and records:
+            scenarios_per_category = scenario_count // len(enabled_keys)
+            start_idx = min(all_keys.index(category_key) * scenarios_per_category, scenario_count)
+            end_idx = min(start_idx + scenarios_per_category, scenario_count)
+            total_count = end_idx - start_idx
+            passed_count = prefix_passed[end_idx] - prefix_passed[start_idx]
+
+        pass_rate = (passed_count / total_count) * 100 if total_count else 0
+
+        category_scores[mapped_category] = {
+            "score": int(pass_rate),
+            "status": score_status(pass_rate),
+            "description": f"Based on {total_count} test scenarios with {pass_rate:.0f}% pass rate"
+        }
+
+    return category_scores
+
+
+def compute_confidence_score(records, browser_scenarios, defects):
+    """Confidence score from pass rate, defect severity and test volume"""
+    total_scenarios = len(records) + len(browser_scenarios)
+    total_defects = len(defects)
+
+    # If no scenarios were tested, very low confidence
+    if total_scenarios == 0:
+        return 15
+
+    passed_regular = sum(record.passed for record in records)
+    passed_browser = sum(1 for s in browser_scenarios if s.get('status', '').lower() in PASSING_STATUSES)
+    confidence = ((passed_regular + passed_browser) / total_scenarios) * 100
+
+    # Deduct points based on defect severity
+    for defect in defects:
+        severity = defect.get('severity', 'Medium').lower()
+        if severity in ['critical', 'high']:
+            confidence -= 15
+        elif severity in ['medium', 'moderate']:
+            confidence -= 8
+        elif severity in ['low', 'minor']:
+            confidence -= 3
+
+    # Additional penalty for high defect ratio
+    defect_ratio = total_defects / total_scenarios
+    if defect_ratio > 0.5:
+        confidence -= 20
+    elif defect_ratio > 0.3:
+        confidence -= 10
+
+    # Bonus points for comprehensive testing
+    if total_scenarios >= 15:
+        confidence += 5
+    elif total_scenarios >= 10:
+        confidence += 3
+
+    return int(max(5, min(100, confidence)))
@@ -0,0 +1,195 @@
+"""
+Template-aware baseline reports.
+
+Product, article and listing pages usually share one template, so testing a
+thousand of them from scratch repeats the same scenarios a thousand times.
+URL templates are configured with ``URL_TEMPLATES`` (comma-separated;
+``/product/{id}`` for any host or ``shop.example.com/product/{id}`` for one)
+or per job with the ``urlTemplate`` field; ``{name}`` matches one path segment.
+
+The first page of a template gets the full analysis, which becomes the
+template's baseline (per host, template and test configuration, kept for
+``TEMPLATE_BASELINE_TTL_SECONDS``, default one day). Later pages reuse the
+baseline's scenarios and browser results and only ask the LLM for what is
+specific to the page. While one job builds a baseline, other jobs of the same
+template in the process wait for it instead of starting full runs of their own.
+Baselines live in an in-memory LRU, mirrored to ``TEMPLATE_BASELINE_DIR`` when
+set so API and worker processes share them.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+
+class UrlTemplate:
+    """A URL pattern such as ``/product/{id}`` or ``shop.example.com/product/{id}``"""
+
+    def __init__(self, pattern):
+        pattern = pattern.strip()
+        host, slash, path = pattern.partition('/')
+        if not slash:
+            raise ValueError(f"URL template needs a path: {pattern}")
+        self.pattern = pattern
+        self.host = host.lower() or None
+        self.segments = [segment for segment in path.split('/') if segment]
+        self.path = '/' + '/'.join(self.segments)
+
+    def matches(self, canonical_url):
+        parts = urlsplit(canonical_url)
+        if self.host is not None and parts.hostname != self.host:
+            return False
+        segments = [segment for segment in parts.path.split('/') if segment]
+        if len(segments) != len(self.segments):
+            return False
+        return all(
+            (expected.startswith('{') and expected.endswith('}')) or expected == actual
+            for expected, actual in zip(self.segments, segments)
+        )
+
+    def key(self, canonical_url):
+        """Template identity: pages of one template on one site share a baseline"""
+        parts = urlsplit(canonical_url)
+        return f"{parts.scheme}://{parts.netloc}{self.path}"
+
+
+def parse_templates(value):
+    return [UrlTemplate(pattern) for pattern in (value or '').split(',') if pattern.strip()]
+
+
+class TemplateMatcher:
+    """Finds the template of a canonical URL among the configured ones"""
+
+    def __init__(self, templates=None):
+        self.templates = templates if templates is not None else parse_templates(os.getenv('URL_TEMPLATES'))
+
+    def match(self, canonical_url, pattern=None):
+        """Template key of the URL (None without a match); an explicit ``pattern`` must match"""
+        if pattern:
+            template = UrlTemplate(pattern)
+            if not template.matches(canonical_url):
+                raise ValueError(f"URL {canonical_url} does not match template {pattern}")
+            return template.key(canonical_url)
+        for template in self.templates:
+            if template.matches(canonical_url):
+                return template.key(canonical_url)
+        return None
+
+
+def baseline_key(template_key, test_type, browsers, platforms, test_categories):
+    """Baselines are only shared between jobs that test the same things"""
+    config = {
+        'template': template_key,
+        'test_type': test_type,
+        'browsers': sorted(b.lower().strip() for b in browsers),
+        'platforms': sorted(p.lower().strip() for p in platforms),
+        'categories': sorted(category for category, enabled in test_categories.items() if enabled)
+    }
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class TemplateBaselineCache:
+    """LRU of baseline reports by baseline key, with expiry, a disk mirror and single-flight building"""
+
+    def __init__(self, max_entries=None, ttl_seconds=None, cache_dir=None):
+        self.max_entries = max_entries or int(os.getenv('TEMPLATE_BASELINE_CACHE_SIZE', '256'))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv('TEMPLATE_BASELINE_TTL_SECONDS', '86400'))
+        self.cache_dir = cache_dir or os.getenv('TEMPLATE_BASELINE_DIR')
+        self._entries = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def fresh(self, baseline):
+        return time.time() - baseline['stored_at'] < self.ttl_seconds
+
+    def get(self, key):
+        with self._lock:
+            baseline = self._entries.get(key)
+            if baseline is not None and self.fresh(baseline):
+                self._entries.move_to_end(key)
+                return baseline
+        baseline = self._read_disk(key)
+        if baseline is not None and self.fresh(baseline):
+            self._store(key, baseline)
+            return baseline
+        return None
+
+    def claim(self, key):
+        """``(baseline, None)`` when cached; ``(None, None)`` when the caller should build it
+        (and then ``put`` or ``release``); ``(None, event)`` while another job builds it"""
+        baseline = self.get(key)
+        with self._lock:
+            if baseline is not None:
+                self.hits += 1
+                return baseline, None
+            event = self._building.get(key)
+            if event is not None:
+                return None, event
+            self.misses += 1
+            self._building[key] = threading.Event()
+            return None, None
+
+    def put(self, key, baseline):
+        baseline = {**baseline, 'stored_at': time.time()}
+        self._store(key, baseline)
+        self._write_disk(key, baseline)
+        with self._lock:
+            self.stored += 1
+        self.release(key)
+
+    def release(self, key):
+        """Wake the jobs waiting for a baseline (whether or not one was stored)"""
+        with self._lock:
+            event = self._building.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def _store(self, key, baseline):
+        with self._lock:
+            self._entries[key] = baseline
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, baseline):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        temp_path = f'{path}.tmp{threading.get_ident()}'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(baseline, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing template baseline: {str(e)}")
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'building': len(self._building),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stored': self.stored,
+                'ttl_seconds': self.ttl_seconds
+            }
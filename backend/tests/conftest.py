@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# Modules imported by the tests (app, worker) keep their jobs in memory
+os.environ.setdefault('JOB_STORE', 'memory')
+
+
+@pytest.fixture
+def run_backend(tmp_path):
+    """Run a snippet in a fresh interpreter with the backend's stores under ``tmp_path``"""
+    def run(code, timeout=30, **env):
+        environment = {
+            **os.environ,
+            'JOB_STORE': 'memory',
+            'LLM_MODE': 'replay',
+            'SCHEDULE_DB_PATH': str(tmp_path / 'schedules.db'),
+            'WEBHOOK_DB_PATH': str(tmp_path / 'webhooks.db'),
+            **env
+        }
+        return subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=environment,
+                              capture_output=True, text=True, timeout=timeout)
+    return run
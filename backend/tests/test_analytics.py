@@ -0,0 +1,22 @@
+from analytics import DefectAnalytics, iso_week
+
+
+def test_iso_week_keeps_new_year_weeks_whole():
+    assert iso_week('2025-12-29') == '2026-W01'
+    assert iso_week('2026-01-04') == '2026-W01'
+    assert iso_week('2026-01-05') == '2026-W02'
+    assert iso_week('2021-01-03') == '2020-W53'
+
+
+def test_weekly_query_does_not_split_a_week_at_new_year(tmp_path):
+    analytics = DefectAnalytics(str(tmp_path / 'analytics.db'))
+    for test_id, day in (('a', '2025-12-30'), ('b', '2026-01-02')):
+        analytics.record_job({
+            'id': test_id,
+            'url': 'https://example.com/checkout',
+            'completed_at': f'{day}T12:00:00',
+            'report': {'scenarios': [], 'defects_and_gaps': [{'severity': 'High', 'feature': 'Checkout'}]}
+        })
+
+    result = analytics.query_defects(dimension='total', interval='week')
+    assert [(point['period'], point['count']) for point in result['series']] == [('2026-W01', 2)]
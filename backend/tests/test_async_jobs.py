@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+import app
+
+
+def test_async_completion_runs_off_the_event_loop(monkeypatch):
+    threads = {}
+
+    async def analyze(*args):
+        threads['loop'] = threading.get_ident()
+        return {'scenarios': []}
+
+    def complete(test_id, job, report):
+        threads['complete'] = threading.get_ident()
+
+    monkeypatch.setattr(app, 'PHASE_DELAY_SECONDS', 0)
+    monkeypatch.setattr(app.testing_engine, 'analyze_website_async', analyze)
+    monkeypatch.setattr(app, 'complete_job', complete)
+    record, job = app.create_job({'url': 'https://example.com'})
+    asyncio.run(app.run_job_record_async(record, job))
+
+    assert 'complete' in threads
+    assert threads['complete'] != threads['loop']
+
+
+def test_async_failure_is_stored_off_the_event_loop(monkeypatch):
+    threads = {}
+
+    async def analyze(*args):
+        threads['loop'] = threading.get_ident()
+        raise RuntimeError('LLM unavailable')
+
+    def fail(test_id, job, error):
+        threads['fail'] = (threading.get_ident(), str(error))
+
+    monkeypatch.setattr(app, 'PHASE_DELAY_SECONDS', 0)
+    monkeypatch.setattr(app.testing_engine, 'analyze_website_async', analyze)
+    monkeypatch.setattr(app, 'fail_job', fail)
+    record, job = app.create_job({'url': 'https://example.com'})
+    asyncio.run(app.run_job_record_async(record, job))
+
+    assert threads['fail'][1] == 'LLM unavailable'
+    assert threads['fail'][0] != threads['loop']
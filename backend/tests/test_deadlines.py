@@ -0,0 +1,29 @@
+import pytest
+
+import app
+from deadlines import deadline_seconds
+
+
+@pytest.mark.parametrize('value', ['nan', 'inf', '-inf', float('nan'), float('inf'), -1, 'soon'])
+def test_invalid_deadlines_are_rejected(value):
+    with pytest.raises(ValueError):
+        deadline_seconds(value)
+
+
+def test_valid_deadlines():
+    assert deadline_seconds('30') == 30.0
+    assert deadline_seconds(0) is None
+
+
+@pytest.mark.parametrize('path, payload', [
+    ('/api/start-testing', {'url': 'https://example.com', 'deadlineSeconds': 'nan'}),
+    ('/api/start-testing', {'url': 'https://example.com', 'deadlineSeconds': 'inf'}),
+    ('/api/start-batch', {'urls': ['https://example.com'], 'deadlineSeconds': 'inf'}),
+    ('/api/schedules', {'cron': '@daily', 'url': 'https://example.com', 'deadlineSeconds': 'nan'})
+])
+def test_non_finite_deadline_is_a_bad_request(path, payload, tmp_path, monkeypatch):
+    monkeypatch.setenv('SCHEDULE_DB_PATH', str(tmp_path / 'schedules.db'))
+    monkeypatch.setattr(app, 'schedule_store', None)
+    response = app.app.test_client().post(path, json=payload)
+    assert response.status_code == 400
+    assert 'deadline' in response.get_json()['error']
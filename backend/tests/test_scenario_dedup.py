@@ -0,0 +1,25 @@
+from scenario_dedup import dedupe_scenarios
+
+
+def scenario(scenario_id, browser, status='fail'):
+    return {
+        'id': scenario_id,
+        'title': 'Checkout button does nothing',
+        'category': 'Functional',
+        'browser': browser,
+        'steps': ['Open the cart', 'Click checkout'],
+        'status': status
+    }
+
+
+def test_duplicates_merge():
+    merged, removed = dedupe_scenarios([scenario('S1', 'chrome'), scenario('S2', 'firefox')], threshold=0.8)
+    assert removed == 1
+    assert merged[0]['merged_ids'] == ['S1', 'S2']
+
+
+def test_non_string_status_is_kept_unmerged():
+    scenarios = [scenario('S1', 'chrome'), scenario('S2', 'firefox', status=1), scenario('S3', 'safari'), 'not a scenario']
+    merged, removed = dedupe_scenarios(scenarios, threshold=0.8)
+    assert removed == 1
+    assert [item['id'] if isinstance(item, dict) else item for item in merged] == ['S1', 'S2', 'not a scenario']
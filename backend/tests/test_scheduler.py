@@ -0,0 +1,25 @@
+import pytest
+
+import app
+from scheduler import normalize_priority
+
+
+def test_normalize_priority():
+    assert normalize_priority(None) == 'interactive'
+    assert normalize_priority('Batch') == 'batch'
+    for value in (1, ['batch'], 'urgent'):
+        with pytest.raises(ValueError):
+            normalize_priority(value)
+
+
+@pytest.mark.parametrize('path, payload', [
+    ('/api/start-testing', {'url': 'https://example.com', 'priority': 1}),
+    ('/api/start-batch', {'urls': ['https://example.com'], 'priority': 1}),
+    ('/api/schedules', {'cron': '@daily', 'url': 'https://example.com', 'priority': 1})
+])
+def test_non_string_priority_is_a_bad_request(path, payload, tmp_path, monkeypatch):
+    monkeypatch.setenv('SCHEDULE_DB_PATH', str(tmp_path / 'schedules.db'))
+    monkeypatch.setattr(app, 'schedule_store', None)
+    response = app.app.test_client().post(path, json=payload)
+    assert response.status_code == 400
+    assert 'priority' in response.get_json()['error']
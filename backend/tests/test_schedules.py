@@ -0,0 +1,24 @@
+from schedules import ScheduleRunner, ScheduleStore
+
+
+def test_failed_launch_is_recorded(tmp_path):
+    store = ScheduleStore(str(tmp_path / 'schedules.db'))
+    schedule = store.create('nightly', '* * * * *', 'UTC', ['https://example.com'], {}, 0, now=0)
+
+    def launch(schedule, url):
+        raise RuntimeError('store unavailable')
+
+    runner = ScheduleRunner(store, launch, lambda test_id: None, max_active=4, poll_seconds=1)
+    runner.poll(schedule['next_tick'])
+
+    runs = store.runs(schedule['id'])
+    assert [run['state'] for run in runs] == ['failed']
+    assert runs[0]['finished_at'] is not None
+    assert store.active_runs() == []
+    assert runner.started == 0
+
+
+def test_start_schedule_runner_in_fresh_process(run_backend):
+    result = run_backend('import app; assert app.start_schedule_runner() is not None; print("started")')
+    assert result.returncode == 0, result.stderr
+    assert 'started' in result.stdout
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+from werkzeug.serving import make_server
+
+import webhook_receiver
+from webhooks import WebhookDispatcher, WebhookOutbox
+
+
+@pytest.fixture
+def receiver():
+    """Start ``webhook_receiver`` on an ephemeral port; returns (its app, the callback URL)"""
+    servers = []
+
+    def start(*argv):
+        app = webhook_receiver.create_app(webhook_receiver.parse_args(['--seed', '1', *argv]))
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return app, f'http://127.0.0.1:{server.server_port}/hooks/ci'
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def dispatch(tmp_path):
+    """Deliver one notification through a fast-retrying dispatcher; returns (outbox entry once settled, notification id)"""
+    pytest.importorskip('httpx')
+    dispatchers = []
+
+    def run(url, secret, max_attempts=10):
+        outbox = WebhookOutbox(str(tmp_path / 'webhooks.db'))
+        notification_id = outbox.enqueue('test-1', 'test.completed', url, {'status': 'completed', 'test_id': 'test-1'})
+        dispatcher = WebhookDispatcher(outbox, secret=secret, concurrency=2, timeout=5, allowed_hosts=['127.0.0.1'])
+        dispatcher.max_attempts = max_attempts
+        dispatcher.retry_base = dispatcher.retry_max = 0.05
+        dispatcher.idle_poll_seconds = 0.05
+        dispatchers.append(dispatcher)
+        dispatcher.start()
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            [entry] = outbox.list()
+            if entry['state'] in ('delivered', 'failed'):
+                return entry, notification_id
+            time.sleep(0.05)
+        raise AssertionError(f'Notification not settled: {outbox.list()}')
+
+    yield run
+    for dispatcher in dispatchers:
+        dispatcher.stop()
+
+
+def test_signed_delivery_is_accepted(receiver, dispatch):
+    app, url = receiver('--secret', 's3cret')
+    entry, notification_id = dispatch(url, 's3cret')
+    assert (entry['state'], entry['attempts'], entry['last_status']) == ('delivered', 1, 200)
+
+    client = app.test_client()
+    [delivery] = client.get('/deliveries').get_json()
+    assert delivery['id'] == notification_id
+    assert (delivery['path'], delivery['event'], delivery['attempt']) == ('/hooks/ci', 'test.completed', '1')
+    assert delivery['payload']['test_id'] == 'test-1'
+    assert client.get('/stats').get_json() == {
+        'requests': 1, 'accepted': 1, 'duplicates': 0, 'bad_signatures': 0, 'injected_errors': 0
+    }
+
+
+def test_server_errors_are_retried_under_the_same_id(receiver, dispatch):
+    app, url = receiver('--secret', 's3cret', '--fail-first', '2')
+    entry, notification_id = dispatch(url, 's3cret')
+    assert (entry['state'], entry['attempts'], entry['last_status']) == ('delivered', 3, 200)
+
+    client = app.test_client()
+    # The receiver counts attempts per X-Webhook-Id: a new id per retry would have been failed again
+    [delivery] = client.get('/deliveries').get_json()
+    assert (delivery['id'], delivery['attempt']) == (notification_id, '3')
+    assert app.config['RECEIVER_STATE'].attempts == {notification_id: 3}
+    stats = client.get('/stats').get_json()
+    assert (stats['requests'], stats['injected_errors'], stats['accepted']) == (3, 2, 1)
+
+
+def test_retryable_errors_give_up_after_max_attempts(receiver, dispatch):
+    app, url = receiver('--error-rate', '1', '--error-statuses', '429')
+    entry, _ = dispatch(url, '', max_attempts=3)
+    assert (entry['state'], entry['attempts'], entry['last_status'], entry['last_error']) == ('failed', 3, 429, 'HTTP 429')
+
+    client = app.test_client()
+    assert client.get('/deliveries').get_json() == []
+    stats = client.get('/stats').get_json()
+    assert (stats['requests'], stats['injected_errors'], stats['accepted']) == (3, 3, 0)
+
+
+def test_bad_signature_fails_without_retrying(receiver, dispatch):
+    app, url = receiver('--secret', 's3cret')
+    entry, _ = dispatch(url, 'wrong-secret')
+    assert (entry['state'], entry['attempts'], entry['last_status'], entry['last_error']) == ('failed', 1, 401, 'HTTP 401')
+
+    client = app.test_client()
+    assert client.get('/deliveries').get_json() == []
+    stats = client.get('/stats').get_json()
+    assert (stats['requests'], stats['bad_signatures'], stats['accepted']) == (1, 1, 0)
@@ -0,0 +1,128 @@
+import socket
+import time
+
+import pytest
+
+from webhooks import WebhookDispatcher, WebhookOutbox, validate_callback_url
+
+
+def public_address(host, port, *args, **kwargs):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('93.184.215.14', 0))]
+
+
+def test_start_webhook_dispatcher_in_fresh_process(run_backend):
+    result = run_backend('import app; assert app.start_webhook_dispatcher() is not None; print("started")')
+    assert result.returncode == 0, result.stderr
+    assert 'started' in result.stdout
+
+
+@pytest.mark.parametrize('url', ['http://[::1', 'http://', 'https:///hooks', 'ftp://hooks.example.com', 'http://host:99999/x'])
+def test_invalid_callback_urls_are_rejected(url):
+    with pytest.raises(ValueError):
+        validate_callback_url(url)
+
+
+def test_valid_callback_url(monkeypatch):
+    monkeypatch.setattr(socket, 'getaddrinfo', public_address)
+    assert validate_callback_url(' https://hooks.example.com/ci ') == 'https://hooks.example.com/ci'
+    assert validate_callback_url(None) is None
+
+
+@pytest.mark.parametrize('url', [
+    'http://127.0.0.1:8080/hook', 'http://localhost/hook', 'http://169.254.169.254/latest/meta-data',
+    'http://10.1.2.3/hook', 'http://192.168.0.10/hook', 'http://[::1]/hook', 'http://[::ffff:127.0.0.1]/hook',
+    'http://[fe80::1]/hook', 'http://0.0.0.0/hook', 'http://224.0.0.1/hook'
+])
+def test_non_public_callback_hosts_are_rejected(url):
+    with pytest.raises(ValueError, match='non-public address'):
+        validate_callback_url(url, allow_private=False, allowed_hosts=frozenset())
+
+
+def test_callback_host_resolving_to_private_address_is_rejected(monkeypatch):
+    monkeypatch.setattr(socket, 'getaddrinfo', lambda *args, **kwargs: [
+        (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('93.184.215.14', 0)),
+        (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.5', 0))
+    ])
+    with pytest.raises(ValueError, match='10.0.0.5'):
+        validate_callback_url('https://hooks.example.com/ci', allow_private=False, allowed_hosts=frozenset())
+
+
+def test_private_callback_hosts_can_be_allowed(monkeypatch):
+    assert validate_callback_url('http://127.0.0.1:8080/hook', allow_private=True) == 'http://127.0.0.1:8080/hook'
+    monkeypatch.setenv('WEBHOOK_ALLOW_PRIVATE', '0')
+    monkeypatch.setenv('WEBHOOK_ALLOWED_HOSTS', 'ci.internal, 10.1.2.3')
+    monkeypatch.setattr(socket, 'getaddrinfo', lambda *args, **kwargs: [
+        (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.5', 0))
+    ])
+    assert validate_callback_url('http://CI.internal/hook') == 'http://CI.internal/hook'
+    assert validate_callback_url('http://10.1.2.3/hook') == 'http://10.1.2.3/hook'
+    with pytest.raises(ValueError):
+        validate_callback_url('http://other.internal/hook')
+
+
+def test_start_testing_rejects_invalid_callback_url(run_backend):
+    result = run_backend(
+        'import app\n'
+        'response = app.app.test_client().post("/api/start-testing", '
+        'json={"url": "https://example.com", "callbackUrl": "http://[::1"})\n'
+        'print(response.status_code, response.get_json()["error"])'
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith('400 Invalid callbackUrl')
+
+
+def test_start_testing_rejects_metadata_callback_url(run_backend):
+    result = run_backend(
+        'import app\n'
+        'response = app.app.test_client().post("/api/start-testing", '
+        'json={"url": "https://example.com", "callbackUrl": "http://169.254.169.254/latest/meta-data"})\n'
+        'print(response.status_code, response.get_json()["error"])',
+        WEBHOOK_ALLOW_PRIVATE='0', WEBHOOK_ALLOWED_HOSTS=''
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith('400 callbackUrl host 169.254.169.254 resolves to non-public address')
+
+
+def test_delivery_to_non_public_address_fails_without_retrying(tmp_path):
+    pytest.importorskip('httpx')
+    outbox = WebhookOutbox(str(tmp_path / 'webhooks.db'))
+    # Stored before the host was blocked (or its DNS record changed since)
+    notification_id = outbox.enqueue('test-1', 'test.completed', 'http://127.0.0.1:9/hook', {'status': 'completed'})
+    dispatcher = WebhookDispatcher(outbox, secret='', concurrency=1, timeout=1, allow_private=False, allowed_hosts=())
+    dispatcher.idle_poll_seconds = 0.05
+    dispatcher.start()
+    try:
+        deadline = time.time() + 10
+        while time.time() < deadline and outbox.list(state='failed') == []:
+            time.sleep(0.05)
+        [failed] = outbox.list(state='failed')
+        assert failed['id'] == notification_id
+        assert failed['attempts'] == 1
+        assert failed['last_status'] is None
+        assert failed['last_error'] == 'Blocked non-public address 127.0.0.1'
+    finally:
+        dispatcher.stop()
+
+
+def test_undeliverable_url_fails_without_killing_the_thread(tmp_path):
+    pytest.importorskip('httpx')
+    outbox = WebhookOutbox(str(tmp_path / 'webhooks.db'))
+    # A malformed URL (stored before callback URLs were validated)
+    notification_id = outbox.enqueue('test-1', 'test.completed', 'http://[::1', {'status': 'completed'})
+    dispatcher = WebhookDispatcher(outbox, secret='', concurrency=1, timeout=1)
+    dispatcher.max_attempts = 2
+    dispatcher.retry_base = dispatcher.retry_max = 0.05
+    dispatcher.idle_poll_seconds = 0.05
+    dispatcher.start()
+    try:
+        deadline = time.time() + 10
+        while time.time() < deadline and outbox.list(state='failed') == []:
+            time.sleep(0.05)
+        [failed] = outbox.list(state='failed')
+        assert failed['id'] == notification_id
+        assert failed['attempts'] == 2
+        assert 'Invalid IPv6 URL' in failed['last_error']
+        assert all(thread.is_alive() for thread in dispatcher._threads)
+        assert dispatcher.metrics()['failures'] == 1
+    finally:
+        dispatcher.stop()
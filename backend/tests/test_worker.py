@@ -0,0 +1,28 @@
+import threading
+
+import worker
+
+
+class FlakyStore:
+    """Claims fail twice (e.g. ``database is locked``), then the queue is empty"""
+
+    def __init__(self, stop_event):
+        self.stop_event = stop_event
+        self.claims = 0
+
+    def claim_next(self, worker_id):
+        self.claims += 1
+        if self.claims <= 2:
+            raise RuntimeError('database is locked')
+        self.stop_event.set()
+        return None
+
+
+def test_claim_errors_do_not_end_the_worker_thread():
+    stop_event = threading.Event()
+    store = FlakyStore(stop_event)
+    thread = threading.Thread(target=worker.worker_loop, args=(store, 'w1', 0.01, stop_event, {}))
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert store.claims == 3
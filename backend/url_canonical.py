@@ -0,0 +1,63 @@
+"""
+URL canonicalization, so the same page always gets the same prompts, cassettes
+and template baseline.
+
+    HTTPS://Shop.Example.com:443/product/42/?utm_source=mail&b=2&a=1#reviews
+    -> https://shop.example.com/product/42?a=1&b=2
+
+Scheme and host are lowercased (paths are case-sensitive and kept), default
+ports, fragments and tracking parameters are dropped, the remaining query
+parameters are sorted and a trailing slash is removed from non-root paths.
+URLs without a scheme get ``https://``. ``URL_TRACKING_PARAMS`` adds
+parameter names (or ``prefix*`` patterns) to the built-in tracking list.
+"""
+import os
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = (
+    'utm_*', 'gclid', 'gclsrc', 'dclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid', 'yclid', 'twclid',
+    'ttclid', 'igshid', 'li_fat_id', 'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok'
+)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def tracking_patterns():
+    extra = [name.strip().lower() for name in os.getenv('URL_TRACKING_PARAMS', '').split(',') if name.strip()]
+    return TRACKING_PARAMS + tuple(extra)
+
+
+def is_tracking_param(name, patterns):
+    name = name.lower()
+    return any(name.startswith(pattern[:-1]) if pattern.endswith('*') else name == pattern for pattern in patterns)
+
+
+def canonicalize_url(url, patterns=None):
+    """Canonical form of a page URL (see module docstring); raises ValueError for URLs without a host"""
+    url = url.strip()
+    if '://' not in url:
+        url = f'https://{url}'
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if not host:
+        raise ValueError(f"Invalid URL: {url}")
+    if ':' in host:
+        host = f'[{host}]'  # IPv6 literal
+    netloc = host
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f'{host}:{parts.port}'
+    if parts.username:
+        credentials = parts.username + (f':{parts.password}' if parts.password else '')
+        netloc = f'{credentials}@{netloc}'
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    patterns = patterns if patterns is not None else tracking_patterns()
+    params = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+              if not is_tracking_param(name, patterns)]
+    query = urlencode(sorted(params))
+
+    return urlunsplit((scheme, netloc, path, query, ''))
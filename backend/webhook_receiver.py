@@ -0,0 +1,122 @@
+"""
+Local receiver for completion webhooks (see webhooks.py).
+
+    python webhook_receiver.py --port 8200 --secret s3cret --fail-first 2 --error-rate 0.1
+    WEBHOOK_SECRET=s3cret WEBHOOK_ALLOWED_HOSTS=localhost python app.py
+    curl -X POST localhost:5000/api/start-testing -H 'Content-Type: application/json' \\
+        -d '{"url": "https://example.com", "callbackUrl": "http://localhost:8200/hooks"}'
+
+Accepts notifications POSTed to any path. With ``--secret`` the HMAC
+signature is checked and a bad or stale one is answered with 401. Failures
+can be injected to exercise the outbox's retries: ``--fail-first`` fails the
+first attempts of every notification, ``--error-rate`` a random share of
+requests (with ``--error-statuses``), and ``--latency`` delays each answer.
+``GET /deliveries`` lists the accepted notifications (duplicates of one
+``X-Webhook-Id`` counted once), ``GET /stats`` reports what was received.
+"""
+import argparse
+import random
+import threading
+import time
+
+from flask import Flask, jsonify, request
+
+from webhooks import verify_signature
+
+
+class ReceiverState:
+    """Deliveries and counters shared by request threads"""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.deliveries = {}
+        self.attempts = {}
+        self.stats = {'requests': 0, 'accepted': 0, 'duplicates': 0, 'bad_signatures': 0, 'injected_errors': 0}
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def attempt(self, notification_id):
+        """Attempt number of a notification as seen by this receiver"""
+        with self.lock:
+            self.attempts[notification_id] = self.attempts.get(notification_id, 0) + 1
+            return self.attempts[notification_id]
+
+    def accept(self, notification_id, delivery):
+        with self.lock:
+            if notification_id in self.deliveries:
+                self.stats['duplicates'] += 1
+                return
+            self.deliveries[notification_id] = delivery
+            self.stats['accepted'] += 1
+
+
+def create_app(options):
+    app = Flask(__name__)
+    state = ReceiverState(options.seed)
+    app.config['RECEIVER_STATE'] = state
+
+    @app.route('/', defaults={'path': ''}, methods=['POST'])
+    @app.route('/<path:path>', methods=['POST'])
+    def receive(path):
+        state.count('requests')
+        body = request.get_data()
+        if options.secret and not verify_signature(options.secret, request.headers.get('X-Webhook-Timestamp'), body,
+                                                   request.headers.get('X-Webhook-Signature')):
+            state.count('bad_signatures')
+            return jsonify({'error': 'Invalid signature'}), 401
+
+        notification_id = request.headers.get('X-Webhook-Id', '')
+        attempt = state.attempt(notification_id)
+        if options.latency:
+            time.sleep(options.latency)
+        with state.lock:
+            injected = state.rng.random() < options.error_rate
+            status = state.rng.choice(options.error_statuses)
+        if attempt <= options.fail_first or injected:
+            state.count('injected_errors')
+            return jsonify({'error': 'Injected failure'}), status if injected else options.error_statuses[0]
+
+        state.accept(notification_id, {
+            'id': notification_id,
+            'path': '/' + path,
+            'event': request.headers.get('X-Webhook-Event'),
+            'attempt': request.headers.get('X-Webhook-Attempt'),
+            'received_at': time.time(),
+            'payload': request.get_json(silent=True)
+        })
+        return jsonify({'status': 'received'})
+
+    @app.route('/deliveries', methods=['GET'])
+    def deliveries():
+        with state.lock:
+            return jsonify(list(state.deliveries.values()))
+
+    @app.route('/stats', methods=['GET'])
+    def stats():
+        with state.lock:
+            return jsonify(dict(state.stats))
+
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local receiver for completion webhooks")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8200)
+    parser.add_argument('--secret', default=None, help="WEBHOOK_SECRET of the API; signatures are checked when set")
+    parser.add_argument('--fail-first', type=int, default=0, help="attempts of every notification answered with an error")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with an injected error")
+    parser.add_argument('--error-statuses', type=lambda value: [int(item) for item in value.split(',')],
+                        default=[500, 503, 429])
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds before answering")
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    options = parse_args()
+    print(f"Webhook receiver listening on http://{options.host}:{options.port}")
+    create_app(options).run(host=options.host, port=options.port, threaded=True)
@@ -0,0 +1,466 @@
+"""
+Completion webhooks with a durable outbox.
+
+A job started with ``callbackUrl`` (``/api/start-testing``, or on
+``/api/start-batch`` and schedules for every job they start) gets a compact
+summary POSTed there when it completes or fails: status, confidence score,
+scenario and defect counts (per severity) and a link to the full report
+(``WEBHOOK_REPORT_BASE_URL`` + ``/api/test-results/<id>``).
+
+Notifications are written to an outbox in SQLite (``WEBHOOK_DB_PATH``, default
+``backend/data/webhooks.db``) by whichever process finished the job, and
+delivered by ``WebhookDispatcher`` threads (``WEBHOOK_CONCURRENCY``, default 4)
+over one keep-alive connection pool, so deliveries survive restarts and every
+process sharing the outbox helps deliver:
+
+- A 2xx response delivers a notification. Network errors, timeouts
+  (``WEBHOOK_TIMEOUT_SECONDS``, default 10), 408, 429 and 5xx are retried
+  with exponential backoff (``WEBHOOK_RETRY_BASE_SECONDS`` doubling per
+  attempt, default 5, at most ``WEBHOOK_RETRY_MAX_SECONDS``, default 3600,
+  with jitter) up to ``WEBHOOK_MAX_ATTEMPTS`` (default 10); other 4xx
+  responses and exhausted retries leave it ``failed`` until retried through
+  the API.
+- A claimed notification is leased for ``WEBHOOK_LEASE_SECONDS`` (default 60);
+  one whose sender died is picked up again once the lease runs out, so a
+  receiver may see a notification twice and should dedupe on
+  ``X-Webhook-Id``.
+- With ``WEBHOOK_SECRET`` set, requests carry ``X-Webhook-Signature:
+  sha256=<hex>``, the HMAC-SHA256 of ``<X-Webhook-Timestamp>.<body>``; see
+  ``verify_signature`` (and webhook_receiver.py for a receiver).
+- Callback hosts must resolve to public addresses: loopback, link-local
+  (cloud metadata), private, reserved and multicast addresses are rejected
+  when the job is started and again before every attempt (a blocked address
+  fails the notification for good). ``WEBHOOK_ALLOW_PRIVATE=1`` lifts this,
+  and hosts named in ``WEBHOOK_ALLOWED_HOSTS`` (comma-separated) are always
+  allowed, e.g. for receivers on an internal network.
+"""
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Mapping
+from urllib.parse import urlsplit
+
+from job_store import BACKEND_DIR, connect_sqlite
+from scheduler import wait_summary
+
+DEFAULT_DB_PATH = os.path.join(BACKEND_DIR, 'data', 'webhooks.db')
+
+EVENTS = {'completed': 'test.completed', 'failed': 'test.failed'}
+
+# Statuses worth another attempt (besides network errors and timeouts)
+RETRYABLE_STATUSES = (408, 429)
+
+# Delivered notifications are kept this long for the outbox listing
+DELIVERED_RETENTION_SECONDS = 7 * 24 * 3600
+
+# How often an idle dispatcher drops old delivered notifications
+PRUNE_INTERVAL_SECONDS = 3600
+
+# Signed requests older than this are rejected by verify_signature
+SIGNATURE_TOLERANCE_SECONDS = 300
+
+# Delivery latency samples kept
+LATENCY_SAMPLES = 1000
+
+USER_AGENT = 'exploratory-testing-webhooks/1.0'
+
+
+def callback_host_policy():
+    """(allow private addresses, hosts always allowed) for callbacks, from the environment"""
+    allow_private = os.getenv('WEBHOOK_ALLOW_PRIVATE', '0') == '1'
+    allowed_hosts = frozenset(host.strip().lower().rstrip('.')
+                              for host in os.getenv('WEBHOOK_ALLOWED_HOSTS', '').split(',') if host.strip())
+    return allow_private, allowed_hosts
+
+
+def blocked_address(hostname, allow_private=False, allowed_hosts=(), resolve=None):
+    """The first non-public address a callback host resolves to (None when callbacks may go there); raises OSError when it does not resolve"""
+    hostname = hostname.lower().rstrip('.')
+    if allow_private or hostname in allowed_hosts:
+        return None
+    try:
+        addresses = [ipaddress.ip_address(hostname)]
+    except ValueError:
+        # Drop IPv6 zone ids (fe80::1%eth0), which ip_address rejects
+        addresses = [ipaddress.ip_address(info[4][0].split('%')[0])
+                     for info in (resolve or socket.getaddrinfo)(hostname, None, type=socket.SOCK_STREAM)]
+    for address in addresses:
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            return address
+    return None
+
+
+def validate_callback_url(url, allow_private=None, allowed_hosts=None):
+    """The callback URL of a start payload (None when not given); raises ValueError unless it is an http(s) URL whose host is allowed
+
+    Hosts that do not resolve yet are accepted; delivery checks them again.
+    """
+    if url is None or url == '':
+        return None
+    if not isinstance(url, str):
+        raise ValueError('callbackUrl must be an http(s) URL')
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        # Reading the port validates it
+        parts.port
+    except ValueError as e:
+        raise ValueError(f'Invalid callbackUrl: {str(e)}')
+    if parts.scheme.lower() not in ('http', 'https') or not parts.hostname:
+        raise ValueError('callbackUrl must be an http(s) URL with a host')
+    if allow_private is None or allowed_hosts is None:
+        env_allow_private, env_allowed_hosts = callback_host_policy()
+        allow_private = env_allow_private if allow_private is None else allow_private
+        allowed_hosts = env_allowed_hosts if allowed_hosts is None else allowed_hosts
+    try:
+        address = blocked_address(parts.hostname, allow_private, allowed_hosts)
+    except OSError:
+        return url
+    if address is not None:
+        raise ValueError(f'callbackUrl host {parts.hostname} resolves to non-public address {address}; '
+                         f'set WEBHOOK_ALLOW_PRIVATE=1 or list the host in WEBHOOK_ALLOWED_HOSTS to allow it')
+    return url
+
+
+def sign(secret, timestamp, body):
+    digest = hmac.new(secret.encode('utf-8'), f'{timestamp}.'.encode('ascii') + body, hashlib.sha256).hexdigest()
+    return f'sha256={digest}'
+
+
+def verify_signature(secret, timestamp, body, signature, now=None, tolerance=SIGNATURE_TOLERANCE_SECONDS):
+    """Whether a request's ``X-Webhook-Signature`` matches its body and its timestamp is recent"""
+    try:
+        age = abs((time.time() if now is None else now) - int(timestamp))
+    except (TypeError, ValueError):
+        return False
+    if age > tolerance or not signature:
+        return False
+    return hmac.compare_digest(sign(secret, timestamp, body), signature)
+
+
+def retry_delay(attempt, base, cap, rng=random):
+    """Seconds before attempt ``attempt + 1``: exponential, capped, with jitter so retries do not synchronize"""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay * rng.uniform(0.5, 1.0)
+
+
+def job_summary(record, event, report_base_url=''):
+    """Compact notification payload of a finished job record"""
+    report = record.get('report') or {}
+    # Reports of the memory store are compact records (Mappings, not dicts)
+    defects = [defect for defect in report.get('defects_and_gaps') or [] if isinstance(defect, Mapping)]
+    scenarios = [scenario for scenario in report.get('scenarios') or [] if isinstance(scenario, Mapping)]
+    severities = {}
+    for defect in defects:
+        severity = str(defect.get('severity') or 'Medium').strip().lower()
+        severities[severity] = severities.get(severity, 0) + 1
+    summary = {
+        'event': event,
+        'test_id': record['id'],
+        'url': record['url'],
+        'status': record['status'],
+        'confidence_score': report.get('confidence_score'),
+        'scenarios': len(scenarios),
+        'failed_scenarios': sum(1 for scenario in scenarios if str(scenario.get('status', '')).lower() == 'fail'),
+        'defects': len(defects),
+        'defects_by_severity': severities,
+        'report_url': f"{report_base_url.rstrip('/')}/api/test-results/{record['id']}",
+        'created_at': record.get('created_at'),
+        'completed_at': record.get('completed_at')
+    }
+    for field in ('batch_id', 'schedule_id', 'error'):
+        if record.get(field):
+            summary[field] = record[field]
+    if record.get('timed_out'):
+        summary['timed_out'] = True
+    return summary
+
+
+class WebhookOutbox:
+    """Notifications waiting for (or done with) delivery, in SQLite"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('WEBHOOK_DB_PATH', DEFAULT_DB_PATH)
+        self._local = threading.local()
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS outbox (
+                id TEXT PRIMARY KEY,
+                test_id TEXT NOT NULL,
+                event TEXT NOT NULL,
+                url TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                lease_until REAL,
+                last_status INTEGER,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                delivered_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS outbox_state_next ON outbox (state, next_attempt);
+            CREATE INDEX IF NOT EXISTS outbox_test ON outbox (test_id);
+        ''')
+
+    @property
+    def conn(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect_sqlite(self.path)
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, test_id, event, url, payload, now=None):
+        now = time.time() if now is None else now
+        notification_id = str(uuid.uuid4())
+        self.conn.execute(
+            "INSERT INTO outbox (id, test_id, event, url, payload, state, next_attempt, created_at) "
+            "VALUES (?, ?, ?, ?, ?, 'pending', ?, ?)",
+            (notification_id, test_id, event, url, json.dumps(payload), now, now)
+        )
+        return notification_id
+
+    def claim(self, now, lease_seconds):
+        """Lease the next due notification (or one whose lease ran out); None when nothing is due"""
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                "SELECT id, test_id, event, url, payload, attempts FROM outbox "
+                "WHERE (state = 'pending' AND next_attempt <= ?) OR (state = 'delivering' AND lease_until <= ?) "
+                "ORDER BY next_attempt LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE outbox SET state = 'delivering', lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    (now + lease_seconds, row[0])
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        notification_id, test_id, event, url, payload, attempts = row
+        return {'id': notification_id, 'test_id': test_id, 'event': event, 'url': url,
+                'payload': payload, 'attempt': attempts + 1}
+
+    def delivered(self, notification_id, status, now):
+        self.conn.execute(
+            "UPDATE outbox SET state = 'delivered', last_status = ?, last_error = NULL, delivered_at = ?, lease_until = NULL "
+            "WHERE id = ?",
+            (status, now, notification_id)
+        )
+
+    def retry_later(self, notification_id, next_attempt, status, error):
+        self.conn.execute(
+            "UPDATE outbox SET state = 'pending', next_attempt = ?, last_status = ?, last_error = ?, lease_until = NULL "
+            "WHERE id = ?",
+            (next_attempt, status, error, notification_id)
+        )
+
+    def give_up(self, notification_id, status, error):
+        self.conn.execute(
+            "UPDATE outbox SET state = 'failed', last_status = ?, last_error = ?, lease_until = NULL WHERE id = ?",
+            (status, error, notification_id)
+        )
+
+    def requeue(self, notification_id, now=None):
+        """Queue a failed notification for delivery again, with a fresh set of attempts"""
+        return bool(self.conn.execute(
+            "UPDATE outbox SET state = 'pending', attempts = 0, next_attempt = ? WHERE id = ? AND state = 'failed'",
+            (time.time() if now is None else now, notification_id)
+        ).rowcount)
+
+    def next_due(self):
+        """Time of the next pending attempt or lease expiry (None when the outbox is idle)"""
+        return self.conn.execute(
+            "SELECT MIN(CASE WHEN state = 'pending' THEN next_attempt ELSE lease_until END) FROM outbox "
+            "WHERE state IN ('pending', 'delivering')"
+        ).fetchone()[0]
+
+    def prune(self, now):
+        self.conn.execute("DELETE FROM outbox WHERE state = 'delivered' AND delivered_at < ?",
+                          (now - DELIVERED_RETENTION_SECONDS,))
+
+    def list(self, test_id=None, state=None, limit=100):
+        query = ('SELECT id, test_id, event, url, state, attempts, next_attempt, last_status, last_error, created_at, '
+                 'delivered_at FROM outbox')
+        conditions, parameters = [], []
+        if test_id:
+            conditions.append('test_id = ?')
+            parameters.append(test_id)
+        if state:
+            conditions.append('state = ?')
+            parameters.append(state)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        rows = self.conn.execute(query + ' ORDER BY created_at DESC LIMIT ?', parameters + [limit]).fetchall()
+        columns = ('id', 'test_id', 'event', 'url', 'state', 'attempts', 'next_attempt', 'last_status', 'last_error',
+                   'created_at', 'delivered_at')
+        return [dict(zip(columns, row)) for row in rows]
+
+    def counts(self):
+        counts = dict(self.conn.execute('SELECT state, COUNT(*) FROM outbox GROUP BY state').fetchall())
+        oldest = self.conn.execute("SELECT MIN(created_at) FROM outbox WHERE state IN ('pending', 'delivering')").fetchone()[0]
+        counts['oldest_pending_seconds'] = round(time.time() - oldest, 1) if oldest is not None else None
+        return counts
+
+
+def build_http_client(concurrency, timeout):
+    """Keep-alive pool shared by the delivery threads (imported lazily, like the LLM clients)"""
+    import httpx
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency, keepalive_expiry=60)
+    return httpx.Client(limits=limits, timeout=timeout, headers={'User-Agent': USER_AGENT})
+
+
+class WebhookDispatcher:
+    """Threads delivering the outbox's due notifications"""
+
+    def __init__(self, outbox, secret=None, concurrency=None, timeout=None, allow_private=None, allowed_hosts=None):
+        self.outbox = outbox
+        env_allow_private, env_allowed_hosts = callback_host_policy()
+        self.allow_private = env_allow_private if allow_private is None else allow_private
+        self.allowed_hosts = env_allowed_hosts if allowed_hosts is None else frozenset(allowed_hosts)
+        self.secret = secret if secret is not None else os.getenv('WEBHOOK_SECRET') or None
+        self.concurrency = concurrency or int(os.getenv('WEBHOOK_CONCURRENCY', '4'))
+        self.timeout = timeout or float(os.getenv('WEBHOOK_TIMEOUT_SECONDS', '10'))
+        self.max_attempts = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', '10'))
+        self.retry_base = float(os.getenv('WEBHOOK_RETRY_BASE_SECONDS', '5'))
+        self.retry_max = float(os.getenv('WEBHOOK_RETRY_MAX_SECONDS', '3600'))
+        self.lease_seconds = float(os.getenv('WEBHOOK_LEASE_SECONDS', '60'))
+        # Idle threads still look for notifications enqueued by other processes
+        self.idle_poll_seconds = float(os.getenv('WEBHOOK_POLL_SECONDS', '5'))
+        self.http_client = None
+        self._pruned_at = 0.0
+        self._wake = threading.Condition()
+        self._stop = False
+        self._threads = []
+        self._lock = threading.Lock()
+        self.delivered = 0
+        self.retries = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def start(self):
+        if self._threads:
+            return
+        self.http_client = build_http_client(self.concurrency, self.timeout)
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self.run, name=f'webhook-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        with self._wake:
+            self._stop = True
+            self._wake.notify_all()
+
+    def notify(self):
+        """Wake an idle thread for a notification just enqueued"""
+        with self._wake:
+            self._wake.notify()
+
+    def run(self):
+        while not self._stop:
+            try:
+                wait = self.work()
+            except Exception as e:
+                # One bad row or a locked database must not end the thread
+                print(f"Error delivering webhooks: {str(e)}")
+                wait = self.idle_poll_seconds
+            with self._wake:
+                if not self._stop and wait > 0:
+                    self._wake.wait(wait)
+
+    def work(self):
+        """Deliver one due notification, or prune when idle; returns how long to wait before the next look"""
+        notification = self.outbox.claim(time.time(), self.lease_seconds)
+        if notification is not None:
+            self.deliver(notification)
+            return 0
+        next_due = self.outbox.next_due()
+        if time.time() - self._pruned_at > PRUNE_INTERVAL_SECONDS:
+            self._pruned_at = time.time()
+            self.outbox.prune(self._pruned_at)
+        return self.idle_poll_seconds if next_due is None else min(self.idle_poll_seconds, next_due - time.time())
+
+    def request_headers(self, notification, body):
+        timestamp = str(int(time.time()))
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Webhook-Id': notification['id'],
+            'X-Webhook-Event': notification['event'],
+            'X-Webhook-Attempt': str(notification['attempt']),
+            'X-Webhook-Timestamp': timestamp
+        }
+        if self.secret:
+            headers['X-Webhook-Signature'] = sign(self.secret, timestamp, body)
+        return headers
+
+    def deliver(self, notification):
+        body = notification['payload'].encode('utf-8')
+        started = time.perf_counter()
+        status, error, blocked = None, None, None
+        try:
+            # Resolve again: DNS may have changed since the job was started
+            blocked = blocked_address(urlsplit(notification['url']).hostname or '',
+                                      self.allow_private, self.allowed_hosts)
+        except Exception as e:
+            # Unresolvable hosts and malformed URLs are failed attempts
+            error = f"{type(e).__name__}: {str(e)}"
+        if blocked is not None:
+            error = f"Blocked non-public address {blocked}"
+        elif error is None:
+            try:
+                response = self.http_client.post(notification['url'], content=body,
+                                                 headers=self.request_headers(notification, body))
+                status = response.status_code
+                if not 200 <= status < 300:
+                    error = f"HTTP {status}"
+            except Exception as e:
+                # Network errors, timeouts and URLs the client rejects are all failed attempts
+                error = f"{type(e).__name__}: {str(e)}"
+        now = time.time()
+        with self._lock:
+            self.latencies.append(time.perf_counter() - started)
+        if error is None:
+            self.outbox.delivered(notification['id'], status, now)
+            with self._lock:
+                self.delivered += 1
+            return
+        retryable = blocked is None and (status is None or status >= 500 or status in RETRYABLE_STATUSES)
+        if retryable and notification['attempt'] < self.max_attempts:
+            delay = retry_delay(notification['attempt'], self.retry_base, self.retry_max)
+            self.outbox.retry_later(notification['id'], now + delay, status, error)
+            with self._lock:
+                self.retries += 1
+            return
+        print(f"Giving up on webhook {notification['id']} to {notification['url']} after "
+              f"{notification['attempt']} attempts: {error}")
+        self.outbox.give_up(notification['id'], status, error)
+        with self._lock:
+            self.failures += 1
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'concurrency': self.concurrency,
+                'signed': bool(self.secret),
+                'delivered': self.delivered,
+                'retries': self.retries,
+                'failures': self.failures,
+                'latency_seconds': wait_summary(self.latencies)
+            }
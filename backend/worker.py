@@ -0,0 +1,112 @@
+"""
+Standalone job worker.
+
+Run the API with ``JOB_STORE=sqlite`` (e.g. ``gunicorn -w 4 app:app``) and start
+one or more workers against the same ``JOB_STORE_PATH``:
+
+    JOB_STORE=sqlite python worker.py --concurrency 8
+
+Each worker thread claims the next queued job (by priority and owner fairness,
+see scheduler.py) from the shared SQLite store
+and runs it with the regular ``TestingEngine``, so API and job workers can be
+scaled independently. Jobs cancelled through the API are noticed within
+``--cancel-poll-interval`` seconds and aborted, closing their open LLM requests.
+"""
+import argparse
+import os
+import threading
+import time
+
+os.environ.setdefault('JOB_STORE', 'sqlite')
+
+import app
+from job_store import SQLiteJobStore, new_worker_id
+
+
+def worker_loop(store, worker_id, poll_interval, stop_event, running):
+    """Claim and run jobs until asked to stop"""
+    while not stop_event.is_set():
+        try:
+            record = store.claim_next(worker_id)
+        except Exception as e:
+            # A locked database or an unreadable row must not end the thread
+            print(f"[{worker_id}] Error claiming a job: {str(e)}")
+            stop_event.wait(poll_interval)
+            continue
+        if record is None:
+            stop_event.wait(poll_interval)
+            continue
+        print(f"[{worker_id}] Running job {record['id']} for {record['url']}")
+        job = app.JobContext.for_record(record)
+        running[record['id']] = job.cancel
+        try:
+            app.run_job_record(record, job)
+        finally:
+            running.pop(record['id'], None)
+        print(f"[{worker_id}] Finished job {record['id']}")
+
+
+def cancel_watcher(store, running, interval, stop_event):
+    """Cancel this process's running jobs once the API has marked them cancelled"""
+    while not stop_event.wait(interval):
+        try:
+            cancelled = store.cancelled_ids(list(running))
+        except Exception as e:
+            print(f"Error checking for cancelled jobs: {str(e)}")
+            continue
+        for test_id in cancelled:
+            token = running.get(test_id)
+            if token is not None and not token.cancelled:
+                print(f"Cancelling job {test_id}")
+                token.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run testing jobs from the shared job store")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('WORKER_CONCURRENCY', '4')),
+                        help="Number of jobs this process runs at the same time")
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help="Seconds to wait before polling again when the queue is empty")
+    parser.add_argument('--cancel-poll-interval', type=float, default=1.0,
+                        help="Seconds between checks for running jobs cancelled through the API")
+    args = parser.parse_args()
+
+    if not isinstance(app.job_store, SQLiteJobStore):
+        parser.error("worker.py requires JOB_STORE=sqlite so jobs are shared with the API")
+
+    # Size the LLM connection pool for this process's slots and open connections before the first job
+    app.llm_pool_concurrency = args.concurrency
+    app.prewarm_llm_pool()
+    # Completion webhooks of this process's jobs (and any left in the outbox) are delivered from here
+    app.start_webhook_dispatcher()
+
+    stop_event = threading.Event()
+    running = {}
+    threads = []
+    for _ in range(args.concurrency):
+        thread = threading.Thread(
+            target=worker_loop,
+            args=(app.job_store, new_worker_id(), args.poll_interval, stop_event, running),
+            daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    threading.Thread(
+        target=cancel_watcher,
+        args=(app.job_store, running, args.cancel_poll_interval, stop_event),
+        daemon=True
+    ).start()
+
+    print(f"Worker started with {args.concurrency} slots on {app.job_store.path}")
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping worker, waiting for running jobs to finish...")
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+
+
+if __name__ == '__main__':
+    main()
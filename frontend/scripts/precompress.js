@@ -0,0 +1,43 @@
+// Write .br and .gz copies of the compressible files of the production build,
+// so the backend can serve them without compressing on every request.
+//
+//   node scripts/precompress.js [build dir]   (runs after `npm run build`)
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+
+const COMPRESSIBLE = /\.(js|css|html|json|svg|txt|map|ico)$/;
+// Smaller files gain little and cost a round of decompression
+const MIN_BYTES = 1024;
+
+const walk = (dir) => fs.readdirSync(dir, { withFileTypes: true }).flatMap(entry => {
+  const fullPath = path.join(dir, entry.name);
+  return entry.isDirectory() ? walk(fullPath) : [fullPath];
+});
+
+const buildDir = path.resolve(process.argv[2] || 'build');
+let original = 0;
+let brotli = 0;
+let gzip = 0;
+
+walk(buildDir)
+  .filter(file => COMPRESSIBLE.test(file))
+  .forEach(file => {
+    const data = fs.readFileSync(file);
+    if (data.length < MIN_BYTES) return;
+    const br = zlib.brotliCompressSync(data, {
+      params: {
+        [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+        [zlib.constants.BROTLI_PARAM_SIZE_HINT]: data.length
+      }
+    });
+    const gz = zlib.gzipSync(data, { level: zlib.constants.Z_BEST_COMPRESSION });
+    fs.writeFileSync(`${file}.br`, br);
+    fs.writeFileSync(`${file}.gz`, gz);
+    original += data.length;
+    brotli += br.length;
+    gzip += gz.length;
+  });
+
+const kb = (bytes) => `${(bytes / 1024).toFixed(1)} KB`;
+console.log(`Precompressed ${kb(original)} of assets: brotli ${kb(brotli)}, gzip ${kb(gzip)}`);
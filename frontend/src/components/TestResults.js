@@ -1,7 +1,5 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useMemo, useRef, useDeferredValue } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import html2canvas from 'html2canvas';
-import jsPDF from 'jspdf';
 import {
   Container,
   Paper,
@@ -52,9 +50,11 @@ import {
   Cancel,
   ErrorOutline,
   FilterList,
-  Clear
+  Clear,
+  Timeline
 } from '@mui/icons-material';
 import axios from 'axios';
+import VirtualList from './VirtualList';
 import JSONPretty from 'react-json-pretty';
 import 'react-json-pretty/themes/monikai.css';
 
@@ -65,6 +65,8 @@ const TestResults = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [progress, setProgress] = useState(0);
+  const [cancelling, setCancelling] = useState(false);
+  const statusRef = useRef(null);
   
   // Filter states
   const [showFilters, setShowFilters] = useState(false);
@@ -88,7 +90,7 @@ const TestResults = () => {
   useEffect(() => {
     fetchResults();
     const interval = setInterval(() => {
-      if (!results || results.status === 'running') {
+      if (!statusRef.current || statusRef.current === 'running' || statusRef.current === 'queued') {
         fetchResults();
       }
     }, 3000);
@@ -99,10 +101,11 @@ const TestResults = () => {
   const fetchResults = async () => {
     try {
       const response = await axios.get(`/api/test-results/${testId}`);
+      statusRef.current = response.data.status;
       setResults(response.data);
       setProgress(response.data.progress || 0);
       
-      if (response.data.status === 'completed' || response.data.status === 'failed') {
+      if (['completed', 'failed', 'cancelled'].includes(response.data.status)) {
         setLoading(false);
       }
     } catch (err) {
@@ -212,236 +215,45 @@ const TestResults = () => {
     return 'fail';
   };
 
+  const cancelTest = async () => {
+    setCancelling(true);
+    try {
+      await axios.delete(`/api/test-results/${testId}`);
+    } catch (err) {
+      // 409 means the test finished first; the refresh below shows its results
+      if (err.response?.status !== 409) {
+        setError('Failed to cancel the test');
+      }
+    }
+    await fetchResults();
+    setCancelling(false);
+  };
+
   const downloadReport = async () => {
+    const downloadButton = document.querySelector('button[aria-label="Download Report"]');
+    const originalText = downloadButton?.textContent;
+
     try {
       // Show loading state
-      const downloadButton = document.querySelector('button[aria-label="Download Report"]');
-      const originalText = downloadButton?.textContent;
-      
       if (downloadButton) {
         downloadButton.textContent = 'Generating PDF...';
         downloadButton.disabled = true;
       }
 
-      // Get the main container element that contains all the test results
-      const element = document.querySelector('[data-testid="test-results-container"]');
-      
-      if (!element) {
-        throw new Error('Test results container not found');
-      }
-
-      // Get the bounding rectangle to understand the actual position
-      const rect = element.getBoundingClientRect();
-      const bodyRect = document.body.getBoundingClientRect();
-      
-      // Calculate the actual offset from the body
-      const offsetX = rect.left - bodyRect.left;
-      const offsetY = rect.top - bodyRect.top;
-
-      // Scroll to top to ensure consistent capture
-      window.scrollTo(0, 0);
-      
-      // Wait for scroll to complete
-      await new Promise(resolve => setTimeout(resolve, 100));
-
-      // Temporarily expand all accordions for full capture
-      const accordions = document.querySelectorAll('.MuiAccordion-root');
-      const accordionStates = [];
-      
-      accordions.forEach((accordion, index) => {
-        const summary = accordion.querySelector('.MuiAccordionSummary-root');
-        const details = accordion.querySelector('.MuiAccordionDetails-root');
-        const isExpanded = accordion.classList.contains('Mui-expanded');
-        
-        accordionStates.push({ accordion, isExpanded });
-        
-        if (!isExpanded && summary) {
-          summary.click();
-        }
+      // The backend renders a vector PDF from the report JSON and caches it per report version
+      const response = await axios.get(`/api/test-results/${testId}/report`, {
+        params: { format: 'pdf' },
+        responseType: 'blob'
       });
-
-      // Wait for accordions to expand
-      await new Promise(resolve => setTimeout(resolve, 500));
-
-      // Configure html2canvas options for full page capture
-      // Use document.body but crop to our element's area
-      const canvas = await html2canvas(document.body, {
-        height: element.scrollHeight + offsetY + 100, // Add some padding
-        width: Math.max(element.scrollWidth + offsetX + 100, window.innerWidth), // Ensure full width
-        useCORS: true,
-        allowTaint: true,
-        scale: 1,
-        scrollX: 0,
-        scrollY: 0,
-        x: 0,
-        y: 0,
-        windowWidth: window.innerWidth,
-        windowHeight: window.innerHeight,
-        logging: false,
-        backgroundColor: '#ffffff',
-        removeContainer: false,
-        foreignObjectRendering: true,
-        imageTimeout: 15000,
-        onclone: (clonedDoc, element) => {
-          // Remove any potential transform or positioning issues
-          clonedDoc.body.style.transform = 'none';
-          clonedDoc.body.style.position = 'static';
-          clonedDoc.body.style.overflow = 'visible';
-          
-          // Ensure the test results container is properly positioned
-          const clonedContainer = clonedDoc.querySelector('[data-testid="test-results-container"]');
-          if (clonedContainer) {
-            clonedContainer.style.height = 'auto';
-            clonedContainer.style.overflow = 'visible';
-            clonedContainer.style.position = 'static';
-            clonedContainer.style.transform = 'none';
-            clonedContainer.style.left = '0';
-            clonedContainer.style.top = '0';
-            clonedContainer.style.margin = '0 auto'; // Center the container
-            clonedContainer.style.maxWidth = 'none';
-          }
-          
-          // Fix any elements with positioning issues
-          const allElements = clonedDoc.querySelectorAll('*');
-          allElements.forEach(el => {
-            const computed = window.getComputedStyle(el);
-            if (computed.position === 'fixed' || computed.position === 'sticky') {
-              el.style.position = 'static';
-            }
-            // Remove any transforms that might cause offset
-            if (computed.transform && computed.transform !== 'none') {
-              el.style.transform = 'none';
-            }
-          });
-          
-          // Expand all accordions in clone
-          const clonedAccordions = clonedDoc.querySelectorAll('.MuiAccordion-root');
-          clonedAccordions.forEach(accordion => {
-            accordion.classList.add('Mui-expanded');
-            const details = accordion.querySelector('.MuiAccordionDetails-root');
-            if (details) {
-              details.style.display = 'block';
-              details.style.height = 'auto';
-            }
-          });
-
-          // Show all collapsed content
-          const collapsedElements = clonedDoc.querySelectorAll('.MuiCollapse-hidden, .MuiCollapse-wrapper');
-          collapsedElements.forEach(element => {
-            element.style.height = 'auto';
-            element.style.overflow = 'visible';
-          });
-        }
-      });
-
-      // Crop the canvas to just the content area we want
-      const croppedCanvas = document.createElement('canvas');
-      const croppedCtx = croppedCanvas.getContext('2d');
-      
-      // Set the cropped canvas dimensions to match our element
-      croppedCanvas.width = element.scrollWidth;
-      croppedCanvas.height = element.scrollHeight;
-      
-      // Draw the relevant portion of the original canvas
-      croppedCtx.drawImage(
-        canvas,
-        offsetX, offsetY, // Source x, y (where to start cropping from)
-        element.scrollWidth, element.scrollHeight, // Source width, height
-        0, 0, // Destination x, y (top-left of new canvas)
-        element.scrollWidth, element.scrollHeight // Destination width, height
-      );
-
-      // Restore original accordion states
-      accordionStates.forEach(({ accordion, isExpanded }) => {
-        if (!isExpanded) {
-          const summary = accordion.querySelector('.MuiAccordionSummary-root');
-          if (summary) {
-            summary.click();
-          }
-        }
-      });
-
-      // Create PDF with appropriate dimensions
-      const imgData = croppedCanvas.toDataURL('image/png', 0.95);
-      
-      // Calculate proper dimensions
-      const canvasWidth = croppedCanvas.width;
-      const canvasHeight = croppedCanvas.height;
-      
-      // A4 dimensions in mm
-      const a4Width = 210;
-      const a4Height = 297;
-      
-      // Calculate scaling to fit width
-      const scale = a4Width / (canvasWidth * 0.264583); // Convert pixels to mm (96 DPI)
-      const scaledWidth = a4Width;
-      const scaledHeight = (canvasHeight * 0.264583) * scale;
-      
-      // Create PDF in portrait mode
-      const pdf = new jsPDF('p', 'mm', 'a4');
-      
-      let position = 0;
-      let remainingHeight = scaledHeight;
-      
-      // If content fits in one page
-      if (scaledHeight <= a4Height) {
-        pdf.addImage(imgData, 'PNG', 0, 0, scaledWidth, scaledHeight);
-      } else {
-        // Multiple pages needed
-        const pageHeight = a4Height;
-        let sourceY = 0;
-        let pageNumber = 1;
-        
-        while (remainingHeight > 0) {
-          const heightToAdd = Math.min(pageHeight, remainingHeight);
-          const sourceHeight = (heightToAdd / scale) / 0.264583; // Convert back to pixels
-          
-          // Create canvas for this page section
-          const pageCanvas = document.createElement('canvas');
-          const pageCtx = pageCanvas.getContext('2d');
-          pageCanvas.width = canvasWidth;
-          pageCanvas.height = sourceHeight;
-          
-          // Draw the section of the original canvas
-          pageCtx.drawImage(croppedCanvas, 0, sourceY, canvasWidth, sourceHeight, 0, 0, canvasWidth, sourceHeight);
-          
-          const pageImgData = pageCanvas.toDataURL('image/png', 0.95);
-          
-          if (pageNumber > 1) {
-            pdf.addPage();
-          }
-          
-          pdf.addImage(pageImgData, 'PNG', 0, 0, scaledWidth, heightToAdd);
-          
-          sourceY += sourceHeight;
-          remainingHeight -= heightToAdd;
-          pageNumber++;
-        }
-      }
-
-      // Generate filename with timestamp
-      const timestamp = new Date().toISOString().slice(0, 19).replace(/[:.]/g, '-');
-      const filename = `test-report-${testId}-${timestamp}.pdf`;
-
-      // Download the PDF
-      pdf.save(filename);
-
-      // Reset button state
-      if (downloadButton) {
-        downloadButton.textContent = originalText || 'Download Report';
-        downloadButton.disabled = false;
-      }
+      const link = document.createElement('a');
+      link.href = URL.createObjectURL(response.data);
+      link.setAttribute('download', `test-report-${testId}.pdf`);
+      link.click();
+      URL.revokeObjectURL(link.href);
 
     } catch (error) {
       console.error('Error generating PDF:', error);
       
-      // Reset button state
-      const downloadButton = document.querySelector('button[aria-label="Download Report"]');
-      if (downloadButton) {
-        downloadButton.textContent = 'Download Report';
-        downloadButton.disabled = false;
-      }
-      
       // Show error message to user
       alert('Failed to generate PDF. Downloading JSON report instead.');
       
@@ -453,9 +265,55 @@ const TestResults = () => {
       linkElement.setAttribute('href', dataUri);
       linkElement.setAttribute('download', exportFileDefaultName);
       linkElement.click();
+    } finally {
+      // Reset button state
+      if (downloadButton) {
+        downloadButton.textContent = originalText || 'Download Report';
+        downloadButton.disabled = false;
+      }
+    }
+  };
+
+  const downloadFile = async (path, params, filename, label) => {
+    try {
+      const response = await axios.get(path, { params, responseType: 'blob' });
+      const link = document.createElement('a');
+      link.href = URL.createObjectURL(response.data);
+      link.setAttribute('download', filename);
+      link.click();
+      URL.revokeObjectURL(link.href);
+    } catch (err) {
+      console.error(`Error exporting ${label}:`, err);
+      alert(`Failed to export ${label}.`);
     }
   };
 
+  const downloadTimeline = (format) =>
+    downloadFile(`/api/test-results/${testId}/timeline`, { format }, `timeline-${testId}.${format}`, 'timeline');
+
+  const downloadExport = (format) =>
+    downloadFile(
+      `/api/test-results/${testId}/export`,
+      { format },
+      `report-${testId}.${format === 'junit' ? 'xml' : format}`,
+      'report'
+    );
+
+  const getSpanColor = (name) => {
+    if (name === 'queue') return '#9e9e9e';
+    if (name === 'progress_delay') return '#bdbdbd';
+    if (name.startsWith('llm.')) return '#1976d2';
+    if (name.startsWith('parse.')) return '#f57c00';
+    return '#2e7d32';
+  };
+
+  const formatSpanAttributes = (attributes) => {
+    return Object.entries(attributes || {})
+      .filter(([, value]) => value !== null && value !== undefined && value !== '')
+      .map(([key, value]) => `${key}: ${value}`)
+      .join(' · ');
+  };
+
   // Filter functions
   const handleFilterChange = (filterName, value) => {
     setFilters(prev => ({
@@ -474,39 +332,91 @@ const TestResults = () => {
     });
   };
 
-  const getFilteredScenarios = (scenarios) => {
-    if (!scenarios) return [];
+  const addToIndex = (index, key, position) => {
+    if (!index.has(key)) {
+      index.set(key, []);
+    }
+    index.get(key).push(position);
+  };
+
+  const buildScenarioIndex = (scenarios) => {
+    const indexes = { status: new Map(), type: new Map(), platform: new Map(), browser: new Map() };
 
     // Enrich scenarios with a stable displayed ID that matches what the table shows
-    const enriched = scenarios.map((scenario, idx) => ({
-      ...scenario,
-      _displayId: scenario.test_id || `T${String(idx + 1).padStart(3, '0')}`
-    }));
+    const rows = (scenarios || []).map((scenario, idx) => {
+      const row = {
+        ...scenario,
+        _displayId: scenario.test_id || `T${String(idx + 1).padStart(3, '0')}`,
+        _status: deriveStatus(scenario)
+      };
+      addToIndex(indexes.status, row._status.toLowerCase(), idx);
+      addToIndex(indexes.type, (scenario.type || scenario.category || '').toLowerCase(), idx);
+      addToIndex(indexes.platform, (scenario.platform || '').toLowerCase(), idx);
+      addToIndex(indexes.browser, (scenario.browser || '').toLowerCase(), idx);
+      return row;
+    });
 
-    return enriched.filter(scenario => {
-      const scenarioStatus = deriveStatus(scenario);
-      const scenarioId = scenario._displayId;
-      const scenarioType = scenario.type || scenario.category || '';
-      const scenarioPlatform = scenario.platform || '';
-      const scenarioBrowser = scenario.browser || '';
-
-      return (
-        (filters.testId === '' || scenarioId.toLowerCase().includes(filters.testId.toLowerCase())) &&
-        (filters.type === '' || scenarioType.toLowerCase().includes(filters.type.toLowerCase())) &&
-        (filters.platform === '' || scenarioPlatform.toLowerCase().includes(filters.platform.toLowerCase())) &&
-        (filters.browser === '' || scenarioBrowser.toLowerCase().includes(filters.browser.toLowerCase())) &&
-        (filters.status === '' || scenarioStatus.toLowerCase() === filters.status.toLowerCase())
-      );
+    return { rows, indexes };
+  };
+
+  const buildBrowserScenarioIndex = (scenarios) => {
+    const indexes = { status: new Map(), affectedBrowser: new Map(), affectedPlatform: new Map() };
+    const listValues = (value) => (Array.isArray(value) ? value : [value || '']);
+
+    const rows = (scenarios || []).map((scenario, idx) => {
+      addToIndex(indexes.status, (scenario.status || '').toLowerCase(), idx);
+      listValues(scenario.affected_browsers).forEach(browser =>
+        addToIndex(indexes.affectedBrowser, String(browser).toLowerCase(), idx));
+      listValues(scenario.affected_platforms).forEach(platform =>
+        addToIndex(indexes.affectedPlatform, String(platform).toLowerCase(), idx));
+      return {
+        ...scenario,
+        _displayId: scenario.id || `BC-${String(idx + 1).padStart(3, '0')}`
+      };
     });
+
+    return { rows, indexes };
+  };
+
+  // Intersect the index buckets of every active filter (status matches exactly, the
+  // other fields by substring), then apply the free-text ID filter to the survivors
+  const filterIndexedRows = ({ rows, indexes }, activeFilters) => {
+    let candidates = null;
+
+    Object.entries(indexes).forEach(([field, index]) => {
+      const value = activeFilters[field];
+      if (!value) return;
+      const needle = value.toLowerCase();
+      const matched = new Set();
+      index.forEach((positions, key) => {
+        if (field === 'status' ? key === needle : key.includes(needle)) {
+          positions.forEach(position => matched.add(position));
+        }
+      });
+      candidates = candidates === null
+        ? matched
+        : new Set([...candidates].filter(position => matched.has(position)));
+    });
+
+    const selected = candidates === null
+      ? rows
+      : [...candidates].sort((a, b) => a - b).map(position => rows[position]);
+
+    if (!activeFilters.testId) {
+      return selected;
+    }
+    const idNeedle = activeFilters.testId.toLowerCase();
+    return selected.filter(row => row._displayId.toLowerCase().includes(idNeedle));
   };
 
   const getUniqueValues = (scenarios, field) => {
     if (!scenarios) return [];
-    const values = scenarios.map(scenario => {
+    // Merged scenarios list every browser and platform they cover
+    const values = scenarios.flatMap(scenario => {
       switch(field) {
         case 'type': return scenario.type || scenario.category || '';
-        case 'platform': return scenario.platform || '';
-        case 'browser': return scenario.browser || '';
+        case 'platform': return scenario.platforms || scenario.platform || '';
+        case 'browser': return scenario.browsers || scenario.browser || '';
         case 'status': return deriveStatus(scenario);
         default: return '';
       }
@@ -531,33 +441,6 @@ const TestResults = () => {
     });
   };
 
-  const getFilteredBrowserScenarios = (scenarios) => {
-    if (!scenarios) return [];
-
-    const enriched = scenarios.map((scenario, idx) => ({
-      ...scenario,
-      _displayId: scenario.id || `BC-${String(idx + 1).padStart(3, '0')}`
-    }));
-
-    return enriched.filter(scenario => {
-      const scenarioId = scenario._displayId;
-      const scenarioStatus = scenario.status || '';
-      const affectedBrowsers = Array.isArray(scenario.affected_browsers) ? 
-        scenario.affected_browsers.join(' ').toLowerCase() : 
-        (scenario.affected_browsers || '').toLowerCase();
-      const affectedPlatforms = Array.isArray(scenario.affected_platforms) ? 
-        scenario.affected_platforms.join(' ').toLowerCase() : 
-        (scenario.affected_platforms || '').toLowerCase();
-
-      return (
-        (browserFilters.testId === '' || scenarioId.toLowerCase().includes(browserFilters.testId.toLowerCase())) &&
-        (browserFilters.status === '' || scenarioStatus.toLowerCase() === browserFilters.status.toLowerCase()) &&
-        (browserFilters.affectedBrowser === '' || affectedBrowsers.includes(browserFilters.affectedBrowser.toLowerCase())) &&
-        (browserFilters.affectedPlatform === '' || affectedPlatforms.includes(browserFilters.affectedPlatform.toLowerCase()))
-      );
-    });
-  };
-
   const getUniqueBrowserValues = (scenarios, field) => {
     if (!scenarios) return [];
     const values = [];
@@ -587,6 +470,55 @@ const TestResults = () => {
     return [...new Set(values.filter(v => v !== ''))].sort();
   };
 
+  const report = results?.report;
+  const scenarios = report?.scenarios;
+  const browserScenarios = report?.browser_compatibility_scenarios;
+
+  // Typing in a filter field re-renders immediately; the filtering itself runs
+  // against the deferred value so large reports do not block keystrokes
+  const deferredFilters = useDeferredValue(filters);
+  const deferredBrowserFilters = useDeferredValue(browserFilters);
+
+  const scenarioIndex = useMemo(() => buildScenarioIndex(scenarios), [scenarios]);
+  const browserScenarioIndex = useMemo(() => buildBrowserScenarioIndex(browserScenarios), [browserScenarios]);
+
+  const filteredScenarios = useMemo(
+    () => filterIndexedRows(scenarioIndex, deferredFilters),
+    [scenarioIndex, deferredFilters]
+  );
+  const filteredBrowserScenarios = useMemo(
+    () => filterIndexedRows(browserScenarioIndex, deferredBrowserFilters),
+    [browserScenarioIndex, deferredBrowserFilters]
+  );
+
+  const scenarioOptions = useMemo(() => ({
+    type: getUniqueValues(scenarios, 'type'),
+    platform: getUniqueValues(scenarios, 'platform'),
+    browser: getUniqueValues(scenarios, 'browser')
+  }), [scenarios]);
+  const browserScenarioOptions = useMemo(() => ({
+    status: getUniqueBrowserValues(browserScenarios, 'status'),
+    affectedBrowser: getUniqueBrowserValues(browserScenarios, 'affectedBrowser'),
+    affectedPlatform: getUniqueBrowserValues(browserScenarios, 'affectedPlatform')
+  }), [browserScenarios]);
+
+  const scenariosHaveObserved = useMemo(() => hasObservedResults(scenarios), [scenarios]);
+  const browserScenariosHaveObserved = useMemo(() => hasObservedResults(browserScenarios), [browserScenarios]);
+
+  const statusCounts = useMemo(() => {
+    const counts = { passed: 0, failed: 0, warning: 0 };
+    const statuses = [
+      ...scenarioIndex.rows.map(row => row._status),
+      ...(browserScenarios || []).map(deriveStatus)
+    ];
+    statuses.forEach(status => {
+      if (status === 'pass' || status === 'passed') counts.passed++;
+      else if (status === 'fail' || status === 'failed') counts.failed++;
+      else if (status === 'warning') counts.warning++;
+    });
+    return counts;
+  }, [scenarioIndex, browserScenarios]);
+
   if (error) {
     return (
       <Container maxWidth="lg" sx={{ mt: 4 }}>
@@ -605,7 +537,9 @@ const TestResults = () => {
           <Box sx={{ display: 'flex', alignItems: 'center', mb: 3 }}>
             <CircularProgress sx={{ mr: 2 }} />
             <Typography variant="h5">
-              {results?.status === 'running' ? 'Testing in Progress...' : 'Loading Results...'}
+              {results?.status === 'running'
+                ? 'Testing in Progress...'
+                : results?.status === 'queued' ? 'Waiting for a free testing slot...' : 'Loading Results...'}
             </Typography>
           </Box>
           
@@ -621,12 +555,36 @@ const TestResults = () => {
           <Typography color="text.secondary">
             Please wait while we analyze your application...
           </Typography>
+
+          {(results?.status === 'queued' || results?.status === 'running') && (
+            <Button
+              variant="outlined"
+              color="error"
+              startIcon={<Cancel />}
+              onClick={cancelTest}
+              disabled={cancelling}
+              sx={{ mt: 3 }}
+            >
+              {cancelling ? 'Cancelling...' : 'Cancel Test'}
+            </Button>
+          )}
         </Paper>
       </Container>
     );
   }
 
-  const report = results.report;
+  if (results.status === 'cancelled') {
+    return (
+      <Container maxWidth="lg" sx={{ mt: 4 }}>
+        <Alert severity="info">
+          The test of {results.url} was cancelled{results.cancelled_at ? ` at ${new Date(results.cancelled_at).toLocaleString()}` : ''}.
+        </Alert>
+        <Button startIcon={<ArrowBack />} onClick={() => navigate('/')} sx={{ mt: 2 }}>
+          Back to Dashboard
+        </Button>
+      </Container>
+    );
+  }
 
   // Calculate overall score as average of all category scores
   const calculateOverallScore = () => {
@@ -646,20 +604,31 @@ const TestResults = () => {
 
   const overallScore = calculateOverallScore();
 
+  const timeline = results.timeline || [];
+  const timelineDuration = Math.max(
+    ...timeline.map(span => span.start_offset + span.duration),
+    0.001
+  );
+
   return (
     <Container maxWidth="lg" sx={{ mt: 4, mb: 4 }} data-testid="test-results-container">
       <Box sx={{ mb: 3, display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
         <Button startIcon={<ArrowBack />} onClick={() => navigate('/')}>
           Back to Dashboard
         </Button>
-        <Button 
-          variant="outlined" 
-          startIcon={<Download />} 
-          onClick={downloadReport}
-          aria-label="Download Report"
-        >
-          Download Report
-        </Button>
+        <Box sx={{ display: 'flex', gap: 1 }}>
+          <Button size="small" onClick={() => downloadExport('csv')}>CSV</Button>
+          <Button size="small" onClick={() => downloadExport('jsonl')}>JSONL</Button>
+          <Button size="small" onClick={() => downloadExport('junit')}>JUnit XML</Button>
+          <Button 
+            variant="outlined" 
+            startIcon={<Download />} 
+            onClick={downloadReport}
+            aria-label="Download Report"
+          >
+            Download Report
+          </Button>
+        </Box>
       </Box>
 
       <Grid container spacing={3}>
@@ -683,6 +652,12 @@ const TestResults = () => {
                 />
               )} */}
             </Box>
+            {report.timed_out && (
+              <Alert severity="warning">
+                Partial report: the test hit its {results.deadline_seconds ? `${results.deadline_seconds}s ` : ''}deadline
+                during {(report.timed_out_stages || []).join(', ')}. Results below cover only what finished in time.
+              </Alert>
+            )}
           </Paper>
         </Grid>
 
@@ -746,10 +721,7 @@ const TestResults = () => {
                       borderRadius: 2
                     }}>
                       <Typography variant="h4" sx={{ fontWeight: 'bold' }}>
-                        {[...(report.scenarios || []), ...(report.browser_compatibility_scenarios || [])].filter(s => {
-                          const status = deriveStatus(s);
-                          return status === 'pass' || status === 'passed';
-                        }).length || 0}
+                        {statusCounts.passed}
                       </Typography>
                       <Typography variant="body2">
                         Passed
@@ -765,10 +737,7 @@ const TestResults = () => {
                       borderRadius: 2
                     }}>
                       <Typography variant="h4" sx={{ fontWeight: 'bold' }}>
-                        {[...(report.scenarios || []), ...(report.browser_compatibility_scenarios || [])].filter(s => {
-                          const status = deriveStatus(s);
-                          return status === 'fail' || status === 'failed';
-                        }).length || 0}
+                        {statusCounts.failed}
                       </Typography>
                       <Typography variant="body2">
                         Failed
@@ -784,7 +753,7 @@ const TestResults = () => {
                       borderRadius: 2
                     }}>
                       <Typography variant="h4" sx={{ fontWeight: 'bold' }}>
-                        {[...(report.scenarios || []), ...(report.browser_compatibility_scenarios || [])].filter(s => deriveStatus(s) === 'warning').length || 0}
+                        {statusCounts.warning}
                       </Typography>
                       <Typography variant="body2">
                         Warnings
@@ -945,11 +914,11 @@ const TestResults = () => {
 
         {/* Test Scenarios */}
         <Grid item xs={12}>
-          <Accordion defaultExpanded>
+          <Accordion defaultExpanded TransitionProps={{ unmountOnExit: true }}>
             <AccordionSummary expandIcon={<ExpandMore />}>
               <Typography variant="h6">
                 <Assessment sx={{ mr: 1, verticalAlign: 'middle' }} />
-                Test Scenarios ({getFilteredScenarios(report.scenarios).length} of {report.scenarios?.length || 0})
+                Test Scenarios ({filteredScenarios.length} of {report.scenarios?.length || 0})
               </Typography>
               <Box sx={{ ml: 'auto', mr: 2 }}>
                 <IconButton 
@@ -993,7 +962,7 @@ const TestResults = () => {
                           label="Type"
                         >
                           <MenuItem value="">All Types</MenuItem>
-                          {getUniqueValues(report.scenarios, 'type').map(type => (
+                          {scenarioOptions.type.map(type => (
                             <MenuItem key={type} value={type}>{type}</MenuItem>
                           ))}
                         </Select>
@@ -1008,7 +977,7 @@ const TestResults = () => {
                           label="Platform"
                         >
                           <MenuItem value="">All Platforms</MenuItem>
-                          {getUniqueValues(report.scenarios, 'platform').map(platform => (
+                          {scenarioOptions.platform.map(platform => (
                             <MenuItem key={platform} value={platform}>{platform}</MenuItem>
                           ))}
                         </Select>
@@ -1023,7 +992,7 @@ const TestResults = () => {
                           label="Browser"
                         >
                           <MenuItem value="">All Browsers</MenuItem>
-                          {getUniqueValues(report.scenarios, 'browser').map(browser => (
+                          {scenarioOptions.browser.map(browser => (
                             <MenuItem key={browser} value={browser}>{browser}</MenuItem>
                           ))}
                         </Select>
@@ -1064,64 +1033,79 @@ const TestResults = () => {
               {/* Results Table */}
               {report.scenarios && report.scenarios.length > 0 ? (
                 <TableContainer component={Paper} variant="outlined">
-                  <Table>
-                    <TableHead>
-                      <TableRow>
-                        <TableCell><strong>Test ID</strong></TableCell>
-                        <TableCell><strong>Test Case</strong></TableCell>
-                        <TableCell><strong>Type</strong></TableCell>
-                        <TableCell><strong>Platform</strong></TableCell>
-                        <TableCell><strong>Browser</strong></TableCell>
-                        <TableCell><strong>Expected</strong></TableCell>
-                        {hasObservedResults(report.scenarios) && <TableCell><strong>Observed</strong></TableCell>}
-                        <TableCell><strong>Status</strong></TableCell>
+                  <VirtualList
+                    items={filteredScenarios}
+                    estimatedItemHeight={73}
+                    renderSpacer={(height, key) => (
+                      <TableRow key={key}>
+                        <TableCell colSpan={scenariosHaveObserved ? 8 : 7} sx={{ p: 0, height, border: 0 }} />
                       </TableRow>
-                    </TableHead>
-                    <TableBody>
-            {getFilteredScenarios(report.scenarios).map((scenario, index) => (
-                        <TableRow key={index} hover>
-              <TableCell>{scenario._displayId || scenario.test_id || `T${String(index + 1).padStart(3, '0')}`}</TableCell>
-                          <TableCell>
-                            <Typography variant="body2" sx={{ fontWeight: 'medium', textAlign: 'justify' }}>
-                              {scenario.title || scenario.test_case || 'N/A'}
+                    )}
+                    renderContainer={(rows) => (
+                      <Table stickyHeader>
+                        <TableHead>
+                          <TableRow>
+                            <TableCell><strong>Test ID</strong></TableCell>
+                            <TableCell><strong>Test Case</strong></TableCell>
+                            <TableCell><strong>Type</strong></TableCell>
+                            <TableCell><strong>Platform</strong></TableCell>
+                            <TableCell><strong>Browser</strong></TableCell>
+                            <TableCell><strong>Expected</strong></TableCell>
+                            {scenariosHaveObserved && <TableCell><strong>Observed</strong></TableCell>}
+                            <TableCell><strong>Status</strong></TableCell>
+                          </TableRow>
+                        </TableHead>
+                        <TableBody>{rows}</TableBody>
+                      </Table>
+                    )}
+                    renderItem={(scenario, index) => (
+                      <TableRow key={index} hover>
+                        <TableCell>{scenario._displayId || scenario.test_id || `T${String(index + 1).padStart(3, '0')}`}</TableCell>
+                        <TableCell>
+                          <Typography variant="body2" sx={{ fontWeight: 'medium', textAlign: 'justify' }}>
+                            {scenario.title || scenario.test_case || 'N/A'}
+                          </Typography>
+                          {scenario.steps && (
+                            <Typography variant="caption" color="text.secondary" sx={{ mt: 0.5, display: 'block', textAlign: 'justify' }}>
+                              Steps: {Array.isArray(scenario.steps) ? scenario.steps.join(', ') : scenario.steps}
                             </Typography>
-                            {scenario.steps && (
-                              <Typography variant="caption" color="text.secondary" sx={{ mt: 0.5, display: 'block', textAlign: 'justify' }}>
-                                Steps: {Array.isArray(scenario.steps) ? scenario.steps.join(', ') : scenario.steps}
-                              </Typography>
-                            )}
-                          </TableCell>
-                          <TableCell>{scenario.type || scenario.category || 'Functional'}</TableCell>
-                          <TableCell>{scenario.platform || 'Web'}</TableCell>
-                          <TableCell>{scenario.browser || 'Chrome'}</TableCell>
-                          <TableCell>
-                            <Typography variant="body2" sx={{ maxWidth: 200, wordBreak: 'break-word' }}>
-                              {scenario.expected_result || scenario.expected || 'N/A'}
+                          )}
+                          {scenario.merged_count > 1 && (
+                            <Typography variant="caption" color="text.secondary" sx={{ mt: 0.5, display: 'block' }}>
+                              Merged from {scenario.merged_count} similar scenarios
                             </Typography>
-                          </TableCell>
-                          {hasObservedResults(report.scenarios) && (
-                            <TableCell>
-                              <Typography variant="body2" sx={{ maxWidth: 200, wordBreak: 'break-word' }}>
-                                {scenario.observed_result || scenario.observed || 'N/A'}
-                              </Typography>
-                            </TableCell>
                           )}
+                        </TableCell>
+                        <TableCell>{scenario.type || scenario.category || 'Functional'}</TableCell>
+                        <TableCell>{scenario.platform || 'Web'}</TableCell>
+                        <TableCell>{scenario.browser || 'Chrome'}</TableCell>
+                        <TableCell>
+                          <Typography variant="body2" sx={{ maxWidth: 200, wordBreak: 'break-word' }}>
+                            {scenario.expected_result || scenario.expected || 'N/A'}
+                          </Typography>
+                        </TableCell>
+                        {scenariosHaveObserved && (
                           <TableCell>
-                            <Box sx={{ display: 'flex', alignItems: 'center', gap: 1 }}>
-                              {getStatusIcon(deriveStatus(scenario))}
-                              <Chip 
-                                label={deriveStatus(scenario)} 
-                                size="small"
-                                color={getStatusColor(deriveStatus(scenario))}
-                                variant="outlined"
-                              />
-                            </Box>
+                            <Typography variant="body2" sx={{ maxWidth: 200, wordBreak: 'break-word' }}>
+                              {scenario.observed_result || scenario.observed || 'N/A'}
+                            </Typography>
                           </TableCell>
-                        </TableRow>
-                      ))}
-                    </TableBody>
-                  </Table>
-                  {getFilteredScenarios(report.scenarios).length === 0 && (
+                        )}
+                        <TableCell>
+                          <Box sx={{ display: 'flex', alignItems: 'center', gap: 1 }}>
+                            {getStatusIcon(scenario._status)}
+                            <Chip 
+                              label={scenario._status} 
+                              size="small"
+                              color={getStatusColor(scenario._status)}
+                              variant="outlined"
+                            />
+                          </Box>
+                        </TableCell>
+                      </TableRow>
+                    )}
+                  />
+                  {filteredScenarios.length === 0 && (
                     <Box sx={{ p: 3, textAlign: 'center' }}>
                       <Typography color="text.secondary">
                         No scenarios match the current filters
@@ -1136,11 +1120,11 @@ const TestResults = () => {
           </Accordion>
         </Grid>        {/* Browser Compatibility Testing */}
         <Grid item xs={12}>
-          <Accordion>
+          <Accordion TransitionProps={{ unmountOnExit: true }}>
             <AccordionSummary expandIcon={<ExpandMore />}>
               <Typography variant="h6">
                 <Speed sx={{ mr: 1, verticalAlign: 'middle' }} />
-                Browser Compatibility Testing ({getFilteredBrowserScenarios(report.browser_compatibility_scenarios).length} of {report.browser_compatibility_scenarios?.length || 0})
+                Browser Compatibility Testing ({filteredBrowserScenarios.length} of {report.browser_compatibility_scenarios?.length || 0})
               </Typography>
               <Box sx={{ ml: 'auto', mr: 2 }}>
                 <IconButton 
@@ -1184,7 +1168,7 @@ const TestResults = () => {
                           label="Status"
                         >
                           <MenuItem value="">All Status</MenuItem>
-                          {getUniqueBrowserValues(report.browser_compatibility_scenarios, 'status').map(status => (
+                          {browserScenarioOptions.status.map(status => (
                             <MenuItem key={status} value={status}>{status}</MenuItem>
                           ))}
                         </Select>
@@ -1199,7 +1183,7 @@ const TestResults = () => {
                           label="Affected Browser"
                         >
                           <MenuItem value="">All Browsers</MenuItem>
-                          {getUniqueBrowserValues(report.browser_compatibility_scenarios, 'affectedBrowser').map(browser => (
+                          {browserScenarioOptions.affectedBrowser.map(browser => (
                             <MenuItem key={browser} value={browser}>{browser}</MenuItem>
                           ))}
                         </Select>
@@ -1214,7 +1198,7 @@ const TestResults = () => {
                           label="Affected Platform"
                         >
                           <MenuItem value="">All Platforms</MenuItem>
-                          {getUniqueBrowserValues(report.browser_compatibility_scenarios, 'affectedPlatform').map(platform => (
+                          {browserScenarioOptions.affectedPlatform.map(platform => (
                             <MenuItem key={platform} value={platform}>{platform}</MenuItem>
                           ))}
                         </Select>
@@ -1239,74 +1223,84 @@ const TestResults = () => {
               {/* Browser Compatibility Results Table */}
               {report.browser_compatibility_scenarios && report.browser_compatibility_scenarios.length > 0 ? (
                 <TableContainer component={Paper} variant="outlined">
-                  <Table>
-                    <TableHead>
-                      <TableRow>
-                        <TableCell><strong>Test ID</strong></TableCell>
-                        <TableCell><strong>Test Case</strong></TableCell>
-                        <TableCell><strong>Expected</strong></TableCell>
-                        {hasObservedResults(report.browser_compatibility_scenarios) && <TableCell><strong>Observed</strong></TableCell>}
-                        <TableCell><strong>Affected Browsers</strong></TableCell>
-                        <TableCell><strong>Affected Platforms</strong></TableCell>
-                        <TableCell><strong>Status</strong></TableCell>
+                  <VirtualList
+                    items={filteredBrowserScenarios}
+                    estimatedItemHeight={73}
+                    renderSpacer={(height, key) => (
+                      <TableRow key={key}>
+                        <TableCell colSpan={browserScenariosHaveObserved ? 7 : 6} sx={{ p: 0, height, border: 0 }} />
                       </TableRow>
-                    </TableHead>
-                    <TableBody>
-                      {getFilteredBrowserScenarios(report.browser_compatibility_scenarios).map((scenario, index) => (
-                        <TableRow key={index} hover>
-                          <TableCell>{scenario._displayId || scenario.id || `BC-${String(index + 1).padStart(3, '0')}`}</TableCell>
-                          <TableCell>
-                            <Typography variant="body2" sx={{ fontWeight: 'medium', textAlign: 'justify' }}>
-                              {scenario.title || scenario.test_case || 'N/A'}
+                    )}
+                    renderContainer={(rows) => (
+                      <Table stickyHeader>
+                        <TableHead>
+                          <TableRow>
+                            <TableCell><strong>Test ID</strong></TableCell>
+                            <TableCell><strong>Test Case</strong></TableCell>
+                            <TableCell><strong>Expected</strong></TableCell>
+                            {browserScenariosHaveObserved && <TableCell><strong>Observed</strong></TableCell>}
+                            <TableCell><strong>Affected Browsers</strong></TableCell>
+                            <TableCell><strong>Affected Platforms</strong></TableCell>
+                            <TableCell><strong>Status</strong></TableCell>
+                          </TableRow>
+                        </TableHead>
+                        <TableBody>{rows}</TableBody>
+                      </Table>
+                    )}
+                    renderItem={(scenario, index) => (
+                      <TableRow key={index} hover>
+                        <TableCell>{scenario._displayId || scenario.id || `BC-${String(index + 1).padStart(3, '0')}`}</TableCell>
+                        <TableCell>
+                          <Typography variant="body2" sx={{ fontWeight: 'medium', textAlign: 'justify' }}>
+                            {scenario.title || scenario.test_case || 'N/A'}
+                          </Typography>
+                          {scenario.steps && (
+                            <Typography variant="caption" color="text.secondary" sx={{ mt: 0.5, display: 'block', textAlign: 'justify' }}>
+                              Steps: {Array.isArray(scenario.steps) ? scenario.steps.join(', ') : scenario.steps}
                             </Typography>
-                            {scenario.steps && (
-                              <Typography variant="caption" color="text.secondary" sx={{ mt: 0.5, display: 'block', textAlign: 'justify' }}>
-                                Steps: {Array.isArray(scenario.steps) ? scenario.steps.join(', ') : scenario.steps}
-                              </Typography>
-                            )}
-                          </TableCell>
-                          <TableCell>
-                            <Typography variant="body2" sx={{ maxWidth: 200, wordBreak: 'break-word' }}>
-                              {scenario.expected_result || scenario.expected || 'N/A'}
-                            </Typography>
-                          </TableCell>
-                          {hasObservedResults(report.browser_compatibility_scenarios) && (
-                            <TableCell>
-                              <Typography variant="body2" sx={{ maxWidth: 200, wordBreak: 'break-word' }}>
-                                {scenario.observed_result || scenario.observed || 'N/A'}
-                              </Typography>
-                            </TableCell>
                           )}
+                        </TableCell>
+                        <TableCell>
+                          <Typography variant="body2" sx={{ maxWidth: 200, wordBreak: 'break-word' }}>
+                            {scenario.expected_result || scenario.expected || 'N/A'}
+                          </Typography>
+                        </TableCell>
+                        {browserScenariosHaveObserved && (
                           <TableCell>
-                            <Typography variant="body2" sx={{ maxWidth: 150, wordBreak: 'break-word' }}>
-                              {Array.isArray(scenario.affected_browsers) ? 
-                                scenario.affected_browsers.join(', ') : 
-                                scenario.affected_browsers || 'None'}
-                            </Typography>
-                          </TableCell>
-                          <TableCell>
-                            <Typography variant="body2" sx={{ maxWidth: 150, wordBreak: 'break-word' }}>
-                              {Array.isArray(scenario.affected_platforms) ? 
-                                scenario.affected_platforms.join(', ') : 
-                                scenario.affected_platforms || 'None'}
+                            <Typography variant="body2" sx={{ maxWidth: 200, wordBreak: 'break-word' }}>
+                              {scenario.observed_result || scenario.observed || 'N/A'}
                             </Typography>
                           </TableCell>
-                          <TableCell>
-                            <Box sx={{ display: 'flex', alignItems: 'center', gap: 1 }}>
-                              {getStatusIcon(scenario.status)}
-                              <Chip 
-                                label={scenario.status || 'warning'} 
-                                size="small"
-                                color={getStatusColor(scenario.status)}
-                                variant="outlined"
-                              />
-                            </Box>
-                          </TableCell>
-                        </TableRow>
-                      ))}
-                    </TableBody>
-                  </Table>
-                  {getFilteredBrowserScenarios(report.browser_compatibility_scenarios).length === 0 && (
+                        )}
+                        <TableCell>
+                          <Typography variant="body2" sx={{ maxWidth: 150, wordBreak: 'break-word' }}>
+                            {Array.isArray(scenario.affected_browsers) ? 
+                              scenario.affected_browsers.join(', ') : 
+                              scenario.affected_browsers || 'None'}
+                          </Typography>
+                        </TableCell>
+                        <TableCell>
+                          <Typography variant="body2" sx={{ maxWidth: 150, wordBreak: 'break-word' }}>
+                            {Array.isArray(scenario.affected_platforms) ? 
+                              scenario.affected_platforms.join(', ') : 
+                              scenario.affected_platforms || 'None'}
+                          </Typography>
+                        </TableCell>
+                        <TableCell>
+                          <Box sx={{ display: 'flex', alignItems: 'center', gap: 1 }}>
+                            {getStatusIcon(scenario.status)}
+                            <Chip 
+                              label={scenario.status || 'warning'} 
+                              size="small"
+                              color={getStatusColor(scenario.status)}
+                              variant="outlined"
+                            />
+                          </Box>
+                        </TableCell>
+                      </TableRow>
+                    )}
+                  />
+                  {filteredBrowserScenarios.length === 0 && (
                     <Box sx={{ p: 3, textAlign: 'center' }}>
                       <Typography color="text.secondary">
                         No browser compatibility tests match the current filters
@@ -1323,7 +1317,7 @@ const TestResults = () => {
 
         {/* Performance Analysis */}
         <Grid item xs={12}>
-          <Accordion>
+          <Accordion TransitionProps={{ unmountOnExit: true }}>
             <AccordionSummary expandIcon={<ExpandMore />}>
               <Typography variant="h6">
                 <Speed sx={{ mr: 1, verticalAlign: 'middle' }} />
@@ -1388,9 +1382,63 @@ const TestResults = () => {
           </Accordion>
         </Grid>
 
+        {/* Timing Waterfall */}
+        {timeline.length > 0 && (
+          <Grid item xs={12}>
+            <Accordion TransitionProps={{ unmountOnExit: true }}>
+              <AccordionSummary expandIcon={<ExpandMore />}>
+                <Typography variant="h6">
+                  <Timeline sx={{ mr: 1, verticalAlign: 'middle' }} />
+                  Timing Waterfall ({timelineDuration.toFixed(1)}s)
+                </Typography>
+              </AccordionSummary>
+              <AccordionDetails>
+                <Box sx={{ display: 'flex', justifyContent: 'flex-end', gap: 1, mb: 2 }}>
+                  <Button size="small" variant="outlined" startIcon={<Download />} onClick={() => downloadTimeline('json')}>
+                    Export JSON
+                  </Button>
+                  <Button size="small" variant="outlined" startIcon={<Download />} onClick={() => downloadTimeline('csv')}>
+                    Export CSV
+                  </Button>
+                </Box>
+                {timeline.map((span, index) => (
+                  <Box key={index} sx={{ display: 'flex', alignItems: 'center', mb: 1 }}>
+                    <Box sx={{ width: 200, flexShrink: 0, pr: 2 }}>
+                      <Typography variant="body2" sx={{ fontWeight: 'medium' }}>
+                        {span.name}
+                      </Typography>
+                      <Typography variant="caption" color="text.secondary">
+                        {span.duration.toFixed(2)}s @ +{span.start_offset.toFixed(2)}s
+                      </Typography>
+                    </Box>
+                    <Box sx={{ flexGrow: 1, position: 'relative', height: 20, backgroundColor: '#f5f5f5', borderRadius: 1 }}>
+                      <Box
+                        title={formatSpanAttributes(span.attributes)}
+                        sx={{
+                          position: 'absolute',
+                          left: `${(span.start_offset / timelineDuration) * 100}%`,
+                          width: `${Math.max((span.duration / timelineDuration) * 100, 0.5)}%`,
+                          height: '100%',
+                          backgroundColor: getSpanColor(span.name),
+                          borderRadius: 1
+                        }}
+                      />
+                    </Box>
+                    <Box sx={{ width: 280, flexShrink: 0, pl: 2 }}>
+                      <Typography variant="caption" color="text.secondary">
+                        {formatSpanAttributes(span.attributes)}
+                      </Typography>
+                    </Box>
+                  </Box>
+                ))}
+              </AccordionDetails>
+            </Accordion>
+          </Grid>
+        )}
+
         {/* Defects and Gaps */}
         <Grid item xs={12}>
-          <Accordion>
+          <Accordion TransitionProps={{ unmountOnExit: true }}>
             <AccordionSummary expandIcon={<ExpandMore />}>
               <Typography variant="h6">
                 <BugReport sx={{ mr: 1, verticalAlign: 'middle' }} />
@@ -1398,35 +1446,40 @@ const TestResults = () => {
               </Typography>
             </AccordionSummary>
             <AccordionDetails>
-              <List>
-                {report.defects_and_gaps?.map((defect, index) => (
-                  <ListItem key={index} divider>
-                    <ListItemText
-                      primary={
-                        <Box sx={{ display: 'flex', alignItems: 'center', gap: 1 }}>
-                          {getSeverityIcon(defect.severity)}
-                          <Typography variant="body1">{defect.title || defect.description}</Typography>
-                          <Chip 
-                            label={defect.severity || 'Medium'} 
-                            size="small" 
-                            color={getSeverityColor(defect.severity)}
-                          />
-                        </Box>
-                      }
-                      secondary={defect.details || defect.description}
-                    />
-                  </ListItem>
-                )) || (
-                  <Typography color="text.secondary">No defects found</Typography>
-                )}
-              </List>
+              {report.defects_and_gaps ? (
+                <VirtualList
+                  items={report.defects_and_gaps}
+                  estimatedItemHeight={72}
+                  renderContainer={(rows) => <List>{rows}</List>}
+                  renderItem={(defect, index) => (
+                    <ListItem key={index} divider>
+                      <ListItemText
+                        primary={
+                          <Box sx={{ display: 'flex', alignItems: 'center', gap: 1 }}>
+                            {getSeverityIcon(defect.severity)}
+                            <Typography variant="body1">{defect.title || defect.description}</Typography>
+                            <Chip 
+                              label={defect.severity || 'Medium'} 
+                              size="small" 
+                              color={getSeverityColor(defect.severity)}
+                            />
+                          </Box>
+                        }
+                        secondary={defect.details || defect.description}
+                      />
+                    </ListItem>
+                  )}
+                />
+              ) : (
+                <Typography color="text.secondary">No defects found</Typography>
+              )}
             </AccordionDetails>
           </Accordion>
         </Grid>
 
         {/* Non-Functional Observations */}
         <Grid item xs={12}>
-          <Accordion>
+          <Accordion TransitionProps={{ unmountOnExit: true }}>
             <AccordionSummary expandIcon={<ExpandMore />}>
               <Typography variant="h6">
                 <Speed sx={{ mr: 1, verticalAlign: 'middle' }} />
@@ -1460,7 +1513,7 @@ const TestResults = () => {
 
         {/* Recommendations */}
         <Grid item xs={12}>
-          <Accordion>
+          <Accordion TransitionProps={{ unmountOnExit: true }}>
             <AccordionSummary expandIcon={<ExpandMore />}>
               <Typography variant="h6">
                 Recommendations ({report.recommendations?.length || 0})
@@ -1490,7 +1543,7 @@ const TestResults = () => {
 
         {/* Raw JSON Report
         <Grid item xs={12}>
-          <Accordion>
+          <Accordion TransitionProps={{ unmountOnExit: true }}>
             <AccordionSummary expandIcon={<ExpandMore />}>
               <Typography variant="h6">Raw JSON Report</Typography>
             </AccordionSummary>
@@ -0,0 +1,115 @@
+import React, { useState, useRef, useMemo, useEffect, useLayoutEffect, useCallback } from 'react';
+import { Box } from '@mui/material';
+
+// Windowed list: only the rows inside the scroll viewport (plus a few overscan rows)
+// are mounted, with spacer elements standing in for the rest. Row heights start at
+// an estimate and are replaced by measured heights once rows have rendered, so rows
+// with wrapped text still scroll correctly. Short lists are rendered in full.
+const VirtualList = ({
+  items,
+  renderItem,
+  renderSpacer = (height, key) => <div key={key} style={{ height }} />,
+  renderContainer = (children) => <>{children}</>,
+  estimatedItemHeight = 64,
+  height = 600,
+  overscan = 6,
+  threshold = 50
+}) => {
+  const containerRef = useRef(null);
+  const heightsRef = useRef(new Map());
+  const itemsRef = useRef(items);
+  const [scrollTop, setScrollTop] = useState(0);
+  const [measureVersion, setMeasureVersion] = useState(0);
+  const frameRef = useRef(null);
+  const latestScrollTopRef = useRef(0);
+
+  // Measurements are per position, so they are dropped when the (filtered) items change
+  if (itemsRef.current !== items) {
+    itemsRef.current = items;
+    heightsRef.current = new Map();
+  }
+
+  const virtualized = items.length > threshold;
+
+  const offsets = useMemo(() => {
+    const result = new Array(items.length + 1);
+    result[0] = 0;
+    for (let i = 0; i < items.length; i++) {
+      result[i + 1] = result[i] + (heightsRef.current.get(i) ?? estimatedItemHeight);
+    }
+    return result;
+  }, [items, estimatedItemHeight, measureVersion]);
+
+  let start = 0;
+  let end = items.length;
+  if (virtualized) {
+    // Binary search for the first row that ends below the top of the viewport
+    let low = 0;
+    let high = items.length - 1;
+    while (low < high) {
+      const mid = (low + high) >> 1;
+      if (offsets[mid + 1] <= scrollTop) {
+        low = mid + 1;
+      } else {
+        high = mid;
+      }
+    }
+    start = Math.max(0, low - overscan);
+    end = low;
+    while (end < items.length && offsets[end] < scrollTop + height) {
+      end++;
+    }
+    end = Math.min(items.length, end + overscan);
+  }
+
+  useLayoutEffect(() => {
+    if (!virtualized || !containerRef.current) return;
+    let changed = false;
+    containerRef.current.querySelectorAll('[data-virtual-index]').forEach(element => {
+      const index = Number(element.getAttribute('data-virtual-index'));
+      const measured = element.getBoundingClientRect().height;
+      if (measured && Math.abs((heightsRef.current.get(index) ?? estimatedItemHeight) - measured) > 0.5) {
+        heightsRef.current.set(index, measured);
+        changed = true;
+      }
+    });
+    if (changed) {
+      setMeasureVersion(version => version + 1);
+    }
+  });
+
+  useEffect(() => () => cancelAnimationFrame(frameRef.current), []);
+
+  const handleScroll = useCallback((event) => {
+    latestScrollTopRef.current = event.currentTarget.scrollTop;
+    // Coalesce scroll events into at most one re-render per animation frame
+    if (frameRef.current) return;
+    frameRef.current = requestAnimationFrame(() => {
+      frameRef.current = null;
+      setScrollTop(latestScrollTopRef.current);
+    });
+  }, []);
+
+  if (!virtualized) {
+    return renderContainer(items.map((item, index) => renderItem(item, index)));
+  }
+
+  const rows = [];
+  if (offsets[start] > 0) {
+    rows.push(renderSpacer(offsets[start], 'virtual-spacer-top'));
+  }
+  for (let index = start; index < end; index++) {
+    rows.push(React.cloneElement(renderItem(items[index], index), { 'data-virtual-index': index }));
+  }
+  if (offsets[items.length] - offsets[end] > 0) {
+    rows.push(renderSpacer(offsets[items.length] - offsets[end], 'virtual-spacer-bottom'));
+  }
+
+  return (
+    <Box ref={containerRef} onScroll={handleScroll} sx={{ maxHeight: height, overflowY: 'auto' }}>
+      {renderContainer(rows)}
+    </Box>
+  );
+};
+
+export default VirtualList;